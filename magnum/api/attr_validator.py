@@ -12,15 +12,21 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import eventlet
 from glanceclient import exc as glance_exception
 from novaclient import exceptions as nova_exception
 from oslo_serialization import jsonutils
+from oslo_utils import uuidutils
 
 from magnum.api import utils as api_utils
+from magnum.common import cache
 from magnum.common import clients
 from magnum.common import exception
+import magnum.conf
 from magnum.i18n import _
 
+CONF = magnum.conf.CONF
+
 
 SUPPORTED_ISOLATION = ['filesystem/posix', 'filesystem/linux',
                        'filesystem/shared', 'posix/cpu',
@@ -30,17 +36,62 @@ SUPPORTED_ISOLATION = ['filesystem/posix', 'filesystem/linux',
 SUPPORTED_IMAGE_PROVIDERS = ['docker', 'appc']
 SUPPORTED_SWARM_STRATEGY = ['spread', 'binpack', 'random']
 
+# Lookups of the OpenStack resources referenced by the cluster templates
+# and clusters, shared by the requests of a project.
+_CACHE = None
+_MISSING = object()
+_NOT_FOUND = object()
+
+
+def _get_cache():
+    global _CACHE
+    if _CACHE is None:
+        _CACHE = cache.TTLCache(CONF.api.validation_cache_size,
+                                CONF.api.validation_cache_ttl)
+    return _CACHE
+
+
+def _cached_lookup(cli, kind, ident, lookup, per_user=False):
+    """Look up an OpenStack resource through the validation cache.
+
+    :param lookup: callable returning the resource, or None when it does
+                   not exist, which is cached for a shorter time.
+    :returns: the resource or None
+    """
+    if not CONF.api.validation_cache_size:
+        return lookup()
+
+    context = cli.context
+    key = (kind, context.project_id,
+           context.user_id if per_user else None, ident)
+    resources = _get_cache()
+    value = resources.get(key, _MISSING)
+    if value is _MISSING:
+        value = lookup()
+        if value is not None:
+            resources.set(key, value)
+        elif CONF.api.validation_cache_negative_ttl:
+            resources.set(key, _NOT_FOUND,
+                          ttl=CONF.api.validation_cache_negative_ttl)
+    return None if value is _NOT_FOUND else value
+
 
 def validate_image(cli, image):
     """Validate image"""
 
+    def lookup():
+        try:
+            return api_utils.get_openstack_resource(cli.glance().images,
+                                                    image, 'images')
+        except (glance_exception.NotFound, exception.ResourceNotFound):
+            return None
+
     try:
-        image_found = api_utils.get_openstack_resource(cli.glance().images,
-                                                       image, 'images')
-    except (glance_exception.NotFound, exception.ResourceNotFound):
-        raise exception.ImageNotFound(image_id=image)
+        image_found = _cached_lookup(cli, 'image', image, lookup)
     except glance_exception.HTTPForbidden:
         raise exception.ImageNotAuthorized(image_id=image)
+    if image_found is None:
+        raise exception.ImageNotFound(image_id=image)
     if not image_found.get('os_distro'):
         raise exception.OSDistroFieldNotFound(image_id=image)
     return image_found
@@ -55,11 +106,21 @@ def validate_flavor(cli, flavor):
 
     if flavor is None:
         return
-    flavor_list = cli.nova().flavors.list()
-    for f in flavor_list:
-        if f.name == flavor or f.id == flavor:
-            return
-    raise exception.FlavorNotFound(flavor=flavor)
+
+    def lookup():
+        nova = cli.nova()
+        try:
+            return nova.flavors.get(flavor).id
+        except (nova_exception.NotFound, nova_exception.BadRequest):
+            pass
+        # Nova can't filter flavors by name.
+        for f in nova.flavors.list():
+            if f.name == flavor or f.id == flavor:
+                return f.id
+        return None
+
+    if _cached_lookup(cli, 'flavor', flavor, lookup) is None:
+        raise exception.FlavorNotFound(flavor=flavor)
 
 
 def validate_keypair(cli, keypair):
@@ -69,22 +130,39 @@ def validate_keypair(cli, keypair):
     """
     if keypair is None:
         return
-    try:
-        cli.nova().keypairs.get(keypair)
-    except nova_exception.NotFound:
+
+    def lookup():
+        try:
+            cli.nova().keypairs.get(keypair)
+        except nova_exception.NotFound:
+            return None
+        return True
+
+    if _cached_lookup(cli, 'keypair', keypair, lookup,
+                      per_user=True) is None:
         raise exception.KeyPairNotFound(keypair=keypair)
 
 
 def validate_external_network(cli, external_network):
     """Validate external network"""
 
-    count = 0
-    ext_filter = {'router:external': True}
-    networks = cli.neutron().list_networks(**ext_filter)
-    for net in networks.get('networks'):
-        if (net.get('name') == external_network or
-                net.get('id') == external_network):
-            count = count + 1
+    def lookup():
+        neutron = cli.neutron()
+        filters = [{'name': external_network}]
+        if uuidutils.is_uuid_like(external_network):
+            filters.insert(0, {'id': external_network})
+        for ext_filter in filters:
+            ext_filter['router:external'] = True
+            networks = neutron.list_networks(**ext_filter)
+            ids = [net.get('id') for net in networks.get('networks')
+                   if (net.get('name') == external_network or
+                       net.get('id') == external_network)]
+            if ids:
+                return ids
+        return None
+
+    count = len(_cached_lookup(cli, 'external_network', external_network,
+                               lookup) or [])
 
     if count == 0:
         # Unable to find the external network.
@@ -191,20 +269,44 @@ def validate_os_resources(context, cluster_template, cluster=None):
 
     cli = clients.OpenStackClients(context)
 
+    validations = []
     for attr, validate_method in validators.items():
         if cluster and attr in cluster and cluster[attr]:
-            if attr != 'labels':
-                validate_method(cli, cluster[attr])
-            else:
-                validate_method(cluster[attr])
+            value = cluster[attr]
         elif attr in cluster_template and cluster_template[attr] is not None:
-            if attr != 'labels':
-                validate_method(cli, cluster_template[attr])
-            else:
-                validate_method(cluster_template[attr])
+            value = cluster_template[attr]
+        else:
+            continue
+        if attr != 'labels':
+            validations.append((validate_method, (cli, value)))
+        else:
+            validations.append((validate_method, (value,)))
 
     if cluster:
-        validate_keypair(cli, cluster['keypair'])
+        validations.append((validate_keypair, (cli, cluster['keypair'])))
+
+    _run_validations(validations)
+
+
+def _run_validations(validations):
+    """Run the validations concurrently.
+
+    The validations are independent, so they run in green threads. Once
+    all of them are done, the error of the first failed one is raised.
+    """
+    def run(validation):
+        validate_method, args = validation
+        try:
+            validate_method(*args)
+        except Exception as e:
+            return e
+
+    if not validations:
+        return
+    pool = eventlet.GreenPool(len(validations))
+    for error in list(pool.imap(run, validations)):
+        if error is not None:
+            raise error
 
 
 def validate_master_count(cluster, cluster_template):
@@ -32,6 +32,7 @@ from magnum.conductor.handlers import federation_conductor
 from magnum.conductor.handlers import indirection_api
 from magnum.conductor.handlers import nodegroup_conductor
 import magnum.conf
+from magnum.drivers.heat import template_cache
 from magnum import version
 
 CONF = magnum.conf.CONF
@@ -47,6 +48,9 @@ def main():
     LOG.debug("Configuration:")
     CONF.log_opt_values(LOG, logging.DEBUG)
 
+    # Parse the driver templates once, before the workers are forked.
+    template_cache.preload()
+
     conductor_id = short_id.generate_id()
     endpoints = [
         indirection_api.Handler(),
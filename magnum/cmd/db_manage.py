@@ -13,9 +13,12 @@
 
 """Starter script for magnum-db-manage."""
 
+import sys
+
 from oslo_config import cfg
 from oslo_log import log as logging
 
+from magnum.db import api as dbapi
 from magnum.db import migration
 
 
@@ -39,6 +42,22 @@ def do_revision():
                        autogenerate=CONF.command.autogenerate)
 
 
+def do_check_node_counts():
+    connection = dbapi.get_instance()
+    stale = connection.get_clusters_with_stale_node_counts()
+    for uuid, node_count, master_count, nodes, masters in stale:
+        print('Cluster %s: node_count %s (expected %s), master_count %s '
+              '(expected %s)' % (uuid, node_count, nodes, master_count,
+                                 masters))
+    if not stale:
+        print('The node counts of all clusters are consistent')
+    elif CONF.command.fix:
+        connection.sync_cluster_node_counts([row[0] for row in stale])
+        print('Fixed the node counts of %d cluster(s)' % len(stale))
+    else:
+        sys.exit(1)
+
+
 def add_command_parsers(subparsers):
     parser = subparsers.add_parser('version')
     parser.set_defaults(func=do_version)
@@ -56,6 +75,11 @@ def add_command_parsers(subparsers):
     parser.add_argument('--autogenerate', action='store_true')
     parser.set_defaults(func=do_revision)
 
+    parser = subparsers.add_parser('check_node_counts')
+    parser.add_argument('--fix', action='store_true',
+                        help='Recompute the inconsistent node counts.')
+    parser.set_defaults(func=do_check_node_counts)
+
 
 command_opt = cfg.SubCommandOpt('command',
                                 title='Command',
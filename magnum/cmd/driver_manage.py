@@ -58,6 +58,8 @@ class DriverList(lister.Lister):
     def take_action(self, parsed_args):
         rows = []
 
+        # List what is installed now rather than what this process loaded.
+        driver.Driver.reload_drivers()
         for entry_point, cls in driver.Driver.load_entry_points():
             name = entry_point.name
             definition = cls().get_template_definition()
@@ -0,0 +1,117 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Small in-process caches shared by the magnum services."""
+
+import collections
+import threading
+
+from oslo_utils import timeutils
+
+
+class TTLCache(object):
+    """A thread-safe LRU cache whose entries expire after a TTL.
+
+    :param maxsize: maximum number of entries, the least recently used entry
+                    is evicted when it is exceeded. 0 means unbounded.
+    :param ttl: time to live of an entry in seconds. 0 means entries never
+                expire.
+    :param on_evict: optional callable invoked with (key, value) when an
+                     entry is evicted, expires or is removed.
+    """
+
+    def __init__(self, maxsize, ttl, on_evict=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self.hits = 0
+        self.misses = 0
+        self._data = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def _expired(self, expires_at):
+        return expires_at is not None and timeutils.utcnow_ts(
+            microsecond=True) >= expires_at
+
+    def _evict(self, key, value):
+        if self.on_evict is not None:
+            self.on_evict(key, value)
+
+    def get(self, key, default=None):
+        evicted = None
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and self._expired(entry[1]):
+                del self._data[key]
+                evicted = entry[0]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                value = default
+            else:
+                self.hits += 1
+                # move_to_end is not available on python 2.7
+                del self._data[key]
+                self._data[key] = entry
+                value = entry[0]
+        if evicted is not None:
+            self._evict(key, evicted)
+        return value
+
+    def set(self, key, value, ttl=None):
+        """Store a value, ttl overrides the TTL of the cache for the entry."""
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = None
+        if ttl:
+            expires_at = timeutils.utcnow_ts(microsecond=True) + ttl
+        evicted = []
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None and old[0] is not value:
+                evicted.append((key, old[0]))
+            self._data[key] = (value, expires_at)
+            while self.maxsize and len(self._data) > self.maxsize:
+                old_key, old = self._data.popitem(last=False)
+                evicted.append((old_key, old[0]))
+        for old_key, old_value in evicted:
+            self._evict(old_key, old_value)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._data.pop(key, None)
+        if entry is None:
+            return default
+        self._evict(key, entry[0])
+        return entry[0]
+
+    def pop_matching(self, predicate):
+        """Remove all the entries whose key matches the predicate."""
+        with self._lock:
+            keys = [key for key in self._data if predicate(key)]
+            entries = [(key, self._data.pop(key)[0]) for key in keys]
+        for key, value in entries:
+            self._evict(key, value)
+        return len(entries)
+
+    def clear(self):
+        with self._lock:
+            entries = list(self._data.items())
+            self._data.clear()
+        for key, entry in entries:
+            self._evict(key, entry[0])
+
+    def get_stats(self):
+        return {'size': len(self._data), 'maxsize': self.maxsize,
+                'hits': self.hits, 'misses': self.misses}
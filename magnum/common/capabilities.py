@@ -0,0 +1,119 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Registry of the optional OpenStack services deployed in the cloud.
+
+The services registered in keystone are listed in the background, every
+``[keystone_auth]services_refresh_interval`` seconds, so that checking
+whether a service is enabled does not need any request. The services are
+listed on demand when they have not been refreshed in twice that time.
+"""
+
+import threading
+
+from oslo_log import log as logging
+from oslo_utils import timeutils
+
+from magnum.common import context
+from magnum.common import exception
+from magnum.common import keystone
+import magnum.conf
+
+CONF = magnum.conf.CONF
+LOG = logging.getLogger(__name__)
+
+# The service types each optional service can be registered with.
+SERVICE_TYPES = {
+    'octavia': ('load-balancer',),
+    'barbican': ('key-manager',),
+    'cinder': ('block-storage', 'volumev3', 'volumev2', 'volume'),
+}
+
+
+class ServiceRegistry(object):
+    """Whether the optional services are enabled in the cloud."""
+
+    def __init__(self):
+        self._enabled = None
+        self._refreshed_at = None
+        self._refresh_lock = threading.Lock()
+
+    def refresh(self):
+        """List the services registered in keystone.
+
+        :raises ServicesListFailed: if the services can't be listed.
+        """
+        admin_context = context.make_admin_context()
+        ks = keystone.KeystoneClientV3(admin_context)
+        try:
+            services = ks.client.services.list()
+        except Exception:
+            LOG.exception('Failed to list services')
+            raise exception.ServicesListFailed()
+
+        enabled = {}
+        for service in services:
+            # Always assume there is only one service configured per type.
+            enabled.setdefault(service.type, bool(service.enabled))
+        self._enabled = enabled
+        self._refreshed_at = timeutils.utcnow_ts()
+
+    def _is_stale(self):
+        if self._enabled is None:
+            return True
+        max_age = 2 * CONF.keystone_auth.services_refresh_interval
+        return timeutils.utcnow_ts() - self._refreshed_at >= max_age
+
+    def is_enabled(self, service):
+        """Return whether a service of SERVICE_TYPES is enabled.
+
+        :raises ServicesListFailed: if the services were never listed and
+                                    can't be listed.
+        """
+        if self._is_stale():
+            with self._refresh_lock:
+                if self._is_stale():
+                    try:
+                        self.refresh()
+                    except exception.ServicesListFailed:
+                        if self._enabled is None:
+                            raise
+                        LOG.warning('Using the services listed %d seconds '
+                                    'ago.', timeutils.utcnow_ts() -
+                                    self._refreshed_at)
+        return any(self._enabled.get(service_type, False)
+                   for service_type in SERVICE_TYPES[service])
+
+    def clear(self):
+        self._enabled = None
+        self._refreshed_at = None
+
+
+REGISTRY = ServiceRegistry()
+
+
+def is_enabled(service):
+    return REGISTRY.is_enabled(service)
+
+
+def _refresh():
+    try:
+        REGISTRY.refresh()
+    except exception.ServicesListFailed:
+        # Already logged, the services are listed again on the next run.
+        pass
+
+
+def setup(conf, tg):
+    """Refresh the registry in the background of a service."""
+    interval = conf.keystone_auth.services_refresh_interval
+    tg.add_timer(interval, _refresh, initial_delay=interval)
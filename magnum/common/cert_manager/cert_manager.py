@@ -46,6 +46,11 @@ class Cert(object):
         return operations.decrypt_key(self.get_private_key(),
                                       self.get_private_key_passphrase())
 
+    def get_loaded_private_key(self):
+        """Returns the private key loaded for the cryptography library."""
+        return operations.load_private_key(self.get_private_key(),
+                                           self.get_private_key_passphrase())
+
     @abc.abstractmethod
     def get_private_key_passphrase(self):
         """Returns the passphrase for the private key."""
@@ -12,16 +12,21 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import datetime
+
 from barbicanclient.v1 import client as barbicanclient
 from cinderclient.v2 import client as cinder_client
 from glanceclient import client as glanceclient
 from heatclient import client as heatclient
+from keystoneauth1.access import access as ka_access
 from keystoneauth1.exceptions import catalog
 from neutronclient.v2_0 import client as neutronclient
 from novaclient import client as novaclient
 from octaviaclient.api.v2 import octavia
 from oslo_log import log as logging
+from oslo_utils import timeutils
 
+from magnum.common import cache
 from magnum.common import exception
 from magnum.common import keystone
 import magnum.conf
@@ -29,12 +34,65 @@ import magnum.conf
 CONF = magnum.conf.CONF
 LOG = logging.getLogger(__name__)
 
+# Clients bound to a token are dropped this many seconds before the token
+# expires.
+TOKEN_EXPIRY_MARGIN = 300
+
+_CLIENTS = None
+_ENDPOINTS = None
+
+
+def _get_client_cache():
+    global _CLIENTS
+    if _CLIENTS is None:
+        conf = CONF.keystone_auth
+        _CLIENTS = cache.TTLCache(conf.client_cache_size,
+                                  conf.client_cache_ttl)
+    return _CLIENTS
+
+
+def _get_endpoint_cache():
+    global _ENDPOINTS
+    if _ENDPOINTS is None:
+        conf = CONF.keystone_auth
+        _ENDPOINTS = cache.TTLCache(conf.client_cache_size,
+                                    conf.catalog_cache_ttl)
+    return _ENDPOINTS
+
+
+def _auth_identity(context):
+    """Return what the clients of a context authenticate with.
+
+    Contexts with the same identity share their clients, None means the
+    clients of the context are not shared.
+    """
+    if context is None or not CONF.keystone_auth.client_cache_size:
+        return None
+    if context.auth_token or context.auth_token_info:
+        # Only share the clients of a token whose expiry is known without
+        # asking keystone.
+        if context.auth_token and context.auth_token_info:
+            return ('token', context.auth_token)
+        return None
+    if context.trust_id:
+        return ('trust', context.trust_id, context.user_name)
+    if context.is_admin:
+        return ('admin',)
+    return None
+
 
 class OpenStackClients(object):
-    """Convenience class to create and cache client instances."""
+    """Convenience class to create and cache client instances.
+
+    Besides being kept by the instance, the clients are shared by the
+    instances whose context authenticates the same way, so that periodic
+    tasks and requests reuse their sessions and connections. Clients
+    holding a token are dropped before the token expires.
+    """
 
     def __init__(self, context):
         self.context = context
+        self._identity = _auth_identity(context)
         self._keystone = None
         self._heat = None
         self._glance = None
@@ -44,8 +102,76 @@ class OpenStackClients(object):
         self._octavia = None
         self._cinder = None
 
+    def _token_expires_at(self, keystone_client=None):
+        if self._identity[0] == 'token':
+            try:
+                expires_at = ka_access.create(
+                    body=self.context.auth_token_info,
+                    auth_token=self.context.auth_token).expires
+            except Exception:
+                return None
+        else:
+            keystone_client = keystone_client or self.keystone()
+            expires_at = keystone_client.token_expires_at
+        if not isinstance(expires_at, datetime.datetime):
+            return None
+        return expires_at
+
+    def _shared_ttl(self, session_auth, keystone_client=None):
+        """Return how long a shared client can be kept, None if not at all.
+
+        Clients authenticating through the keystone session renew their
+        token themselves, unless the token was given by the user.
+        """
+        ttl = CONF.keystone_auth.client_cache_ttl
+        if session_auth and self._identity[0] != 'token':
+            return ttl
+        expires_at = self._token_expires_at(keystone_client)
+        if expires_at is None:
+            return None
+        remaining = timeutils.delta_seconds(
+            timeutils.utcnow(), timeutils.normalize_time(expires_at))
+        remaining -= TOKEN_EXPIRY_MARGIN
+        if remaining <= 0:
+            return None
+        return min(ttl, remaining)
+
+    def _shared(self, name, create, session_auth=False):
+        """Return the shared client of the identity, creating it if needed.
+
+        :param name: the name of the client.
+        :param create: callable creating the client.
+        :param session_auth: whether the client authenticates through the
+                             keystone session.
+        """
+        if self._identity is None:
+            return create()
+        clients = _get_client_cache()
+        key = (self._identity, name)
+        client = clients.get(key)
+        if client is not None:
+            return client
+        client = create()
+        if name == 'keystone':
+            ttl = self._shared_ttl(session_auth, keystone_client=client)
+        else:
+            ttl = self._shared_ttl(session_auth)
+        if ttl is not None:
+            clients.set(key, client, ttl=ttl)
+        return client
+
     def url_for(self, **kwargs):
-        return self.keystone().session.get_endpoint(**kwargs)
+        if self._identity is None:
+            return self.keystone().session.get_endpoint(**kwargs)
+        endpoints = _get_endpoint_cache()
+        key = ((self.context.project_id or self._identity,) +
+               tuple(sorted(kwargs.items())))
+        endpoint = endpoints.get(key)
+        if endpoint is None:
+            endpoint = self.keystone().session.get_endpoint(**kwargs)
+            if endpoint is not None:
+                endpoints.set(key, endpoint)
+        return endpoint
 
     def magnum_url(self):
         endpoint_type = self._get_client_option('magnum', 'endpoint_type')
@@ -78,7 +204,9 @@ class OpenStackClients(object):
         if self._keystone:
             return self._keystone
 
-        self._keystone = keystone.KeystoneClientV3(self.context)
+        self._keystone = self._shared(
+            'keystone', lambda: keystone.KeystoneClientV3(self.context),
+            session_auth=True)
         return self._keystone
 
     def _get_client_option(self, client, option):
@@ -89,6 +217,11 @@ class OpenStackClients(object):
         if self._octavia:
             return self._octavia
 
+        self._octavia = self._shared('octavia', self._create_octavia,
+                                     session_auth=True)
+        return self._octavia
+
+    def _create_octavia(self):
         region_name = self._get_client_option('octavia', 'region_name')
         endpoint_type = self._get_client_option('octavia', 'endpoint_type')
         endpoint = self.url_for(service_type='load-balancer',
@@ -104,6 +237,10 @@ class OpenStackClients(object):
         if self._heat:
             return self._heat
 
+        self._heat = self._shared('heat', self._create_heat)
+        return self._heat
+
+    def _create_heat(self):
         endpoint_type = self._get_client_option('heat', 'endpoint_type')
         region_name = self._get_client_option('heat', 'region_name')
         heatclient_version = self._get_client_option('heat', 'api_version')
@@ -122,15 +259,17 @@ class OpenStackClients(object):
             'key_file': self._get_client_option('heat', 'key_file'),
             'insecure': self._get_client_option('heat', 'insecure')
         }
-        self._heat = heatclient.Client(heatclient_version, **args)
-
-        return self._heat
+        return heatclient.Client(heatclient_version, **args)
 
     @exception.wrap_keystone_exception
     def glance(self):
         if self._glance:
             return self._glance
 
+        self._glance = self._shared('glance', self._create_glance)
+        return self._glance
+
+    def _create_glance(self):
         endpoint_type = self._get_client_option('glance', 'endpoint_type')
         region_name = self._get_client_option('glance', 'region_name')
         glanceclient_version = self._get_client_option('glance', 'api_version')
@@ -148,30 +287,35 @@ class OpenStackClients(object):
             'key': self._get_client_option('glance', 'key_file'),
             'insecure': self._get_client_option('glance', 'insecure')
         }
-        self._glance = glanceclient.Client(glanceclient_version, **args)
-
-        return self._glance
+        return glanceclient.Client(glanceclient_version, **args)
 
     @exception.wrap_keystone_exception
     def barbican(self):
         if self._barbican:
             return self._barbican
 
+        self._barbican = self._shared('barbican', self._create_barbican,
+                                      session_auth=True)
+        return self._barbican
+
+    def _create_barbican(self):
         endpoint_type = self._get_client_option('barbican', 'endpoint_type')
         region_name = self._get_client_option('barbican', 'region_name')
         endpoint = self.url_for(service_type='key-manager',
                                 interface=endpoint_type,
                                 region_name=region_name)
         session = self.keystone().session
-        self._barbican = barbicanclient.Client(session=session,
-                                               endpoint=endpoint)
-
-        return self._barbican
+        return barbicanclient.Client(session=session, endpoint=endpoint)
 
     @exception.wrap_keystone_exception
     def nova(self):
         if self._nova:
             return self._nova
+        self._nova = self._shared('nova', self._create_nova,
+                                  session_auth=True)
+        return self._nova
+
+    def _create_nova(self):
         endpoint_type = self._get_client_option('nova', 'endpoint_type')
         region_name = self._get_client_option('nova', 'region_name')
         novaclient_version = self._get_client_option('nova', 'api_version')
@@ -184,15 +328,17 @@ class OpenStackClients(object):
         }
 
         session = self.keystone().session
-        self._nova = novaclient.Client(novaclient_version,
-                                       session=session,
-                                       endpoint_override=endpoint, **args)
-        return self._nova
+        return novaclient.Client(novaclient_version, session=session,
+                                 endpoint_override=endpoint, **args)
 
     @exception.wrap_keystone_exception
     def neutron(self):
         if self._neutron:
             return self._neutron
+        self._neutron = self._shared('neutron', self._create_neutron)
+        return self._neutron
+
+    def _create_neutron(self):
         endpoint_type = self._get_client_option('neutron', 'endpoint_type')
         region_name = self._get_client_option('neutron', 'region_name')
         endpoint = self.url_for(service_type='network',
@@ -207,13 +353,17 @@ class OpenStackClients(object):
             'ca_cert': self._get_client_option('neutron', 'ca_file'),
             'insecure': self._get_client_option('neutron', 'insecure')
         }
-        self._neutron = neutronclient.Client(**args)
-        return self._neutron
+        return neutronclient.Client(**args)
 
     @exception.wrap_keystone_exception
     def cinder(self):
         if self._cinder:
             return self._cinder
+        self._cinder = self._shared('cinder', self._create_cinder,
+                                    session_auth=True)
+        return self._cinder
+
+    def _create_cinder(self):
         endpoint_type = self._get_client_option('cinder', 'endpoint_type')
         region_name = self._get_client_option('cinder', 'region_name')
         cinderclient_version = self._get_client_option('cinder', 'api_version')
@@ -226,7 +376,5 @@ class OpenStackClients(object):
         }
 
         session = self.keystone().session
-        self._cinder = cinder_client.Client(cinderclient_version,
-                                            session=session,
-                                            endpoint_override=endpoint, **args)
-        return self._cinder
+        return cinder_client.Client(cinderclient_version, session=session,
+                                    endpoint_override=endpoint, **args)
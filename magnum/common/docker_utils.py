@@ -15,6 +15,7 @@ import contextlib
 
 import docker
 from docker.utils import utils
+from requests import adapters
 
 from magnum.conductor.handlers.common import cert_manager
 from magnum.conductor import utils as conductor_utils
@@ -53,14 +54,10 @@ def docker_for_cluster(context, cluster):
     cluster_template = conductor_utils.retrieve_cluster_template(
         context, cluster)
 
-    ca_cert, magnum_key, magnum_cert = None, None, None
     client_kwargs = dict()
     if not cluster_template.tls_disabled:
-        (ca_cert, magnum_key,
-         magnum_cert) = cert_manager.create_client_files(cluster, context)
-        client_kwargs['ca_cert'] = ca_cert.name
-        client_kwargs['client_key'] = magnum_key.name
-        client_kwargs['client_cert'] = magnum_cert.name
+        client_kwargs['ssl_context'] = cert_manager.get_client_ssl_context(
+            cluster, context)
 
     yield DockerHTTPClient(
         cluster.api_address,
@@ -69,12 +66,52 @@ def docker_for_cluster(context, cluster):
         **client_kwargs
     )
 
-    if ca_cert:
-        ca_cert.close()
-    if magnum_key:
-        magnum_key.close()
-    if magnum_cert:
-        magnum_cert.close()
+
+class SSLContextAdapter(adapters.HTTPAdapter):
+    """Transport adapter serving HTTPS from a prepared SSL context."""
+
+    def __init__(self, ssl_context, assert_hostname=None, **kwargs):
+        self.ssl_context = ssl_context
+        self.assert_hostname = assert_hostname
+        super(SSLContextAdapter, self).__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False,
+                         **pool_kwargs):
+        pool_kwargs['ssl_context'] = self.ssl_context
+        if self.assert_hostname is not None:
+            pool_kwargs['assert_hostname'] = self.assert_hostname
+        super(SSLContextAdapter, self).init_poolmanager(
+            connections, maxsize, block=block, **pool_kwargs)
+
+    def cert_verify(self, conn, url, verify, cert):
+        # Certificates and verification come from the SSL context, the
+        # session defaults must not replace the cluster CA.
+        pass
+
+    def build_connection_pool_key_attributes(self, request, verify,
+                                             cert=None):
+        host_params, pool_kwargs = super(
+            SSLContextAdapter, self).build_connection_pool_key_attributes(
+                request, verify, cert)
+        pool_kwargs.pop('ca_certs', None)
+        pool_kwargs.pop('ca_cert_dir', None)
+        pool_kwargs.pop('cert_file', None)
+        pool_kwargs.pop('key_file', None)
+        pool_kwargs['cert_reqs'] = 'CERT_REQUIRED'
+        return host_params, pool_kwargs
+
+
+class SSLContextTLSConfig(docker.tls.TLSConfig):
+    """TLS configuration of a docker client backed by an SSL context."""
+
+    def __init__(self, ssl_context, assert_hostname=None):
+        self.ssl_context = ssl_context
+        self.assert_hostname = assert_hostname
+
+    def configure_client(self, client):
+        client._custom_adapter = SSLContextAdapter(
+            self.ssl_context, assert_hostname=self.assert_hostname)
+        client.mount('https://', client._custom_adapter)
 
 
 class DockerHTTPClient(docker.APIClient):
@@ -83,9 +120,13 @@ class DockerHTTPClient(docker.APIClient):
                  timeout=CONF.docker.default_timeout,
                  ca_cert=None,
                  client_key=None,
-                 client_cert=None):
+                 client_cert=None,
+                 ssl_context=None):
 
-        if ca_cert and client_key and client_cert:
+        if ssl_context is not None:
+            ssl_config = SSLContextTLSConfig(ssl_context,
+                                             assert_hostname=False)
+        elif ca_cert and client_key and client_cert:
             ssl_config = docker.tls.TLSConfig(
                 client_cert=(client_cert, client_key),
                 verify=ca_cert,
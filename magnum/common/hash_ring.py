@@ -0,0 +1,53 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Consistent hash ring used to split work between services."""
+
+import bisect
+import hashlib
+
+import six
+
+from magnum.common import exception
+from magnum.i18n import _
+
+
+class HashRing(object):
+    """A consistent hash ring with virtual nodes.
+
+    Each member is placed on the ring ``replicas`` times so that keys are
+    spread evenly, and adding or removing a member only moves the keys that
+    member owned.
+    """
+
+    def __init__(self, members, replicas=64):
+        self.members = frozenset(members)
+        self.replicas = replicas
+        self._ring = {}
+        for member in self.members:
+            for replica in range(replicas):
+                key = self._hash('%s-%d' % (member, replica))
+                self._ring[key] = member
+        self._sorted_keys = sorted(self._ring)
+
+    @staticmethod
+    def _hash(key):
+        return int(hashlib.md5(
+            six.text_type(key).encode('utf-8')).hexdigest(), 16)
+
+    def get_member(self, key):
+        """Return the member owning the given key."""
+        if not self._sorted_keys:
+            raise exception.Invalid(_('The hash ring has no members.'))
+        position = bisect.bisect(self._sorted_keys, self._hash(key))
+        return self._ring[self._sorted_keys[position % len(
+            self._sorted_keys)]]
@@ -10,14 +10,19 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import datetime
+import threading
+
 from keystoneauth1.access import access as ka_access
 from keystoneauth1 import exceptions as ka_exception
 from keystoneauth1.identity import access as ka_access_plugin
 from keystoneauth1.identity import v3 as ka_v3
 from keystoneauth1 import loading as ka_loading
+from keystoneauth1 import session as ka_session
 import keystoneclient.exceptions as kc_exception
 from keystoneclient.v3 import client as kc_v3
 from oslo_log import log as logging
+import requests
 
 from magnum.common import exception
 import magnum.conf
@@ -27,6 +32,111 @@ from magnum.i18n import _
 CONF = magnum.conf.CONF
 LOG = logging.getLogger(__name__)
 
+# The HTTP adapters, with their connection pools, and the version discovery
+# results shared by the keystone sessions of the process.
+_HTTP_ADAPTERS = None
+_HTTP_ADAPTERS_LOCK = threading.Lock()
+_DISCOVERY_CACHE = {}
+
+
+def _get_http_adapters():
+    global _HTTP_ADAPTERS
+    if _HTTP_ADAPTERS is None:
+        with _HTTP_ADAPTERS_LOCK:
+            if _HTTP_ADAPTERS is None:
+                pool_maxsize = CONF[ksconf.CFG_GROUP].connection_pool_maxsize
+                _HTTP_ADAPTERS = {
+                    scheme: ka_session.TCPKeepAliveAdapter(
+                        pool_maxsize=pool_maxsize)
+                    for scheme in ('https://', 'http://')}
+    return _HTTP_ADAPTERS
+
+
+def get_http_session():
+    """Return a requests session using the connection pools of the process.
+
+    Every keystone session gets its own requests session, so that cookies
+    received for one identity are never sent for another, but they all
+    mount the same adapters and reuse their connections.
+    """
+    session = requests.Session()
+    for scheme, adapter in _get_http_adapters().items():
+        session.mount(scheme, adapter)
+    return session
+
+
+# The trustee domain admin credentials shared by the process.
+_DOMAIN_ADMIN = None
+_DOMAIN_ADMIN_LOCK = threading.Lock()
+
+
+class _DomainAdmin(object):
+    """The session of the trustee domain admin and what it resolved.
+
+    The password plugin re-authenticates by itself before its token
+    expires, so a single session serves the whole process.
+    """
+
+    def __init__(self, conf_key, auth, session):
+        self.conf_key = conf_key
+        self.auth = auth
+        self.session = session
+        self.client = kc_v3.Client(session=session)
+        self.domain_id = None
+
+
+def _domain_admin_conf_key(auth_url):
+    trust = CONF.trust
+    legacy = CONF[ksconf.CFG_LEGACY_GROUP]
+    return (auth_url, trust.trustee_domain_admin_id,
+            trust.trustee_domain_admin_name,
+            trust.trustee_domain_admin_domain_id,
+            trust.trustee_domain_admin_domain_name,
+            trust.trustee_domain_id, trust.trustee_domain_name,
+            trust.trustee_domain_admin_password, legacy.insecure,
+            legacy.cafile, legacy.keyfile, legacy.certfile)
+
+
+def _get_domain_admin(auth_url):
+    """Return the shared domain admin, rebuilt when its options change."""
+    global _DOMAIN_ADMIN
+    conf_key = _domain_admin_conf_key(auth_url)
+    domain_admin = _DOMAIN_ADMIN
+    if domain_admin is not None and domain_admin.conf_key == conf_key:
+        return domain_admin
+    with _DOMAIN_ADMIN_LOCK:
+        if _DOMAIN_ADMIN is None or _DOMAIN_ADMIN.conf_key != conf_key:
+            trust = CONF.trust
+            auth = ka_v3.Password(
+                auth_url=auth_url,
+                user_id=trust.trustee_domain_admin_id,
+                username=trust.trustee_domain_admin_name,
+                user_domain_id=(trust.trustee_domain_admin_domain_id or
+                                trust.trustee_domain_id),
+                user_domain_name=(trust.trustee_domain_admin_domain_name or
+                                  trust.trustee_domain_name),
+                domain_id=trust.trustee_domain_id,
+                domain_name=trust.trustee_domain_name,
+                password=trust.trustee_domain_admin_password)
+            session = ka_loading.session.Session().load_from_options(
+                auth=auth,
+                insecure=CONF[ksconf.CFG_LEGACY_GROUP].insecure,
+                cacert=CONF[ksconf.CFG_LEGACY_GROUP].cafile,
+                key=CONF[ksconf.CFG_LEGACY_GROUP].keyfile,
+                cert=CONF[ksconf.CFG_LEGACY_GROUP].certfile,
+                session=get_http_session(),
+                discovery_cache=_DISCOVERY_CACHE)
+            _DOMAIN_ADMIN = _DomainAdmin(conf_key, auth, session)
+        return _DOMAIN_ADMIN
+
+
+def _invalidate_domain_admin(domain_admin):
+    """Drop the shared domain admin after it failed to authenticate."""
+    global _DOMAIN_ADMIN
+    with _DOMAIN_ADMIN_LOCK:
+        if _DOMAIN_ADMIN is domain_admin:
+            _DOMAIN_ADMIN = None
+
 
 class KeystoneClientV3(object):
     """Keystone client wrapper so we can encapsulate logic in one place."""
@@ -34,10 +144,6 @@ class KeystoneClientV3(object):
     def __init__(self, context):
         self.context = context
         self._client = None
-        self._domain_admin_auth = None
-        self._domain_admin_session = None
-        self._domain_admin_client = None
-        self._trustee_domain_id = None
         self._session = None
 
     @property
@@ -66,9 +172,21 @@ class KeystoneClientV3(object):
 
     def _get_session(self, auth):
         session = ka_loading.load_session_from_conf_options(
-            CONF, ksconf.CFG_GROUP, auth=auth)
+            CONF, ksconf.CFG_GROUP, auth=auth, session=get_http_session(),
+            discovery_cache=_DISCOVERY_CACHE)
         return session
 
+    @property
+    def token_expires_at(self):
+        """The expiry of the token of the session, None if unknown."""
+        try:
+            expires_at = self.session.auth.get_access(self.session).expires
+        except Exception:
+            return None
+        if not isinstance(expires_at, datetime.datetime):
+            return None
+        return expires_at
+
     def _get_auth(self):
         if self.context.auth_token_info:
             access_info = ka_access.create(body=self.context.auth_token_info,
@@ -135,65 +253,42 @@ class KeystoneClientV3(object):
         self._client = client
         return client
 
+    @property
+    def _domain_admin(self):
+        return _get_domain_admin(self.auth_url)
+
     @property
     def domain_admin_auth(self):
-        user_domain_id = (
-            CONF.trust.trustee_domain_admin_domain_id or
-            CONF.trust.trustee_domain_id
-        )
-        user_domain_name = (
-            CONF.trust.trustee_domain_admin_domain_name or
-            CONF.trust.trustee_domain_name
-        )
-        if not self._domain_admin_auth:
-            self._domain_admin_auth = ka_v3.Password(
-                auth_url=self.auth_url,
-                user_id=CONF.trust.trustee_domain_admin_id,
-                username=CONF.trust.trustee_domain_admin_name,
-                user_domain_id=user_domain_id,
-                user_domain_name=user_domain_name,
-                domain_id=CONF.trust.trustee_domain_id,
-                domain_name=CONF.trust.trustee_domain_name,
-                password=CONF.trust.trustee_domain_admin_password)
-        return self._domain_admin_auth
+        return self._domain_admin.auth
 
     @property
     def domain_admin_session(self):
-        if not self._domain_admin_session:
-            session = ka_loading.session.Session().load_from_options(
-                auth=self.domain_admin_auth,
-                insecure=CONF[ksconf.CFG_LEGACY_GROUP].insecure,
-                cacert=CONF[ksconf.CFG_LEGACY_GROUP].cafile,
-                key=CONF[ksconf.CFG_LEGACY_GROUP].keyfile,
-                cert=CONF[ksconf.CFG_LEGACY_GROUP].certfile)
-            self._domain_admin_session = session
-        return self._domain_admin_session
+        return self._domain_admin.session
 
     @property
     def domain_admin_client(self):
-        if not self._domain_admin_client:
-            self._domain_admin_client = kc_v3.Client(
-                session=self.domain_admin_session
-            )
-        return self._domain_admin_client
+        return self._domain_admin.client
 
     @property
     def trustee_domain_id(self):
-        if not self._trustee_domain_id:
+        """The ID of the trustee domain, resolved once per process."""
+        domain_admin = self._domain_admin
+        if not domain_admin.domain_id:
             try:
                 access = self.domain_admin_auth.get_access(
                     self.domain_admin_session
                 )
             except kc_exception.Unauthorized:
+                _invalidate_domain_admin(domain_admin)
                 msg = "Keystone client authentication failed"
                 LOG.error(msg)
                 raise exception.AuthorizationFailure(client='keystone',
                                                      message='reason: %s' %
                                                              msg)
 
-            self._trustee_domain_id = access.domain_id
+            domain_admin.domain_id = access.domain_id
 
-        return self._trustee_domain_id
+        return domain_admin.domain_id
 
     def create_trust(self, trustee_user):
         trustor_user_id = self.session.get_user_id()
@@ -252,11 +347,17 @@ class KeystoneClientV3(object):
 
     def create_trustee(self, username, password):
         domain_id = self.trustee_domain_id
+        domain_admin = self._domain_admin
         try:
-            user = self.domain_admin_client.users.create(
+            user = domain_admin.client.users.create(
                 name=username,
                 password=password,
                 domain=domain_id)
+        except kc_exception.Unauthorized:
+            _invalidate_domain_admin(domain_admin)
+            LOG.exception('Failed to create trustee')
+            raise exception.TrusteeCreateFailed(username=username,
+                                                domain_id=domain_id)
         except Exception:
             LOG.exception('Failed to create trustee')
             raise exception.TrusteeCreateFailed(username=username,
@@ -264,10 +365,15 @@ class KeystoneClientV3(object):
         return user
 
     def delete_trustee(self, trustee_id):
+        domain_admin = self._domain_admin
         try:
-            self.domain_admin_client.users.delete(trustee_id)
+            domain_admin.client.users.delete(trustee_id)
         except kc_exception.NotFound:
             pass
+        except kc_exception.Unauthorized:
+            _invalidate_domain_admin(domain_admin)
+            LOG.exception('Failed to delete trustee')
+            raise exception.TrusteeDeleteFailed(trustee_id=trustee_id)
         except Exception:
             LOG.exception('Failed to delete trustee')
             raise exception.TrusteeDeleteFailed(trustee_id=trustee_id)
@@ -310,18 +416,5 @@ def is_octavia_enabled():
     in the cloud.
     """
     # Put the import here to avoid circular importing.
-    from magnum.common import context
-    admin_context = context.make_admin_context()
-    keystone = KeystoneClientV3(admin_context)
-
-    try:
-        octavia_svc = keystone.client.services.list(type='load-balancer')
-    except Exception:
-        LOG.exception('Failed to list services')
-        raise exception.ServicesListFailed()
-
-    # Always assume there is only one load balancing service configured.
-    if octavia_svc and octavia_svc[0].enabled:
-        return True
-
-    return False
+    from magnum.common import capabilities
+    return capabilities.is_enabled('octavia')
@@ -58,7 +58,7 @@ def delete_floatingip(context, fix_port_id, cluster):
 def get_network(context, network, source, target, external):
     nets = []
     n_client = clients.OpenStackClients(context).neutron()
-    ext_filter = {'router:external': external}
+    ext_filter = {'router:external': external, source: network}
 
     networks = n_client.list_networks(**ext_filter)
     for net in networks.get('networks'):
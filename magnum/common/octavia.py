@@ -12,6 +12,7 @@
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
 
+import eventlet
 from oslo_config import cfg
 from oslo_log import log as logging
 import re
@@ -24,31 +25,69 @@ from magnum.common import neutron
 LOG = logging.getLogger(__name__)
 CONF = cfg.CONF
 
+# Longest interval in seconds between two polls of a deleted load balancer.
+MAX_POLL_INTERVAL = 16
 
-def wait_for_lb_deleted(octavia_client, deleted_lbs):
-    """Wait for the loadbalancers to be deleted.
 
-    Load balancer deletion API in Octavia is asynchronous so that the called
-    needs to wait if it wants to guarantee the load balancer to be deleted.
-    The timeout is necessary to avoid waiting infinitely.
+def _is_not_found(e):
+    return getattr(e, 'code', None) == 404
+
+
+def _run_concurrently(func, items):
+    """Call func on each item in green threads and wait for all of them.
+
+    The first exception raised by func is re-raised once every call is
+    done.
     """
-    timeout = CONF.cluster.pre_delete_lb_timeout
-    start_time = time.time()
+    errors = []
+
+    def run(item):
+        try:
+            func(item)
+        except Exception as e:
+            errors.append(e)
+
+    pool = eventlet.GreenPool(max(1, CONF.cluster.pre_delete_lb_concurrency))
+    for item in items:
+        pool.spawn_n(run, item)
+    pool.waitall()
+    if errors:
+        raise errors[0]
 
+
+def _wait_for_one_lb_deleted(octavia_client, lb_id, deadline):
+    interval = 1
     while True:
-        lbs = octavia_client.load_balancer_list().get("loadbalancers", [])
-        lbIDs = set(
-            [lb["id"]
-             for lb in lbs if lb["provisioning_status"] != "DELETED"]
-        )
-        if not (deleted_lbs & lbIDs):
-            break
+        try:
+            lb = octavia_client.load_balancer_show(lb_id)
+        except Exception as e:
+            if _is_not_found(e):
+                return
+            raise
+        if lb["provisioning_status"] == "DELETED":
+            return
 
-        if (time.time() - timeout) > start_time:
-            raise Exception("Timeout waiting for the load balancers "
-                            "%s to be deleted." % deleted_lbs)
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            raise Exception("Timeout waiting for the load balancer %s to "
+                            "be deleted." % lb_id)
+        time.sleep(min(interval, remaining))
+        interval = min(interval * 2, MAX_POLL_INTERVAL)
 
-        time.sleep(1)
+
+def wait_for_lb_deleted(octavia_client, deleted_lbs):
+    """Wait for the loadbalancers to be deleted.
+
+    Load balancer deletion API in Octavia is asynchronous so that the called
+    needs to wait if it wants to guarantee the load balancer to be deleted.
+    The timeout is necessary to avoid waiting infinitely. Each load
+    balancer is polled on its own, with an exponential backoff.
+    """
+    deadline = time.time() + CONF.cluster.pre_delete_lb_timeout
+    _run_concurrently(
+        lambda lb_id: _wait_for_one_lb_deleted(octavia_client, lb_id,
+                                               deadline),
+        deleted_lbs)
 
 
 def delete_loadbalancers(context, cluster):
@@ -60,32 +99,38 @@ def delete_loadbalancers(context, cluster):
     https://github.com/kubernetes/cloud-provider-openstack/pull/223
 
     The load balancers created for kubernetes services and ingresses are
-    deleted.
+    deleted, together with their VIP floating IPs, concurrently.
     """
     pattern = (r'Kubernetes .+ from cluster %s$' % cluster.uuid)
     valid_status = ["ACTIVE", "ERROR", "PENDING_DELETE", "DELETED"]
 
     try:
         o_client = clients.OpenStackClients(context).octavia()
-        lbs = o_client.load_balancer_list().get("loadbalancers", [])
+        lbs = o_client.load_balancer_list(
+            project_id=cluster.project_id).get("loadbalancers", [])
 
         candidates = set()
         invalids = set()
+        to_delete = []
         for lb in lbs:
             if re.match(pattern, lb["description"]):
                 if lb["provisioning_status"] not in valid_status:
                     invalids.add(lb["id"])
                     continue
                 if lb["provisioning_status"] in ["ACTIVE", "ERROR"]:
-                    # Delete VIP floating ip if needed.
-                    neutron.delete_floatingip(context, lb["vip_port_id"],
-                                              cluster)
-
-                    LOG.debug("Deleting load balancer %s for cluster %s",
-                              lb["id"], cluster.uuid)
-                    o_client.load_balancer_delete(lb["id"], cascade=True)
+                    to_delete.append(lb)
                 candidates.add(lb["id"])
 
+        def delete(lb):
+            # Delete VIP floating ip if needed.
+            neutron.delete_floatingip(context, lb["vip_port_id"], cluster)
+
+            LOG.debug("Deleting load balancer %s for cluster %s",
+                      lb["id"], cluster.uuid)
+            o_client.load_balancer_delete(lb["id"], cascade=True)
+
+        _run_concurrently(delete, to_delete)
+
         if invalids:
             raise Exception("Cannot delete load balancers %s in transitional "
                             "status." % invalids)
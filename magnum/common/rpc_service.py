@@ -19,10 +19,13 @@ from oslo_messaging.rpc import dispatcher
 from oslo_service import service
 from oslo_utils import importutils
 
+from magnum.common import capabilities
 from magnum.common import profiler
 from magnum.common import rpc
 import magnum.conf
+from magnum.drivers.common import driver
 from magnum.objects import base as objects_base
+from magnum.service import heat_notifications
 from magnum.service import periodic
 from magnum.servicegroup import magnum_service_periodic as servicegroup
 
@@ -56,6 +59,7 @@ class Service(service.Service):
                                                 serializer=serializer,
                                                 access_policy=access_policy)
         self.binary = binary
+        self._notification_listener = None
         profiler.setup(binary, CONF.host)
 
     def start(self):
@@ -63,15 +67,29 @@ class Service(service.Service):
 
     def create_periodic_tasks(self):
         if CONF.periodic_enable:
-            periodic.setup(CONF, self.tg)
+            periodic_tasks = periodic.setup(CONF, self.tg)
+            if CONF.cluster_heat.enable_notification_listener:
+                self._notification_listener = (
+                    heat_notifications.get_listener(periodic_tasks))
+                self._notification_listener.start()
         servicegroup.setup(CONF, self.binary, self.tg)
+        capabilities.setup(CONF, self.tg)
 
     def stop(self):
+        if self._notification_listener:
+            self._notification_listener.stop()
+            self._notification_listener.wait()
         if self._server:
             self._server.stop()
             self._server.wait()
         super(Service, self).stop()
 
+    def reset(self):
+        # Called on SIGHUP, reload the cluster drivers so that drivers
+        # installed or disabled since the start are taken into account.
+        driver.Driver.reload_drivers()
+        super(Service, self).reset()
+
     @classmethod
     def create(cls, topic, server, handlers, binary):
         service_obj = cls(topic, server, handlers, binary)
@@ -0,0 +1,73 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Run the CPU bound RSA operations in native threads.
+
+Generating RSA keys and signing certificates take long enough to stall
+every green thread of an eventlet based service, so they are handed to
+eventlet's pool of native threads. The pool is shared with the rest of the
+process and is left at its size (``EVENTLET_THREADPOOL_SIZE``, 20 by
+default): at most ``[x509]crypto_workers`` operations use its threads at
+once, the callers above that wait in their green thread until one
+completes.
+"""
+
+from eventlet import semaphore
+from eventlet import tpool
+
+import magnum.conf
+
+CONF = magnum.conf.CONF
+
+_SEMAPHORE = None
+# Operations waiting for their turn, and handed to the native threads.
+_waiting = 0
+_in_flight = 0
+
+
+def _get_semaphore():
+    global _SEMAPHORE
+    if _SEMAPHORE is None:
+        _SEMAPHORE = semaphore.Semaphore(CONF.x509.crypto_workers)
+    return _SEMAPHORE
+
+
+def execute(func, *args, **kwargs):
+    """Call func in a native thread and return its result.
+
+    func is called inline when ``[x509]crypto_workers`` is 0.
+    """
+    if not CONF.x509.crypto_workers:
+        return func(*args, **kwargs)
+
+    global _waiting
+    global _in_flight
+    sem = _get_semaphore()
+    _waiting += 1
+    try:
+        sem.acquire()
+    finally:
+        _waiting -= 1
+    _in_flight += 1
+    try:
+        return tpool.execute(func, *args, **kwargs)
+    finally:
+        _in_flight -= 1
+        sem.release()
+
+
+def get_stats():
+    """Return the number of operations in flight and waiting for a slot."""
+    return {'workers': CONF.x509.crypto_workers,
+            'in_flight': _in_flight,
+            'waiting': _waiting,
+            'queue_depth': _in_flight + _waiting}
@@ -24,6 +24,7 @@ from cryptography import x509
 from oslo_log import log as logging
 
 from magnum.common import exception
+from magnum.common.x509 import executor
 from magnum.common.x509 import validator
 import magnum.conf
 
@@ -110,7 +111,8 @@ def _generate_certificate(issuer_name, subject_name, extensions,
     if organization_name and not isinstance(organization_name, six.text_type):
         organization_name = six.text_type(organization_name.decode('utf-8'))
 
-    private_key = rsa.generate_private_key(
+    private_key = executor.execute(
+        rsa.generate_private_key,
         public_exponent=65537,
         key_size=CONF.x509.rsa_key_size,
         backend=default_backend()
@@ -161,6 +163,11 @@ def _generate_certificate(issuer_name, subject_name, extensions,
     return keypairs
 
 
+def load_private_key(key, key_password=None):
+    """Load a PEM encoded, optionally encrypted, private key."""
+    return _load_pem_private_key(key, key_password)
+
+
 def _load_pem_private_key(ca_key, ca_key_password=None):
     if not isinstance(ca_key, rsa.RSAPrivateKey):
         if isinstance(ca_key, six.text_type):
@@ -227,7 +234,8 @@ def sign(csr, issuer_name, ca_key, ca_key_password=None,
         builder = builder.add_extension(extention.value,
                                         critical=extention.critical)
 
-    certificate = builder.sign(
+    certificate = executor.execute(
+        builder.sign,
         private_key=ca_key, algorithm=hashes.SHA256(),
         backend=default_backend()
     ).public_bytes(serialization.Encoding.PEM).strip()
@@ -237,7 +245,8 @@ def sign(csr, issuer_name, ca_key, ca_key_password=None,
 
 def generate_csr_and_key(common_name):
     """Return a dict with a new csr, public key and private key."""
-    private_key = rsa.generate_private_key(
+    private_key = executor.execute(
+        rsa.generate_private_key,
         public_exponent=65537,
         key_size=2048,
         backend=default_backend())
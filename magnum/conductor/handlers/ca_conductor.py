@@ -17,6 +17,7 @@ from oslo_log import log as logging
 
 from magnum.common import profiler
 from magnum.conductor.handlers.common import cert_manager
+from magnum.conductor import k8s_api
 from magnum.drivers.common import driver
 from magnum import objects
 import six
@@ -59,4 +60,9 @@ class Handler(object):
     def rotate_ca_certificate(self, context, cluster):
         cluster_driver = driver.Driver.get_driver_for_cluster(context,
                                                               cluster)
+        # Drop the certificates being replaced, then the new ones in case
+        # they were read while the rotation was in progress.
+        cert_manager.evict_certificates(cluster)
         cluster_driver.rotate_ca_certificate(context, cluster)
+        cert_manager.evict_certificates(cluster)
+        k8s_api.evict_k8s_api(cluster.uuid)
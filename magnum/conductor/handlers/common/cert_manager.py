@@ -12,11 +12,17 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import threading
+
+from cryptography import fernet
 from oslo_log import log as logging
 from oslo_utils import encodeutils
+from oslo_utils import timeutils
 import six
 
+from magnum.common import cache
 from magnum.common import cert_manager
+from magnum.common.cert_manager import cert_manager as cert_manager_api
 from magnum.common import exception
 from magnum.common import short_id
 from magnum.common.x509 import operations as x509
@@ -24,6 +30,7 @@ from magnum.common.x509 import operations as x509
 import magnum.conf
 import os
 import shutil
+import ssl
 import tempfile
 
 CONDUCTOR_CLIENT_NAME = six.u('Magnum-Conductor')
@@ -123,24 +130,122 @@ def generate_certificates_to_cluster(cluster, context=None):
         raise exception.CertificatesToClusterFailed(cluster_uuid=cluster.uuid)
 
 
-def get_cluster_ca_certificate(cluster, context=None):
-    ca_cert = cert_manager.get_backend().CertManager.get_cert(
-        cluster.ca_cert_ref,
-        resource_ref=cluster.uuid,
-        context=context
-    )
+class _CachedCert(cert_manager_api.Cert):
+    """A copy of a certificate kept in memory.
 
-    return ca_cert
+    The private key and its passphrase are kept encrypted with a key of
+    the process. The private key loaded to sign or decrypt is an unencrypted
+    key object, it is only kept for ``[cluster]cert_loaded_key_ttl`` seconds.
+    """
 
+    def __init__(self, cert, fernet_key):
+        self._fernet = fernet_key
+        self._certificate = cert.get_certificate()
+        self._intermediates = cert.get_intermediates()
+        self._private_key = self._encrypt(cert.get_private_key())
+        self._passphrase = self._encrypt(cert.get_private_key_passphrase())
+        self._loaded_key = None
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def _encrypt(self, value):
+        if value is None:
+            return None
+        return (isinstance(value, six.text_type),
+                self._fernet.encrypt(encodeutils.safe_encode(value)))
+
+    def _decrypt(self, encrypted):
+        if encrypted is None:
+            return None
+        is_text, token = encrypted
+        value = self._fernet.decrypt(token)
+        return encodeutils.safe_decode(value) if is_text else value
+
+    def get_certificate(self):
+        return self._certificate
+
+    def get_intermediates(self):
+        return self._intermediates
+
+    def get_private_key(self):
+        return self._decrypt(self._private_key)
+
+    def get_private_key_passphrase(self):
+        return self._decrypt(self._passphrase)
+
+    def _loaded_key_expired(self):
+        return (self._loaded_key is None or timeutils.utcnow_ts() -
+                self._loaded_at >= CONF.cluster.cert_loaded_key_ttl)
+
+    def get_loaded_private_key(self):
+        ttl = CONF.cluster.cert_loaded_key_ttl
+        if not ttl:
+            self._loaded_key = None
+            return super(_CachedCert, self).get_loaded_private_key()
+        with self._lock:
+            if self._loaded_key_expired():
+                self._loaded_key = super(
+                    _CachedCert, self).get_loaded_private_key()
+                self._loaded_at = timeutils.utcnow_ts()
+            return self._loaded_key
+
+    def get_decrypted_private_key(self):
+        return x509.decrypt_key(self.get_loaded_private_key(), None)
+
+
+_CERT_CACHE = None
+_CERT_CACHE_FERNET = None
+
+
+def _get_cert_cache():
+    global _CERT_CACHE
+    global _CERT_CACHE_FERNET
+    if _CERT_CACHE is None:
+        _CERT_CACHE_FERNET = fernet.Fernet(fernet.Fernet.generate_key())
+        _CERT_CACHE = cache.TTLCache(CONF.cluster.cert_cache_size,
+                                     CONF.cluster.cert_cache_ttl)
+    return _CERT_CACHE
+
+
+def _get_cert(cert_ref, cluster, context=None):
+    """Retrieve a certificate of a cluster, from the cache if possible."""
+    if not CONF.cluster.cert_cache_size:
+        return cert_manager.get_backend().CertManager.get_cert(
+            cert_ref, resource_ref=cluster.uuid, context=context)
+
+    cert_cache = _get_cert_cache()
+    cert = cert_cache.get(cert_ref)
+    if cert is None:
+        cert = _CachedCert(
+            cert_manager.get_backend().CertManager.get_cert(
+                cert_ref, resource_ref=cluster.uuid, context=context),
+            _CERT_CACHE_FERNET)
+        cert_cache.set(cert_ref, cert)
+    return cert
+
+
+def evict_certificates(cluster):
+    """Drop the cached certificates of a cluster."""
+    if _CERT_CACHE is not None:
+        for cert_ref in (cluster.ca_cert_ref, cluster.magnum_cert_ref):
+            if cert_ref:
+                _CERT_CACHE.pop(cert_ref)
 
-def get_cluster_magnum_cert(cluster, context=None):
-    magnum_cert = cert_manager.get_backend().CertManager.get_cert(
-        cluster.magnum_cert_ref,
-        resource_ref=cluster.uuid,
-        context=context
-    )
 
-    return magnum_cert
+def get_cert_cache_stats():
+    """Return the size, hits and misses of the certificate cache."""
+    if _CERT_CACHE is None:
+        return {'size': 0, 'maxsize': CONF.cluster.cert_cache_size,
+                'hits': 0, 'misses': 0}
+    return _CERT_CACHE.get_stats()
+
+
+def get_cluster_ca_certificate(cluster, context=None):
+    return _get_cert(cluster.ca_cert_ref, cluster, context=context)
+
+
+def get_cluster_magnum_cert(cluster, context=None):
+    return _get_cert(cluster.magnum_cert_ref, cluster, context=context)
 
 
 def create_client_files(cluster, context=None):
@@ -202,17 +307,98 @@ def create_client_files(cluster, context=None):
     return ca_file, key_file, cert_file
 
 
+def _load_cert_chain(ssl_context, cert_pem, key_pem):
+    # SSLContext.load_cert_chain only accepts a path. Use an anonymous
+    # in-memory file where the platform provides one, otherwise a private
+    # temporary file that is removed as soon as the chain is loaded.
+    pem = cert_pem + b'\n' + key_pem
+    if hasattr(os, 'memfd_create'):
+        fd = os.memfd_create('magnum-client-cert', os.MFD_CLOEXEC)
+        try:
+            view = memoryview(pem)
+            while view:
+                view = view[os.write(fd, view):]
+            ssl_context.load_cert_chain('/proc/self/fd/%d' % fd)
+        finally:
+            os.close(fd)
+    else:
+        with tempfile.NamedTemporaryFile() as chain_file:
+            chain_file.write(pem)
+            chain_file.flush()
+            ssl_context.load_cert_chain(chain_file.name)
+
+
+def create_client_ssl_context(cluster, context=None):
+    """Build an SSL context for the cluster COE from its certificates.
+
+    The CA certificate, the client certificate and its decrypted key are
+    loaded straight from the certificate manager. Without
+    ``os.memfd_create`` the certificate chain goes through a temporary file
+    that only lives while it is loaded.
+
+    :param cluster: The cluster whose COE API is contacted
+    :returns: an ssl.SSLContext verifying the server with the cluster CA
+    """
+    ca_cert = get_cluster_ca_certificate(cluster, context)
+    magnum_cert = get_cluster_magnum_cert(cluster, context)
+
+    ssl_context = ssl.SSLContext(ssl.PROTOCOL_SSLv23)
+    ssl_context.options |= ssl.OP_NO_SSLv2 | ssl.OP_NO_SSLv3
+    # Hostname verification is left to the client libraries, which know
+    # whether the COE endpoint is expected to match its certificate.
+    ssl_context.check_hostname = False
+    ssl_context.verify_mode = ssl.CERT_REQUIRED
+    ssl_context.load_verify_locations(
+        cadata=encodeutils.safe_decode(ca_cert.get_certificate()))
+    _load_cert_chain(
+        ssl_context,
+        encodeutils.safe_encode(magnum_cert.get_certificate()),
+        encodeutils.safe_encode(magnum_cert.get_decrypted_private_key()))
+    return ssl_context
+
+
+_SSL_CONTEXT_CACHE = None
+
+
+def _get_ssl_context_cache():
+    global _SSL_CONTEXT_CACHE
+    if _SSL_CONTEXT_CACHE is None:
+        _SSL_CONTEXT_CACHE = cache.TTLCache(
+            CONF.cluster.ssl_context_cache_size,
+            CONF.cluster.ssl_context_cache_ttl)
+    return _SSL_CONTEXT_CACHE
+
+
+def get_client_ssl_context(cluster, context=None):
+    """Return the cached SSL context of a cluster, building it if needed.
+
+    Contexts are keyed by the certificate references, so rotated
+    certificates always produce a new context.
+    """
+    if not CONF.cluster.ssl_context_cache_size:
+        return create_client_ssl_context(cluster, context)
+
+    ssl_context_cache = _get_ssl_context_cache()
+    key = (cluster.uuid, cluster.ca_cert_ref, cluster.magnum_cert_ref)
+    ssl_context = ssl_context_cache.get(key)
+    if ssl_context is None:
+        ssl_context = create_client_ssl_context(cluster, context)
+        ssl_context_cache.set(key, ssl_context)
+    return ssl_context
+
+
+def evict_client_ssl_context(cluster_uuid):
+    """Drop the cached SSL contexts of a cluster."""
+    if _SSL_CONTEXT_CACHE is not None:
+        _SSL_CONTEXT_CACHE.pop_matching(lambda key: key[0] == cluster_uuid)
+
+
 def sign_node_certificate(cluster, csr, context=None):
-    ca_cert = cert_manager.get_backend().CertManager.get_cert(
-        cluster.ca_cert_ref,
-        resource_ref=cluster.uuid,
-        context=context
-    )
+    ca_cert = get_cluster_ca_certificate(cluster, context=context)
 
     node_cert = x509.sign(csr,
                           _get_issuer_name(cluster),
-                          ca_cert.get_private_key(),
-                          ca_cert.get_private_key_passphrase())
+                          ca_cert.get_loaded_private_key())
     return node_cert
 
 
@@ -221,6 +407,7 @@ def delete_certificates_from_cluster(cluster, context=None):
 
     :param cluster: The cluster which has certs
     """
+    evict_certificates(cluster)
     for cert_ref in ['ca_cert_ref', 'magnum_cert_ref']:
         try:
             cert_ref = getattr(cluster, cert_ref, None)
@@ -233,6 +420,7 @@ def delete_certificates_from_cluster(cluster, context=None):
 
 
 def delete_client_files(cluster, context=None):
+        evict_client_ssl_context(cluster.uuid)
         cached_cert_dir = os.path.join(CONF.cluster.temp_cache_dir,
                                        cluster.uuid)
         try:
@@ -12,29 +12,42 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import tempfile
-
 from kubernetes import client as k8s_config
 from kubernetes.client import api_client
 from kubernetes.client.apis import core_v1_api
 from kubernetes.client import configuration as k8s_configuration
 from kubernetes.client import rest
 from oslo_log import log as logging
+from oslo_serialization import jsonutils
 
-from magnum.conductor.handlers.common.cert_manager import create_client_files
+from magnum.common import cache
+from magnum.conductor.handlers.common import cert_manager
+import magnum.conf
 
 LOG = logging.getLogger(__name__)
+CONF = magnum.conf.CONF
+
+_CLIENT_CACHE = None
 
 
 class ApiClient(api_client.ApiClient):
 
     def __init__(self, configuration=None, header_name=None,
-                 header_value=None, cookie=None):
+                 header_value=None, cookie=None, ssl_context=None):
         if configuration is None:
             configuration = k8s_configuration.Configuration()
         self.configuration = configuration
 
         self.rest_client = rest.RESTClientObject(configuration)
+        if ssl_context is not None:
+            # Serve TLS from the in-memory context instead of the
+            # certificate file paths of the configuration. The pool manager
+            # built by the REST client is kept, so are the proxy and pool
+            # settings of the configuration. The context already trusts the
+            # cluster CA only, do not let urllib3 load the default bundle.
+            pool_kw = self.rest_client.pool_manager.connection_pool_kw
+            pool_kw['ssl_context'] = ssl_context
+            pool_kw['ca_certs'] = None
         self.default_headers = {}
         if header_name is not None:
             self.default_headers[header_name] = header_value
@@ -89,57 +102,87 @@ class ApiClient(api_client.ApiClient):
 
 class K8sAPI(core_v1_api.CoreV1Api):
 
-    def _create_temp_file_with_content(self, content):
-        """Creates temp file and write content to the file.
-
-        :param content: file content
-        :returns: temp file
-        """
-        try:
-            tmp = tempfile.NamedTemporaryFile(delete=True)
-            tmp.write(content)
-            tmp.flush()
-        except Exception as err:
-            LOG.error("Error while creating temp file: %s", err)
-            raise
-        return tmp
-
     def __init__(self, context, cluster):
-        self.ca_file = None
-        self.cert_file = None
-        self.key_file = None
-
+        ssl_context = None
         if cluster.magnum_cert_ref:
-            (self.ca_file, self.key_file,
-             self.cert_file) = create_client_files(cluster, context)
+            ssl_context = cert_manager.get_client_ssl_context(cluster,
+                                                              context)
 
         config = k8s_config.Configuration()
         config.host = cluster.api_address
-        config.ssl_ca_cert = self.ca_file.name
-        config.cert_file = self.cert_file.name
-        config.key_file = self.key_file.name
 
         # build a connection with Kubernetes master
-        client = ApiClient(configuration=config)
+        client = ApiClient(configuration=config, ssl_context=ssl_context)
 
         super(K8sAPI, self).__init__(client)
 
-    def __del__(self):
-        if self.ca_file:
-            self.ca_file.close()
-        if self.cert_file:
-            self.cert_file.close()
-        if self.key_file:
-            self.key_file.close()
+
+def list_chunked(list_func, *args, **kwargs):
+    """Iterate over the items of a Kubernetes list call, page by page.
+
+    Pages of ``[kubernetes]list_chunk_size`` items are requested with the
+    ``limit`` and ``continue`` parameters of the Kubernetes API. Their
+    bodies are decoded as plain JSON instead of being deserialized into
+    model objects, and only one page is held in memory at a time.
+
+    :param list_func: a list method of the API client, e.g. list_node
+    :returns: iterator over the items as dicts
+    """
+    kwargs['limit'] = CONF.kubernetes.list_chunk_size
+    kwargs['_preload_content'] = False
+    while True:
+        response = list_func(*args, **kwargs)
+        page = jsonutils.loads(response.data)
+        for item in page.get('items') or []:
+            yield item
+        _continue = (page.get('metadata') or {}).get('continue')
+        if not _continue:
+            return
+        kwargs['_continue'] = _continue
+
+
+def _get_client_cache():
+    global _CLIENT_CACHE
+    if _CLIENT_CACHE is None:
+        _CLIENT_CACHE = cache.TTLCache(CONF.kubernetes.client_cache_size,
+                                       CONF.kubernetes.client_cache_ttl)
+    return _CLIENT_CACHE
+
+
+def _client_cache_key(cluster):
+    # The certificate references are part of the key so that a client built
+    # with rotated certificates is never served from the cache.
+    return (cluster.uuid, cluster.api_address, cluster.ca_cert_ref,
+            cluster.magnum_cert_ref)
 
 
 def create_k8s_api(context, cluster):
     """Create a kubernetes API client
 
     Creates connection with Kubernetes master and creates ApivApi instance
-    to call Kubernetes APIs.
+    to call Kubernetes APIs. Clients are cached per cluster, so their
+    keep-alive connections and TLS sessions are reused by later calls.
 
     :param context: The security context
     :param cluster:  Cluster object
     """
-    return K8sAPI(context, cluster)
+    if not CONF.kubernetes.client_cache_size:
+        return K8sAPI(context, cluster)
+
+    client_cache = _get_client_cache()
+    key = _client_cache_key(cluster)
+    k8s_api = client_cache.get(key)
+    if k8s_api is None:
+        k8s_api = K8sAPI(context, cluster)
+        client_cache.set(key, k8s_api)
+    return k8s_api
+
+
+def evict_k8s_api(cluster_uuid):
+    """Drop the cached API clients of a cluster.
+
+    Must be called when the cluster is deleted or its certificates change.
+    """
+    if _CLIENT_CACHE is not None:
+        _CLIENT_CACHE.pop_matching(lambda key: key[0] == cluster_uuid)
+    cert_manager.evict_client_ssl_context(cluster_uuid)
@@ -0,0 +1,149 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Concurrent health checks of Kubernetes clusters."""
+
+import collections
+import random
+import threading
+
+import eventlet
+from eventlet import semaphore
+from oslo_log import log as logging
+from oslo_utils import strutils
+from six.moves.urllib import parse
+
+from magnum.conductor import k8s_api as k8s
+import magnum.conf
+from magnum.objects import fields as m_fields
+
+LOG = logging.getLogger(__name__)
+CONF = magnum.conf.CONF
+
+_POLLER = None
+_POLLER_LOCK = threading.Lock()
+
+
+class K8sHealthPoller(object):
+    """Checks the API and node readiness of many clusters concurrently.
+
+    Every check runs in the calling green thread over the cluster's cached
+    API client, so the sockets it waits on do not block other checks. The
+    checks run in the jobs of the health sync task, so their total number in
+    flight is bounded by ``[periodic]sync_pool_size``. The poller bounds the
+    checks in flight per API host, abandons each check after a timeout, and
+    adds a random delay to spread out the checks of clusters that became due
+    at the same time.
+
+    :param max_per_host: maximum number of checks in flight per API host
+    :param timeout: time in seconds after which a check is abandoned
+    :param jitter: maximum random delay in seconds before a check
+    """
+
+    def __init__(self, max_per_host, timeout, jitter=0):
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.jitter = jitter
+        self._host_semaphores = collections.defaultdict(
+            lambda: semaphore.Semaphore(self.max_per_host))
+        self._in_flight = collections.Counter()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _get_host(api_address):
+        return parse.urlsplit(api_address).netloc or api_address
+
+    def _acquire_host(self, host):
+        with self._lock:
+            self._in_flight[host] += 1
+            return self._host_semaphores[host]
+
+    def _release_host(self, host):
+        with self._lock:
+            self._in_flight[host] -= 1
+            if not self._in_flight[host]:
+                # Forget idle hosts, clusters come and go.
+                del self._in_flight[host]
+                del self._host_semaphores[host]
+
+    def check(self, k8s_api, api_address):
+        """Check the health of one cluster.
+
+        :param k8s_api: the API client of the cluster
+        :param api_address: the API address of the cluster
+        :returns: tuple of the health status and the health status reason
+        """
+        if self.jitter:
+            eventlet.sleep(random.uniform(0, self.jitter))
+
+        host = self._get_host(api_address)
+        host_semaphore = self._acquire_host(host)
+        try:
+            with host_semaphore:
+                return self._check(k8s_api)
+        finally:
+            self._release_host(host)
+
+    def _check(self, k8s_api):
+        health_status = m_fields.ClusterHealthStatus.UNHEALTHY
+        health_status_reason = {}
+        api_status = None
+
+        timer = eventlet.Timeout(self.timeout)
+        try:
+            api_status, _, _ = k8s_api.api_client.call_api(
+                '/healthz', 'GET', response_type=object,
+                _request_timeout=self.timeout)
+
+            for node in k8s.list_chunked(k8s_api.list_node,
+                                         _request_timeout=self.timeout):
+                node_key = node['metadata']['name'] + ".Ready"
+                ready = False
+                for condition in node['status'].get('conditions') or []:
+                    if condition['type'] == 'Ready':
+                        ready = strutils.bool_from_string(
+                            condition['status'])
+                        break
+
+                health_status_reason[node_key] = ready
+
+            if (api_status == 'ok' and
+                    all(n for n in health_status_reason.values())):
+                health_status = m_fields.ClusterHealthStatus.HEALTHY
+
+            health_status_reason['api'] = api_status
+        except eventlet.Timeout as t:
+            if t is not timer:
+                raise
+            health_status_reason['api'] = (
+                'Health check timed out after %s seconds.' % self.timeout)
+        except Exception as exp_api:
+            if not api_status:
+                api_status = (getattr(exp_api, 'body', None) or
+                              getattr(exp_api, 'message', None))
+                health_status_reason['api'] = api_status
+        finally:
+            timer.cancel()
+
+        return health_status, health_status_reason
+
+
+def get_health_poller():
+    """Return the health poller shared by the process."""
+    global _POLLER
+    with _POLLER_LOCK:
+        if _POLLER is None:
+            _POLLER = K8sHealthPoller(
+                CONF.kubernetes.health_poll_max_connections_per_host,
+                CONF.kubernetes.health_poll_timeout,
+                CONF.kubernetes.health_poll_jitter)
+        return _POLLER
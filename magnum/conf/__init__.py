@@ -36,6 +36,7 @@ from magnum.conf import neutron
 from magnum.conf import nova
 from magnum.conf import octavia
 from magnum.conf import paths
+from magnum.conf import periodic
 from magnum.conf import profiler
 from magnum.conf import quota
 from magnum.conf import rpc
@@ -67,6 +68,7 @@ neutron.register_opts(CONF)
 nova.register_opts(CONF)
 octavia.register_opts(CONF)
 paths.register_opts(CONF)
+periodic.register_opts(CONF)
 quota.register_opts(CONF)
 rpc.register_opts(CONF)
 services.register_opts(CONF)
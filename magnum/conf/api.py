@@ -42,7 +42,26 @@ api_service_opts = [
                 help='Enable SSL Magnum API service'),
     cfg.IntOpt('workers',
                help='The maximum number of magnum-api processes to '
-                    'fork and run. Default to number of CPUs on the host.')
+                    'fork and run. Default to number of CPUs on the host.'),
+    cfg.IntOpt('validation_cache_size',
+               default=1000,
+               min=0,
+               help='The maximum number of flavor, image, network and '
+                    'keypair lookups kept by the validation of cluster '
+                    'template and cluster requests. The lookups are kept '
+                    'per project, and per user for keypairs. 0 disables '
+                    'the cache.'),
+    cfg.IntOpt('validation_cache_ttl',
+               default=60,
+               min=1,
+               help='The time in seconds a found resource is kept by the '
+                    'validation cache.'),
+    cfg.IntOpt('validation_cache_negative_ttl',
+               default=10,
+               min=0,
+               help='The time in seconds a resource that was not found is '
+                    'kept by the validation cache. 0 disables the caching '
+                    'of missing resources.'),
 ]
 
 
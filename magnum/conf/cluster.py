@@ -42,10 +42,49 @@ cluster_def_opts = [
                default="/var/lib/magnum/certificate-cache",
                help='Explicitly specify the temporary directory to hold '
                     'cached TLS certs.'),
+    cfg.IntOpt('ssl_context_cache_size',
+               default=1000,
+               min=0,
+               help=_('Maximum number of per-cluster SSL contexts, built in '
+                      'memory from the cluster certificates, that are kept '
+                      'for COE clients. 0 disables the cache.')),
+    cfg.IntOpt('ssl_context_cache_ttl',
+               default=3600,
+               min=0,
+               help=_('Time in seconds after which a cached cluster SSL '
+                      'context is rebuilt from the certificate manager. '
+                      '0 means cached contexts never expire.')),
+    cfg.IntOpt('cert_cache_size',
+               default=1000,
+               min=0,
+               help=_('Maximum number of cluster certificates retrieved from '
+                      'the certificate manager that are kept in memory, '
+                      'with their private key encrypted. 0 disables the '
+                      'cache.')),
+    cfg.IntOpt('cert_cache_ttl',
+               default=3600,
+               min=0,
+               help=_('Time in seconds after which a cached cluster '
+                      'certificate is retrieved again from the certificate '
+                      'manager. 0 means cached certificates never '
+                      'expire.')),
+    cfg.IntOpt('cert_loaded_key_ttl',
+               default=300,
+               min=0,
+               help=_('Time in seconds a private key loaded from a cached '
+                      'certificate to sign node certificates is kept. '
+                      'Loaded keys are not encrypted in memory. 0 loads the '
+                      'key again on every use.')),
     cfg.IntOpt('pre_delete_lb_timeout',
                default=60,
                help=_('The timeout in seconds to wait for the load balancers '
                       'to be deleted.')),
+    cfg.IntOpt('pre_delete_lb_concurrency',
+               default=10,
+               min=1,
+               help=_('The maximum number of load balancers of a cluster '
+                      'deleted, or waited for, at the same time before the '
+                      'cluster is deleted.')),
 ]
 
 
@@ -37,7 +37,36 @@ cluster_heat_opts = [
                      'This interval is in minutes. The default is 60 minutes.'
                      ),
                deprecated_group='bay_heat',
-               deprecated_name='bay_create_timeout')
+               deprecated_name='bay_create_timeout'),
+    cfg.BoolOpt('enable_notification_listener',
+                default=False,
+                help=('Listen for the orchestration.stack.*.end and '
+                      'orchestration.stack.*.error notifications emitted by '
+                      'Heat and sync the status of the affected cluster '
+                      'right away, instead of waiting for the next run of '
+                      'the periodic status sync, which then only acts as a '
+                      'reconciliation fallback. Requires Heat to emit '
+                      'notifications on the same transport.')),
+    cfg.ListOpt('notification_topics',
+                default=['notifications'],
+                help='The topics Heat sends its notifications to.'),
+    cfg.StrOpt('notification_exchange',
+               default='heat',
+               help='The exchange Heat sends its notifications to.'),
+    cfg.StrOpt('notification_pool',
+               default='magnum-conductor',
+               help=('The listener pool shared by all the magnum-conductor '
+                     'services. Each notification is delivered to one '
+                     'conductor of the pool, without stealing it from '
+                     'other consumers of the same topics, and syncs the '
+                     'cluster even when [periodic]shard_clusters assigns '
+                     'it to another conductor.')),
+    cfg.BoolOpt('cache_templates',
+                default=True,
+                help=('Keep the parsed Heat templates and environments of '
+                      'the drivers in memory and reuse them for every stack '
+                      'create. A cached template is reloaded when any of '
+                      'the files it was built from is modified.')),
 ]
 
 
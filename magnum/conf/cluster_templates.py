@@ -54,6 +54,21 @@ cluster_template_opts = [
                default='docker',
                help=_("Default network driver for mesos cluster-templates."),
                deprecated_group='baymodel'),
+    cfg.IntOpt('cache_size',
+               default=1000,
+               min=0,
+               help=_("Maximum number of cluster templates cached in memory "
+                      "by each magnum service. Templates are evicted when "
+                      "they are updated or deleted by the service. 0 "
+                      "disables the cache.")),
+    cfg.IntOpt('cache_ttl',
+               default=300,
+               min=0,
+               help=_("Time in seconds after which a cached cluster template "
+                      "is loaded from the database again. This bounds how "
+                      "long a service can see a template renamed or "
+                      "published by another service. 0 means cached "
+                      "templates never expire.")),
 ]
 
 
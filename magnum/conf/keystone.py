@@ -27,6 +27,40 @@ legacy_session_opts = {
 keystone_auth_group = cfg.OptGroup(name=CFG_GROUP,
                                    title='Options for Keystone in Magnum')
 
+client_cache_opts = [
+    cfg.IntOpt('connection_pool_maxsize',
+               default=10,
+               min=1,
+               help='The maximum number of connections per host kept open '
+                    'by the HTTP connection pool shared by the clients of '
+                    'the OpenStack services.'),
+    cfg.IntOpt('client_cache_size',
+               default=1000,
+               min=0,
+               help='The maximum number of OpenStack service clients, and '
+                    'of service catalog endpoints, shared by the requests '
+                    'and periodic tasks authenticating with the same '
+                    'credentials. 0 disables the sharing.'),
+    cfg.IntOpt('client_cache_ttl',
+               default=3600,
+               min=1,
+               help='The time in seconds a shared OpenStack service client '
+                    'is kept. Clients bound to a token are dropped before '
+                    'the token expires.'),
+    cfg.IntOpt('catalog_cache_ttl',
+               default=600,
+               min=1,
+               help='The time in seconds an endpoint of the service catalog '
+                    'is kept.'),
+    cfg.IntOpt('services_refresh_interval',
+               default=300,
+               min=1,
+               help='The interval in seconds at which the services '
+                    'registered in keystone, such as Octavia, Barbican and '
+                    'Cinder, are listed again to know which ones are '
+                    'enabled.'),
+]
+
 
 def register_opts(conf):
     # FIXME(pauloewerton): remove import of authtoken group and legacy options
@@ -36,11 +70,13 @@ def register_opts(conf):
     ka_loading.register_session_conf_options(
         conf, CFG_GROUP, deprecated_opts=legacy_session_opts)
     conf.set_default('auth_type', default='password', group=CFG_GROUP)
+    conf.register_opts(client_cache_opts, group=CFG_GROUP)
 
 
 def list_opts():
     keystone_auth_opts = (ka_loading.get_auth_common_conf_options() +
-                          ka_loading.get_auth_plugin_conf_options('password'))
+                          ka_loading.get_auth_plugin_conf_options('password') +
+                          client_cache_opts)
     return {
         keystone_auth_group: keystone_auth_opts
     }
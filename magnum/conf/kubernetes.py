@@ -22,6 +22,44 @@ kubernetes_opts = [
                     'Keystone auth policy for Kubernetes cluster when '
                     'the Keystone auth is enabled. Vendors can put their '
                     'specific default policy here'),
+    cfg.IntOpt('client_cache_size',
+               default=1000,
+               min=0,
+               help='Maximum number of Kubernetes API clients, with their '
+                    'connection pools, kept by a magnum-conductor process. '
+                    'The least recently used client is dropped when the '
+                    'cache is full. 0 disables the cache.'),
+    cfg.IntOpt('client_cache_ttl',
+               default=3600,
+               min=0,
+               help='Time in seconds a cached Kubernetes API client is '
+                    'reused before it is rebuilt with freshly fetched '
+                    'certificates. 0 means clients never expire.'),
+    cfg.IntOpt('health_poll_max_connections_per_host',
+               default=4,
+               min=1,
+               help='Maximum number of concurrent health checks against a '
+                    'single Kubernetes API host, for API endpoints that '
+                    'are shared by several clusters.'),
+    cfg.IntOpt('health_poll_timeout',
+               default=10,
+               min=1,
+               help='Time in seconds after which a Kubernetes health '
+                    'check, API call and node listing included, is '
+                    'abandoned and the cluster reported unhealthy.'),
+    cfg.FloatOpt('health_poll_jitter',
+                 default=1.0,
+                 min=0,
+                 help='Maximum random delay in seconds added before a '
+                      'Kubernetes health check, so that the checks of '
+                      'clusters due at the same time are spread out.'),
+    cfg.IntOpt('list_chunk_size',
+               default=500,
+               min=1,
+               help='Number of objects requested per page when '
+                    'magnum-conductor lists the nodes or pods of a '
+                    'Kubernetes cluster, so that large clusters are read '
+                    'in bounded chunks.'),
 ]
 
 
@@ -0,0 +1,77 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from oslo_config import cfg
+
+from magnum.i18n import _
+
+periodic_group = cfg.OptGroup(name='periodic',
+                              title='Options for the magnum periodic tasks')
+
+periodic_opts = [
+    cfg.IntOpt('sync_pool_size',
+               default=64,
+               min=0,
+               help=_('Maximum number of cluster sync jobs that a single '
+                      'conductor runs at the same time for each periodic '
+                      'task. Clusters that do not fit in the pool are picked '
+                      'up on a following run. 0 means unbounded.')),
+    cfg.IntOpt('sync_job_timeout',
+               default=300,
+               min=0,
+               help=_('Deadline in seconds for a single cluster sync job. '
+                      'A job that runs longer is cancelled and the cluster '
+                      'becomes eligible again on the next run. 0 disables '
+                      'the deadline.')),
+    cfg.StrOpt('sync_overlap_policy',
+               default='skip',
+               choices=['skip', 'coalesce'],
+               help=_('What to do when a periodic run finds a cluster whose '
+                      'previous sync job is still in flight. "skip" ignores '
+                      'the cluster for this run, "coalesce" runs exactly one '
+                      'more sync as soon as the in-flight job finishes.')),
+    cfg.BoolOpt('shard_clusters',
+                default=False,
+                help=_('Split the clusters synced by the periodic tasks '
+                       'between all the magnum-conductor services that are '
+                       'up, using a consistent hash ring on the cluster '
+                       'UUID. Only enable this when every conductor runs '
+                       'the periodic tasks.')),
+    cfg.IntOpt('hash_ring_replicas',
+               default=64,
+               min=1,
+               help=_('Number of virtual nodes each conductor gets on the '
+                      'cluster hash ring. Higher values spread clusters '
+                      'more evenly at the cost of a bigger ring.')),
+    cfg.IntOpt('poll_max_interval',
+               default=60,
+               min=10,
+               help=_('Upper bound in seconds for the adaptive per-cluster '
+                      'poll interval. A cluster is polled every 10 seconds '
+                      'while it changes or is in an *_IN_PROGRESS status, '
+                      'unless [cluster_heat]enable_notification_listener is '
+                      'set, otherwise the interval doubles on each '
+                      'poll that finds its status, health status and health '
+                      'status reason unchanged, up to this value. Set it to '
+                      '10 to poll every cluster on every run.')),
+]
+
+
+def register_opts(conf):
+    conf.register_group(periodic_group)
+    conf.register_opts(periodic_opts, group=periodic_group)
+
+
+def list_opts():
+    return {
+        periodic_group: periodic_opts
+    }
@@ -56,7 +56,19 @@ trust_opts = [
                help=_('Auth interface used by instances/trustee')),
     cfg.StrOpt('trustee_keystone_region_name',
                help=_('Region in Identity service catalog to use for '
-                      'communication with the OpenStack service.'))
+                      'communication with the OpenStack service.')),
+    cfg.IntOpt('trustee_cache_size',
+               default=10000,
+               min=0,
+               help=_('Maximum number of trustee user to project mappings '
+                      'cached by the database tenant filter. 0 disables the '
+                      'cache.')),
+    cfg.IntOpt('trustee_cache_ttl',
+               default=3600,
+               min=0,
+               help=_('Time in seconds after which the cached trustee user '
+                      'to project mappings are looked up in Keystone again. '
+                      '0 means they never expire.')),
 ]
 
 
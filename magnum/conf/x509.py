@@ -48,7 +48,19 @@ x509_opts = [
                default=365 * 5,
                help=_('Number of days for which a certificate is valid.')),
     cfg.IntOpt('rsa_key_size',
-               default=2048, help=_('Size of generated private key. '))]
+               default=2048, help=_('Size of generated private key. ')),
+    cfg.IntOpt('crypto_workers',
+               default=4,
+               min=0,
+               help=_('Maximum number of RSA key generations and '
+                      'certificate signings running at once in eventlet\'s '
+                      'pool of native threads, so that they do not block '
+                      'the other green threads of the service. Further '
+                      'operations wait for one of them to complete. Keep it '
+                      'below the size of the pool, EVENTLET_THREADPOOL_SIZE '
+                      '(20 by default), which is shared with the rest of '
+                      'the service. 0 runs them in the calling green '
+                      'thread.'))]
 
 
 def register_opts(conf):
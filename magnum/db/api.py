@@ -43,6 +43,15 @@ class Connection(object):
     def __init__(self):
         """Constructor."""
 
+    @abc.abstractmethod
+    def get_tenant_filters(self, context):
+        """Return the column values that scope queries to a tenant.
+
+        :param context: The security context
+        :returns: A dict of column names and values, empty when the context
+                  may access the resources of all the tenants.
+        """
+
     @abc.abstractmethod
     def get_cluster_list(self, context, filters=None, limit=None,
                          marker=None, sort_key=None, sort_dir=None):
@@ -100,6 +109,16 @@ class Connection(object):
         :returns: A cluster.
         """
 
+    @abc.abstractmethod
+    def get_cluster_by_stack_id(self, context, stack_id):
+        """Return the cluster owning a Heat stack.
+
+        :param context: The security context
+        :param stack_id: The id of the cluster stack or of the stack of one
+                         of its nodegroups.
+        :returns: A cluster.
+        """
+
     @abc.abstractmethod
     def get_cluster_by_name(self, context, cluster_name):
         """Return a cluster.
@@ -118,6 +137,22 @@ class Connection(object):
         :returns: clusters, nodes count.
         """
 
+    @abc.abstractmethod
+    def get_clusters_with_stale_node_counts(self):
+        """Return the clusters whose node counts disagree with nodegroups.
+
+        :returns: A list of (uuid, node_count, master_count,
+                  actual node_count, actual master_count) rows.
+        """
+
+    @abc.abstractmethod
+    def sync_cluster_node_counts(self, cluster_ids=None):
+        """Recompute the node counts of clusters from their nodegroups.
+
+        :param cluster_ids: The uuids of the clusters, all clusters if None.
+        :returns: The number of updated clusters.
+        """
+
     @abc.abstractmethod
     def get_cluster_count_all(self, context, filters=None):
         """Get count of matching clusters.
@@ -202,6 +237,26 @@ class Connection(object):
         :returns: A ClusterTemplate.
         """
 
+    @abc.abstractmethod
+    def get_cluster_templates_by_uuids(self, context, cluster_template_uuids):
+        """Return the ClusterTemplates matching a list of uuids.
+
+        :param context: The security context
+        :param cluster_template_uuids: The uuids of the ClusterTemplates.
+        :returns: A list of ClusterTemplates, uuids that are not found are
+                  skipped.
+        """
+
+    @abc.abstractmethod
+    def get_cluster_template_versions(self, context, cluster_template_uuids):
+        """Return the timestamps of the ClusterTemplates matching uuids.
+
+        :param context: The security context
+        :param cluster_template_uuids: The uuids of the ClusterTemplates.
+        :returns: A dict mapping the uuid of every ClusterTemplate visible to
+                  the context to its (created_at, updated_at) tuple.
+        """
+
     @abc.abstractmethod
     def get_cluster_template_by_name(self, context, cluster_template_name):
         """Return a ClusterTemplate.
@@ -647,6 +702,15 @@ class Connection(object):
         :returns: A list of nodegroup records.
         """
 
+    @abc.abstractmethod
+    def list_nodegroups_for_clusters(self, context, cluster_ids):
+        """Get the nodegroups of several clusters at once.
+
+        :param context: The security context
+        :param cluster_ids: The uuids of the clusters.
+        :returns: A list of nodegroup records, ordered by id.
+        """
+
     @abc.abstractmethod
     def get_cluster_nodegroup_count(self, context, cluster_id):
         """Get count of nodegroups in a given cluster.
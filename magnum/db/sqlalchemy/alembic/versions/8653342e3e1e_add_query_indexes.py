@@ -0,0 +1,45 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""add indexes for the cluster and nodegroup queries
+
+Revision ID: 8653342e3e1e
+Revises: c04e925e65c2
+Create Date: 2019-09-02 10:12:41.325710
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '8653342e3e1e'
+down_revision = 'c04e925e65c2'
+
+from alembic import op
+
+
+def upgrade():
+    # Tenant filtered lists, periodic status syncs, Heat stack lookups and
+    # the cluster template "in use" check.
+    op.create_index('ix_cluster0project_id', 'cluster', ['project_id'])
+    op.create_index('ix_cluster0status', 'cluster', ['status'])
+    op.create_index('ix_cluster0stack_id', 'cluster', ['stack_id'])
+    op.create_index('ix_cluster0cluster_template_id', 'cluster',
+                    ['cluster_template_id'])
+    # Default nodegroup lookups and nodegroup stack lookups. Lookups by
+    # cluster_id alone are served by uniq_nodegroup0cluster_id0name.
+    op.create_index('ix_nodegroup0cluster_id0role0is_default', 'nodegroup',
+                    ['cluster_id', 'role', 'is_default'])
+    op.create_index('ix_nodegroup0stack_id', 'nodegroup', ['stack_id'])
+    # Tenant filtered and public cluster template lookups.
+    op.create_index('ix_cluster_template0project_id', 'cluster_template',
+                    ['project_id'])
+    op.create_index('ix_cluster_template0public', 'cluster_template',
+                    ['public'])
@@ -0,0 +1,55 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""add node_count and master_count to cluster
+
+Revision ID: e7f3b1a29c64
+Revises: 8653342e3e1e
+Create Date: 2019-09-09 14:03:27.518245
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = 'e7f3b1a29c64'
+down_revision = '8653342e3e1e'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def _node_count(cluster, nodegroup, is_master):
+    role = nodegroup.c.role
+    role_filter = role == 'master' if is_master else role != 'master'
+    return sa.select(
+        [sa.func.coalesce(sa.func.sum(nodegroup.c.node_count), 0)]
+    ).where(sa.and_(nodegroup.c.cluster_id == cluster.c.uuid,
+                    role_filter)).as_scalar()
+
+
+def upgrade():
+    op.add_column('cluster',
+                  sa.Column('node_count', sa.Integer(), nullable=True))
+    op.add_column('cluster',
+                  sa.Column('master_count', sa.Integer(), nullable=True))
+
+    # Backfill the summary columns from the nodegroups of each cluster.
+    cluster = sa.sql.table('cluster',
+                           sa.sql.column('uuid', sa.String),
+                           sa.sql.column('node_count', sa.Integer),
+                           sa.sql.column('master_count', sa.Integer))
+    nodegroup = sa.sql.table('nodegroup',
+                             sa.sql.column('cluster_id', sa.String),
+                             sa.sql.column('role', sa.String),
+                             sa.sql.column('node_count', sa.Integer))
+    op.execute(cluster.update().values(
+        node_count=_node_count(cluster, nodegroup, is_master=False),
+        master_count=_node_count(cluster, nodegroup, is_master=True)))
@@ -28,6 +28,7 @@ from sqlalchemy.orm.exc import MultipleResultsFound
 from sqlalchemy.orm.exc import NoResultFound
 from sqlalchemy.sql import func
 
+from magnum.common import cache
 from magnum.common import clients
 from magnum.common import context as request_context
 from magnum.common import exception
@@ -43,6 +44,16 @@ CONF = magnum.conf.CONF
 LOG = log.getLogger(__name__)
 
 _FACADE = None
+_TRUSTEE_CACHE = None
+
+# Maximum number of values bound in a single IN clause.
+IN_CLAUSE_CHUNK_SIZE = 500
+
+
+def _chunks(values):
+    values = list(values)
+    for i in range(0, len(values), IN_CLAUSE_CHUNK_SIZE):
+        yield values[i:i + IN_CLAUSE_CHUNK_SIZE]
 
 
 def _create_facade_lazily():
@@ -100,6 +111,86 @@ def add_identity_filter(query, value):
         raise exception.InvalidIdentity(identity=value)
 
 
+def _get_trustee_cache():
+    global _TRUSTEE_CACHE
+    if _TRUSTEE_CACHE is None:
+        _TRUSTEE_CACHE = cache.TTLCache(CONF.trust.trustee_cache_size,
+                                        CONF.trust.trustee_cache_ttl)
+    return _TRUSTEE_CACHE
+
+
+def _cached_trustee_lookup(key, lookup):
+    """Return the cached result of a Keystone lookup, calling it on a miss.
+
+    Trustee users are created per cluster and their names, which embed the
+    project of the cluster, never change, so the mappings are safe to cache.
+    """
+    if not CONF.trust.trustee_cache_size:
+        return lookup()
+    trustee_cache = _get_trustee_cache()
+    value = trustee_cache.get(key)
+    if value is None:
+        value = lookup()
+        trustee_cache.set(key, value)
+    return value
+
+
+def _admin_keystone():
+    admin_context = request_context.make_admin_context(all_tenants=True)
+    return clients.OpenStackClients(admin_context).keystone()
+
+
+def _get_trustee_domain_id():
+    # Cached by the shared trustee domain admin of the keystone client.
+    return _admin_keystone().trustee_domain_id
+
+
+def _get_trustee_project_id(user_id):
+    def lookup():
+        user_name = _admin_keystone().client.users.get(user_id).name
+        return user_name.split('_', 2)[1]
+
+    return _cached_trustee_lookup(('user', user_id), lookup)
+
+
+def _node_count_subquery(is_master):
+    """Sum the node counts of the master or worker nodegroups of a cluster.
+
+    The subquery is correlated to the cluster table of the enclosing query.
+    """
+    role = models.NodeGroup.role
+    role_filter = role == 'master' if is_master else role != 'master'
+    return sa.select(
+        [func.coalesce(func.sum(models.NodeGroup.node_count), 0)]
+    ).where(sa.and_(models.NodeGroup.cluster_id == models.Cluster.uuid,
+                    role_filter)).as_scalar()
+
+
+def _lock_cluster(session, cluster_id):
+    # Serializes the nodegroup operations of a cluster so that its node
+    # counts are computed from the committed state of all its nodegroups.
+    query = model_query(models.Cluster, session=session)
+    query.filter_by(uuid=cluster_id).with_lockmode('update').first()
+
+
+def _sync_node_counts(session, cluster_ids=None):
+    """Recompute the node counts of the given clusters, or of all clusters.
+
+    :returns: The number of updated cluster rows.
+    """
+    session.flush()
+    query = model_query(models.Cluster, session=session)
+    if cluster_ids is not None:
+        query = query.filter(models.Cluster.uuid.in_(cluster_ids))
+    # updated_at is set to itself so that recomputing the counts does not
+    # trigger its onupdate default, the nodegroups track their own changes.
+    return query.update(
+        {models.Cluster.node_count: _node_count_subquery(is_master=False),
+         models.Cluster.master_count: _node_count_subquery(is_master=True),
+         models.Cluster.updated_at: models.Cluster.updated_at},
+        synchronize_session=False)
+
+
 def _paginate_query(model, limit=None, marker=None, sort_key=None,
                     sort_dir=None, query=None):
     if not query:
@@ -123,29 +214,26 @@ class Connection(api.Connection):
     def __init__(self):
         pass
 
-    def _add_tenant_filters(self, context, query):
+    def get_tenant_filters(self, context):
         if context.is_admin and context.all_tenants:
-            return query
+            return {}
 
-        admin_context = request_context.make_admin_context(all_tenants=True)
-        osc = clients.OpenStackClients(admin_context)
-        kst = osc.keystone()
+        trustee_domain_id = _get_trustee_domain_id()
 
         # User in a regular project (not in the trustee domain)
-        if context.project_id and context.domain_id != kst.trustee_domain_id:
-            query = query.filter_by(project_id=context.project_id)
+        if context.project_id and context.domain_id != trustee_domain_id:
+            return {'project_id': context.project_id}
         # Match project ID component in trustee user's user name against
         # cluster's project_id to associate per-cluster trustee users who have
         # no project information with the project their clusters/cluster models
         # reside in. This is equivalent to the project filtering above.
-        elif context.domain_id == kst.trustee_domain_id:
-            user_name = kst.client.users.get(context.user_id).name
-            user_project = user_name.split('_', 2)[1]
-            query = query.filter_by(project_id=user_project)
+        elif context.domain_id == trustee_domain_id:
+            return {'project_id': _get_trustee_project_id(context.user_id)}
         else:
-            query = query.filter_by(user_id=context.user_id)
+            return {'user_id': context.user_id}
 
-        return query
+    def _add_tenant_filters(self, context, query):
+        return query.filter_by(**self.get_tenant_filters(context))
 
     def _add_clusters_filters(self, query, filters):
         if filters is None:
@@ -164,25 +252,14 @@ class Connection(api.Connection):
         if 'status' in filters:
             query = query.filter(models.Cluster.status.in_(filters['status']))
 
-        # Helper to filter based on node_count field from nodegroups
-        def filter_node_count(query, node_count, is_master=False):
-            nfunc = func.sum(models.NodeGroup.node_count)
-            nquery = model_query(models.NodeGroup)
-            if is_master:
-                nquery = nquery.filter(models.NodeGroup.role == 'master')
-            else:
-                nquery = nquery.filter(models.NodeGroup.role != 'master')
-            nquery = nquery.group_by(models.NodeGroup.cluster_id)
-            nquery = nquery.having(nfunc == node_count)
-            uuids = [ng.cluster_id for ng in nquery.all()]
-            return query.filter(models.Cluster.uuid.in_(uuids))
-
+        # node_count and master_count are summary columns of the cluster,
+        # kept in sync with its nodegroups by the nodegroup operations.
         if 'node_count' in filters:
-            query = filter_node_count(
-                query, filters['node_count'], is_master=False)
+            query = query.filter(
+                models.Cluster.node_count == filters['node_count'])
         if 'master_count' in filters:
-            query = filter_node_count(
-                query, filters['master_count'], is_master=True)
+            query = query.filter(
+                models.Cluster.master_count == filters['master_count'])
 
         return query
 
@@ -201,10 +278,14 @@ class Connection(api.Connection):
 
         cluster = models.Cluster()
         cluster.update(values)
+        session = get_session()
         try:
-            cluster.save()
+            with session.begin():
+                cluster.save(session=session)
+                _sync_node_counts(session, [cluster.uuid])
         except db_exc.DBDuplicateEntry:
             raise exception.ClusterAlreadyExists(uuid=values['uuid'])
+        session.refresh(cluster)
         return cluster
 
     def get_cluster_by_id(self, context, cluster_id):
@@ -237,21 +318,44 @@ class Connection(api.Connection):
         except NoResultFound:
             raise exception.ClusterNotFound(cluster=cluster_uuid)
 
-    def get_cluster_stats(self, context, project_id=None):
+    def get_cluster_by_stack_id(self, context, stack_id):
+        # The default nodegroups share the stack of the cluster, so looking
+        # at the nodegroups covers both cluster and nodegroup stacks.
         query = model_query(models.Cluster)
-        node_count_col = models.NodeGroup.node_count
-        ncfunc = func.sum(node_count_col)
+        query = self._add_tenant_filters(context, query)
+        query = query.join(models.NodeGroup,
+                           models.Cluster.uuid == models.NodeGroup.cluster_id)
+        query = query.filter(models.NodeGroup.stack_id == stack_id)
+        try:
+            return query.distinct().one()
+        except NoResultFound:
+            raise exception.ClusterNotFound(cluster=stack_id)
 
+    def get_cluster_stats(self, context, project_id=None):
+        query = model_query(models.Cluster)
         if project_id:
             query = query.filter_by(project_id=project_id)
-            nquery = query.session.query(ncfunc.label("nodes")).filter_by(
-                project_id=project_id)
-        else:
-            nquery = query.session.query(ncfunc.label("nodes"))
 
         clusters = query.count()
-        nodes = int(nquery.one()[0]) if nquery.one()[0] else 0
-        return clusters, nodes
+        nodes = query.with_entities(
+            func.sum(func.coalesce(models.Cluster.node_count, 0) +
+                     func.coalesce(models.Cluster.master_count, 0))).scalar()
+        return clusters, int(nodes or 0)
+
+    def get_clusters_with_stale_node_counts(self):
+        query = model_query(models.Cluster.uuid,
+                            models.Cluster.node_count,
+                            models.Cluster.master_count)
+        query = query.add_columns(
+            _node_count_subquery(is_master=False).label('nodes'),
+            _node_count_subquery(is_master=True).label('masters'))
+        return [row for row in query.order_by(models.Cluster.id)
+                if (row[1], row[2]) != (row[3], row[4])]
+
+    def sync_cluster_node_counts(self, cluster_ids=None):
+        session = get_session()
+        with session.begin():
+            return _sync_node_counts(session, cluster_ids)
 
     def get_cluster_count_all(self, context, filters=None):
         query = model_query(models.Cluster)
@@ -363,6 +467,32 @@ class Connection(api.Connection):
             raise exception.ClusterTemplateNotFound(
                 clustertemplate=cluster_template_uuid)
 
+    def get_cluster_templates_by_uuids(self, context, cluster_template_uuids):
+        query = model_query(models.ClusterTemplate)
+        query = self._add_tenant_filters(context, query)
+        public_q = model_query(models.ClusterTemplate).filter_by(public=True)
+        query = query.union(public_q)
+        cluster_templates = []
+        for chunk in _chunks(cluster_template_uuids):
+            cluster_templates.extend(query.filter(
+                models.ClusterTemplate.uuid.in_(chunk)).all())
+        return cluster_templates
+
+    def get_cluster_template_versions(self, context, cluster_template_uuids):
+        columns = (models.ClusterTemplate.uuid,
+                   models.ClusterTemplate.created_at,
+                   models.ClusterTemplate.updated_at)
+        query = model_query(*columns)
+        query = self._add_tenant_filters(context, query)
+        public_q = model_query(*columns).filter_by(public=True)
+        query = query.union(public_q)
+        versions = {}
+        for chunk in _chunks(cluster_template_uuids):
+            for uuid, created_at, updated_at in query.filter(
+                    models.ClusterTemplate.uuid.in_(chunk)):
+                versions[uuid] = (created_at, updated_at)
+        return versions
+
     def get_cluster_template_by_name(self, context, cluster_template_name):
         query = model_query(models.ClusterTemplate)
         query = self._add_tenant_filters(context, query)
@@ -807,8 +937,12 @@ class Connection(api.Connection):
 
         nodegroup = models.NodeGroup()
         nodegroup.update(values)
+        session = get_session()
         try:
-            nodegroup.save()
+            with session.begin():
+                _lock_cluster(session, nodegroup.cluster_id)
+                nodegroup.save(session=session)
+                _sync_node_counts(session, [nodegroup.cluster_id])
         except db_exc.DBDuplicateEntry:
             raise exception.NodeGroupAlreadyExists(
                 cluster_id=values['cluster_id'], name=values['name'])
@@ -817,6 +951,7 @@ class Connection(api.Connection):
     def destroy_nodegroup(self, cluster_id, nodegroup_id):
         session = get_session()
         with session.begin():
+            _lock_cluster(session, cluster_id)
             query = model_query(models.NodeGroup, session=session)
             query = add_identity_filter(query, nodegroup_id)
             query = query.filter_by(cluster_id=cluster_id)
@@ -825,13 +960,17 @@ class Connection(api.Connection):
             except NoResultFound:
                 raise exception.NodeGroupNotFound(nodegroup=nodegroup_id)
             query.delete()
+            _sync_node_counts(session, [cluster_id])
 
     def update_nodegroup(self, cluster_id, nodegroup_id, values):
         return self._do_update_nodegroup(cluster_id, nodegroup_id, values)
 
     def _do_update_nodegroup(self, cluster_id, nodegroup_id, values):
+        resized = 'node_count' in values or 'role' in values
         session = get_session()
         with session.begin():
+            if resized:
+                _lock_cluster(session, cluster_id)
             query = model_query(models.NodeGroup, session=session)
             query = add_identity_filter(query, nodegroup_id)
             query = query.filter_by(cluster_id=cluster_id)
@@ -841,6 +980,8 @@ class Connection(api.Connection):
                 raise exception.NodeGroupNotFound(nodegroup=nodegroup_id)
 
             ref.update(values)
+            if resized:
+                _sync_node_counts(session, [cluster_id])
         return ref
 
     def get_nodegroup_by_id(self, context, cluster_id, nodegroup_id):
@@ -891,6 +1032,16 @@ class Connection(api.Connection):
         return _paginate_query(models.NodeGroup, limit, marker,
                                sort_key, sort_dir, query)
 
+    def list_nodegroups_for_clusters(self, context, cluster_ids):
+        query = model_query(models.NodeGroup)
+        if not context.is_admin:
+            query = query.filter_by(project_id=context.project_id)
+        nodegroups = []
+        for chunk in _chunks(cluster_ids):
+            nodegroups.extend(query.filter(
+                models.NodeGroup.cluster_id.in_(chunk)).all())
+        return sorted(nodegroups, key=lambda nodegroup: nodegroup.id)
+
     def get_cluster_nodegroup_count(self, context, cluster_id):
         query = model_query(models.NodeGroup)
         if not context.is_admin:
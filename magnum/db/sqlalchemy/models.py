@@ -107,6 +107,10 @@ class Cluster(Base):
     __tablename__ = 'cluster'
     __table_args__ = (
         schema.UniqueConstraint('uuid', name='uniq_bay0uuid'),
+        schema.Index('ix_cluster0project_id', 'project_id'),
+        schema.Index('ix_cluster0status', 'status'),
+        schema.Index('ix_cluster0stack_id', 'stack_id'),
+        schema.Index('ix_cluster0cluster_template_id', 'cluster_template_id'),
         table_args()
     )
     id = Column(Integer, primary_key=True)
@@ -147,6 +151,10 @@ class Cluster(Base):
     fixed_network = Column(String(255, mysql_ndb_type=TINYTEXT))
     fixed_subnet = Column(String(255, mysql_ndb_type=TINYTEXT))
     floating_ip_enabled = Column(Boolean, default=True)
+    # Sums of the node counts of the worker and master nodegroups, kept up to
+    # date by the nodegroup operations of the database API.
+    node_count = Column(Integer, default=0)
+    master_count = Column(Integer, default=0)
 
 
 class ClusterTemplate(Base):
@@ -155,6 +163,8 @@ class ClusterTemplate(Base):
     __tablename__ = 'cluster_template'
     __table_args__ = (
         schema.UniqueConstraint('uuid', name='uniq_baymodel0uuid'),
+        schema.Index('ix_cluster_template0project_id', 'project_id'),
+        schema.Index('ix_cluster_template0public', 'public'),
         table_args()
     )
     id = Column(Integer, primary_key=True)
@@ -270,6 +280,9 @@ class NodeGroup(Base):
         schema.UniqueConstraint(
             'cluster_id', 'name',
             name='uniq_nodegroup0cluster_id0name'),
+        schema.Index('ix_nodegroup0cluster_id0role0is_default',
+                     'cluster_id', 'role', 'is_default'),
+        schema.Index('ix_nodegroup0stack_id', 'stack_id'),
         table_args()
     )
     id = Column(Integer, primary_key=True)
@@ -14,6 +14,7 @@
 
 import abc
 import six
+import threading
 
 from oslo_config import cfg
 from pkg_resources import iter_entry_points
@@ -30,6 +31,10 @@ CONF = cfg.CONF
 class Driver(object):
 
     definitions = None
+    # Driver instances by cluster type. Drivers keep no per-cluster state,
+    # so one instance per type is shared by all the clusters.
+    _drivers = {}
+    _drivers_lock = threading.Lock()
 
     @classmethod
     def load_entry_points(cls):
@@ -128,12 +133,31 @@ class Driver(object):
                 server_type=server_type,
                 os=os,
                 coe=coe)
-        driver_info = definition_map[cluster_type]
-        # TODO(muralia): once --drivername is supported as an input during
-        # cluster create, change the following line to use driver name for
-        # loading.
-        return driver.DriverManager("magnum.drivers",
-                                    driver_info['entry_point_name']).driver()
+        cluster_driver = cls._drivers.get(cluster_type)
+        if cluster_driver is None:
+            with cls._drivers_lock:
+                cluster_driver = cls._drivers.get(cluster_type)
+                if cluster_driver is None:
+                    driver_info = definition_map[cluster_type]
+                    # TODO(muralia): once --drivername is supported as an
+                    # input during cluster create, change the following line
+                    # to use driver name for loading.
+                    cluster_driver = driver.DriverManager(
+                        "magnum.drivers",
+                        driver_info['entry_point_name']).driver()
+                    cls._drivers[cluster_type] = cluster_driver
+        return cluster_driver
+
+    @classmethod
+    def reload_drivers(cls):
+        """Forget the loaded drivers and driver definitions.
+
+        The next lookups load the drivers from the entry points again, which
+        picks up newly installed or disabled drivers.
+        """
+        with cls._drivers_lock:
+            Driver.definitions = None
+            Driver._drivers = {}
 
     @classmethod
     def get_driver_for_cluster(cls, context, cluster):
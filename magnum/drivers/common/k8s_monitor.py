@@ -10,12 +10,11 @@
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
 
-import ast
-
 from oslo_utils import strutils
 
 from magnum.common import utils
 from magnum.conductor import k8s_api as k8s
+from magnum.conductor import k8s_health
 from magnum.conductor import monitors
 from magnum.objects import fields as m_fields
 
@@ -43,9 +42,9 @@ class K8sMonitor(monitors.MonitorBase):
 
     def pull_data(self):
         k8s_api = k8s.create_k8s_api(self.context, self.cluster)
-        nodes = k8s_api.list_node()
+        nodes = k8s.list_chunked(k8s_api.list_node)
         self.data['nodes'] = self._parse_node_info(nodes)
-        pods = k8s_api.list_namespaced_pod('default')
+        pods = k8s.list_chunked(k8s_api.list_namespaced_pod, 'default')
         self.data['pods'] = self._parse_pod_info(pods)
 
     def poll_health_status(self):
@@ -90,52 +89,35 @@ class K8sMonitor(monitors.MonitorBase):
     def _parse_pod_info(self, pods):
         """Parse pods and retrieve memory and cpu details about each pod
 
-        :param pods: The output of k8s_api.list_namespaced_pod()
+        :param pods: Iterable of pods, as returned in the items of the
+            /api/v1/namespaces/default/pods API
         For example:
-        {
-            'items': [{
-                'status': {
-                    'container_statuses': None,
-                    'pod_ip': None,
-                    'phase': 'Pending',
-                    'message': None,
-                    'conditions': None,
-                },
-                'spec': {
-                    'containers': [{
-                        'image': 'nginx',
-                        'resources': {'requests': None,
-                              'limits': "{u'cpu': u'500m',
-                                          u'memory': u'1280e3'}"},
-                    }],
-                },
-                'api_version': None,
-            }],
-            'kind': 'PodList',
-        }
-
-        The above output is the dict form of:
-        k8sclient.client.models.v1_pod_list.
-        V1PodList object
+        [{
+            'status': {
+                'phase': 'Pending',
+            },
+            'spec': {
+                'containers': [{
+                    'image': 'nginx',
+                    'resources': {'limits': {'cpu': '500m',
+                                             'memory': '1280e3'}},
+                }],
+            },
+        }]
 
         :return: Memory size of each pod. Example:
             [{'Memory': 1280000.0, cpu: 0.5},
              {'Memory': 1280000.0, cpu: 0.5}]
         """
-        pods = pods.items
         parsed_containers = []
         for pod in pods:
-            containers = pod.spec.containers
+            containers = pod['spec'].get('containers') or []
             for container in containers:
                 memory = 0
                 cpu = 0
-                resources = container.resources
-                limits = resources.limits
+                resources = container.get('resources') or {}
+                limits = resources.get('limits')
                 if limits is not None:
-                    # Output of resources.limits is string
-                    # for example:
-                    # limits = "{cpu': '500m': 'memory': '1000Ki'}"
-                    limits = ast.literal_eval(limits)
                     if limits.get('memory', ''):
                         memory = utils.get_k8s_quantity(limits['memory'])
                     if limits.get('cpu', ''):
@@ -150,37 +132,25 @@ class K8sMonitor(monitors.MonitorBase):
     def _parse_node_info(self, nodes):
         """Parse nodes to retrieve memory and cpu of each node
 
-        :param nodes: The output of k8s_api.list_namespaced_node()
+        :param nodes: Iterable of nodes, as returned in the items of the
+            /api/v1/nodes API
         For example:
-        {
-            'items': [{
-                'status': {
-                    'phase': None,
-                    'capacity': "{u'cpu': u'1',
-                                  u'memory': u'2049852Ki'}",
-                },
-            }],
-            'api_version': None,
-            'kind': 'NodeList',
-            'api_version': 'v1',
-        }
-
-        The above output is the dict form of:
-        k8sclient.client.models.v1_node_list.
-        V1NodeList object
+        [{
+            'metadata': {'name': 'k8s-cluster-node-0'},
+            'status': {
+                'capacity': {'cpu': '1',
+                             'memory': '2049852Ki'},
+            },
+        }]
 
         :return: CPU core number and Memory size of each node. Example:
             [{'cpu': 1, 'Memory': 1024.0},
              {'cpu': 1, 'Memory': 1024.0}]
 
         """
-        nodes = nodes.items
         parsed_nodes = []
         for node in nodes:
-            # Output of node.status.capacity is strong
-            # for example:
-            # capacity = "{'cpu': '1', 'memory': '1000Ki'}"
-            capacity = node.status.capacity
+            capacity = node['status']['capacity']
             memory = utils.get_k8s_quantity(capacity['memory'])
             cpu = int(capacity['cpu'])
             parsed_nodes.append({'Memory': memory, 'Cpu': cpu})
@@ -203,7 +173,10 @@ class K8sMonitor(monitors.MonitorBase):
         3.  How to get the health_status and health_status_reason?
             3.1 Call /healthz to get the API health status
             3.2 Call list_node (using API /api/v1/nodes) to get the nodes
-                health status
+                health status, page by page
+
+        4.  The checks run through the K8sHealthPoller shared by the
+            process, which bounds their concurrency and duration.
 
         :param k8s_api: The api client to the cluster
         :return: Tumple including status and reason. Example:
@@ -218,34 +191,5 @@ class K8sMonitor(monitors.MonitorBase):
             )
 
         """
-
-        health_status = m_fields.ClusterHealthStatus.UNHEALTHY
-        health_status_reason = {}
-        api_status = None
-
-        try:
-            api_status, _, _ = k8s_api.api_client.call_api(
-                '/healthz', 'GET', response_type=object)
-
-            for node in k8s_api.list_node().items:
-                node_key = node.metadata.name + ".Ready"
-                ready = False
-                for condition in node.status.conditions:
-                    if condition.type == 'Ready':
-                        ready = strutils.bool_from_string(condition.status)
-                        break
-
-                health_status_reason[node_key] = ready
-
-            if (api_status == 'ok' and
-                    all(n for n in health_status_reason.values())):
-                health_status = m_fields.ClusterHealthStatus.HEALTHY
-
-            health_status_reason['api'] = api_status
-        except Exception as exp_api:
-            if not api_status:
-                api_status = (getattr(exp_api, 'body', None) or
-                              getattr(exp_api, 'message', None))
-                health_status_reason['api'] = api_status
-
-        return health_status, health_status_reason
+        return k8s_health.get_health_poller().check(
+            k8s_api, self.cluster.api_address)
@@ -22,7 +22,6 @@ from oslo_config import cfg
 from oslo_log import log as logging
 from oslo_utils import importutils
 
-from heatclient.common import template_utils
 from heatclient import exc as heatexc
 
 from magnum.common import clients
@@ -33,9 +32,12 @@ from magnum.common import octavia
 from magnum.common import short_id
 from magnum.conductor.handlers.common import cert_manager
 from magnum.conductor.handlers.common import trust_manager
+from magnum.conductor import k8s_api
 from magnum.conductor import utils as conductor_utils
 from magnum.drivers.common import driver
 from magnum.drivers.common import k8s_monitor
+from magnum.drivers.heat import template_cache
+from magnum.drivers.heat import template_def
 from magnum.i18n import _
 from magnum.objects import fields
 
@@ -46,6 +48,58 @@ NodeGroupStatus = collections.namedtuple('NodeGroupStatus',
                                          'name status reason is_default')
 
 
+class _StackOutputs(object):
+    """Outputs of a stack, shown one at a time when first looked up."""
+
+    def __init__(self, stack):
+        self._stack = stack
+        self._values = {}
+        self._missing = set()
+
+    def _show(self, key):
+        if key in self._values or key in self._missing:
+            return
+        try:
+            output = self._stack.output_show(key)['output']
+        except heatexc.NotFound:
+            self._missing.add(key)
+            return
+        if output.get('output_error'):
+            LOG.debug("Output %(key)s of stack %(stack)s failed: %(error)s",
+                      {'key': key, 'stack': self._stack.id,
+                       'error': output['output_error']})
+        self._values[key] = output.get('output_value')
+
+    def __contains__(self, key):
+        self._show(key)
+        return key in self._values
+
+    def __getitem__(self, key):
+        self._show(key)
+        return self._values[key]
+
+
+class OnDemandOutputsStack(template_def.ResolvedStack):
+    """A stack fetched without its outputs.
+
+    Resolving every output of a stack is expensive on Heat, so only the
+    outputs the template definition looks up are shown. to_dict() falls
+    back to fetching the stack with all its outputs resolved.
+    """
+
+    def __init__(self, heat, stack):
+        self.stack = stack
+        self._heat = heat
+        self._dict = None
+        self.output_values = _StackOutputs(stack)
+
+    def to_dict(self):
+        if self._dict is None:
+            self._dict = self._heat.stacks.get(
+                self.stack.id, resolve_outputs=True).to_dict()
+        return self._dict
+
+
 @six.add_metaclass(abc.ABCMeta)
 class HeatDriver(driver.Driver):
     """Base Driver class for using Heat
@@ -79,11 +133,7 @@ class HeatDriver(driver.Driver):
     def _get_env_files(self, template_path, env_rel_paths):
         template_dir = os.path.dirname(template_path)
         env_abs_paths = [os.path.join(template_dir, f) for f in env_rel_paths]
-        environment_files = []
-        env_map, merged_env = (
-            template_utils.process_multiple_environments_and_files(
-                env_paths=env_abs_paths, env_list_tracker=environment_files))
-        return environment_files, env_map
+        return template_cache.get_env_files(env_abs_paths)
 
     @abc.abstractmethod
     def get_template_definition(self):
@@ -185,7 +235,7 @@ class HeatDriver(driver.Driver):
             self._extract_template_definition(context, cluster,
                                               nodegroups=nodegroups))
 
-        tpl_files, template = template_utils.get_template_contents(
+        tpl_files, template = template_cache.get_template_contents(
             template_path)
 
         environment_files, env_map = self._get_env_files(template_path,
@@ -329,12 +379,16 @@ class HeatPoller(object):
         self.cluster_template = conductor_utils.retrieve_cluster_template(
             self.context, cluster)
         self.template_def = cluster_driver.get_template_definition()
+        self._stacks = dict()
 
     def poll_and_check(self):
         # TODO(yuanying): temporary implementation to update api_address,
         # node_addresses and cluster status
         ng_statuses = list()
         self.default_ngs = list()
+        # The default nodegroups share their stack, so each stack is
+        # fetched once per poll.
+        self._stacks = dict()
         for nodegroup in self.cluster.nodegroups:
             self.nodegroup = nodegroup
             if self.nodegroup.is_default:
@@ -362,10 +416,7 @@ class HeatPoller(object):
                                    reason=self.nodegroup.status_reason)
 
         try:
-            # Do not resolve outputs by default. Resolving all
-            # node IPs is expensive on heat.
-            stack = self.openstack_client.heat().stacks.get(
-                self.nodegroup.stack_id, resolve_outputs=False)
+            stack = self._get_stack(self.nodegroup.stack_id)
 
             # poll_and_check is detached and polling long time to check
             # status, so another user/client can call delete cluster/stack.
@@ -378,16 +429,15 @@ class HeatPoller(object):
 
             if stack.stack_status in (fields.ClusterStatus.CREATE_COMPLETE,
                                       fields.ClusterStatus.UPDATE_COMPLETE):
-                # Resolve all outputs if the stack is COMPLETE
-                stack = self.openstack_client.heat().stacks.get(
-                    self.nodegroup.stack_id, resolve_outputs=True)
+                # Resolve the outputs if the stack is COMPLETE
+                if not isinstance(stack, OnDemandOutputsStack):
+                    stack = OnDemandOutputsStack(
+                        self.openstack_client.heat(), stack)
+                    self._stacks[self.nodegroup.stack_id] = stack
 
                 self._sync_cluster_and_template_status(stack)
             elif stack.stack_status != self.nodegroup.status:
-                self.template_def.nodegroup_output_mappings = list()
-                self.template_def.update_outputs(
-                    stack, self.cluster_template, self.cluster,
-                    nodegroups=[self.nodegroup])
+                self._update_outputs(stack)
                 self._sync_cluster_status(stack)
 
             if stack.stack_status in (fields.ClusterStatus.CREATE_FAILED,
@@ -404,6 +454,20 @@ class HeatPoller(object):
                                is_default=self.nodegroup.is_default,
                                reason=self.nodegroup.status_reason)
 
+    def _get_stack(self, stack_id):
+        stacks = self._stacks
+        if stack_id not in stacks:
+            try:
+                # Do not resolve outputs by default. Resolving all
+                # node IPs is expensive on heat.
+                stacks[stack_id] = self.openstack_client.heat().stacks.get(
+                    stack_id, resolve_outputs=False)
+            except heatexc.NotFound:
+                stacks[stack_id] = None
+        if stacks[stack_id] is None:
+            raise heatexc.NotFound(_("Stack %s not found.") % stack_id)
+        return stacks[stack_id]
+
     def aggregate_nodegroup_statuses(self, ng_statuses):
         # NOTE(ttsiouts): Aggregate the nodegroup statuses and set the
         # cluster overall status.
@@ -462,6 +526,7 @@ class HeatPoller(object):
                                                           context=self.context)
             cert_manager.delete_client_files(self.cluster,
                                              context=self.context)
+            k8s_api.evict_k8s_api(self.cluster.uuid)
 
         except exception.ClusterNotFound:
             LOG.info('The cluster %s has been deleted by others.',
@@ -486,11 +551,15 @@ class HeatPoller(object):
             container_version = None
         self.cluster.container_version = container_version
 
-    def _sync_cluster_and_template_status(self, stack):
+    def _update_outputs(self, stack):
         self.template_def.nodegroup_output_mappings = list()
-        self.template_def.update_outputs(stack, self.cluster_template,
-                                         self.cluster,
-                                         nodegroups=[self.nodegroup])
+        with template_def.nodegroups_loaded(self.cluster):
+            self.template_def.update_outputs(stack, self.cluster_template,
+                                             self.cluster,
+                                             nodegroups=[self.nodegroup])
+
+    def _sync_cluster_and_template_status(self, stack):
+        self._update_outputs(stack)
         self.get_version_info(stack)
         self._sync_cluster_status(stack)
 
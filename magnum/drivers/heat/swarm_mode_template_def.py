@@ -61,10 +61,11 @@ class MasterAddressOutputMapping(ServerAddressOutputMapping):
             self.heat_output = self.private_ip_output_key
 
         LOG.debug("Using heat_output: %s", self.heat_output)
+        output_values = template_def._output_values(stack)
         _master_addresses = []
-        for output in stack.to_dict().get('outputs', []):
-            if output['output_key'] in self.heat_output:
-                _master_addresses += output['output_value']
+        for output_key in self.heat_output:
+            if output_key in output_values:
+                _master_addresses += output_values[output_key] or []
 
         for ng in cluster.nodegroups:
             if ng.uuid == self.nodegroup_uuid:
@@ -0,0 +1,135 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Cache of the parsed Heat templates and environments of the drivers.
+
+Reading a driver's template pulls in every nested template and script
+fragment it references, so parsing it again for each stack create is
+expensive. The bundles are kept in memory and are reloaded when the
+modification time of any of the files they were built from changes.
+"""
+
+import os
+import threading
+
+from heatclient.common import template_utils
+from oslo_log import log as logging
+from six.moves.urllib import parse as urlparse
+
+from magnum.drivers.common import driver
+import magnum.conf
+
+CONF = magnum.conf.CONF
+LOG = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_templates = {}
+_environments = {}
+
+
+def _local_paths(urls):
+    return [urlparse.urlparse(url).path for url in urls
+            if url.startswith('file:')]
+
+
+def _mtimes(paths):
+    try:
+        return tuple(os.stat(path).st_mtime for path in paths)
+    except OSError:
+        # Not a local file we can watch, so don't keep it around.
+        return None
+
+
+class _Bundle(object):
+
+    def __init__(self, paths, value):
+        self.paths = paths
+        self.mtimes = _mtimes(paths)
+        self.value = value
+
+    def is_fresh(self):
+        return (self.mtimes is not None and
+                _mtimes(self.paths) == self.mtimes)
+
+
+def _get(bundles, key, load):
+    if not CONF.cluster_heat.cache_templates:
+        return load()[1]
+
+    bundle = bundles.get(key)
+    if bundle is not None and bundle.is_fresh():
+        return bundle.value
+
+    with _lock:
+        bundle = bundles.get(key)
+        if bundle is None or not bundle.is_fresh():
+            paths, value = load()
+            bundle = _Bundle(paths, value)
+            if bundle.mtimes is None:
+                bundles.pop(key, None)
+                return value
+            bundles[key] = bundle
+    return bundle.value
+
+
+def get_template_contents(template_path):
+    """Return the files dict and the parsed template of a template file.
+
+    The files dict is a copy and can be extended by the caller, the
+    template is shared and must not be modified.
+    """
+    def load():
+        files, template = template_utils.get_template_contents(template_path)
+        return [template_path] + _local_paths(files), (files, template)
+
+    files, template = _get(_templates, template_path, load)
+    return dict(files), template
+
+
+def get_env_files(env_paths):
+    """Return the environment file URLs and files dict of environments."""
+    def load():
+        environment_files = []
+        env_map, merged_env = (
+            template_utils.process_multiple_environments_and_files(
+                env_paths=env_paths, env_list_tracker=environment_files))
+        paths = list(env_paths) + _local_paths(env_map)
+        return paths, (environment_files, env_map)
+
+    environment_files, env_map = _get(_environments, tuple(env_paths), load)
+    return list(environment_files), dict(env_map)
+
+
+def preload():
+    """Parse the templates of all the enabled Heat drivers."""
+    if not CONF.cluster_heat.cache_templates:
+        return
+    for server_type, os_distro, coe in driver.Driver.get_drivers():
+        try:
+            cluster_driver = driver.Driver.get_driver(server_type,
+                                                      os_distro, coe)
+            get_definition = getattr(cluster_driver,
+                                     'get_template_definition', None)
+            if get_definition is None:
+                continue
+            get_template_contents(get_definition().template_path)
+        except Exception:
+            LOG.warning("Failed to preload the Heat template of the "
+                        "%(server_type)s/%(os)s/%(coe)s driver.",
+                        {'server_type': server_type, 'os': os_distro,
+                         'coe': coe}, exc_info=True)
+
+
+def clear():
+    with _lock:
+        _templates.clear()
+        _environments.clear()
@@ -13,6 +13,7 @@
 # under the License.
 import abc
 import ast
+import contextlib
 
 from oslo_log import log as logging
 from oslo_utils import strutils
@@ -26,6 +27,7 @@ from magnum.common import keystone
 from magnum.common import nova
 from magnum.common import utils
 import magnum.conf
+from magnum import objects
 
 from requests import exceptions as req_exceptions
 
@@ -37,6 +39,48 @@ COMMON_ENV_PATH = COMMON_TEMPLATES_PATH + "environments/"
 CONF = magnum.conf.CONF
 
 
+@contextlib.contextmanager
+def nodegroups_loaded(cluster):
+    """Query the nodegroups of the cluster once for the whole block.
+
+    cluster.nodegroups hits the database on every access, and the
+    nodegroup mappings look it up once each.
+    """
+    if not isinstance(cluster, objects.Cluster):
+        yield
+        return
+
+    with cluster.preload_nodegroups():
+        yield
+
+
+class ResolvedStack(object):
+    """A Heat stack with its outputs indexed by output key.
+
+    Stack.to_dict() deep copies the stack, so it is called once and the
+    output mappings look their value up by key.
+    """
+
+    def __init__(self, stack):
+        self.stack = stack
+        self._dict = stack.to_dict()
+        self.output_values = {
+            output['output_key']: output['output_value']
+            for output in self._dict.get('outputs', [])}
+
+    def to_dict(self):
+        return self._dict
+
+    def __getattr__(self, name):
+        return getattr(self.stack, name)
+
+
+def _output_values(stack):
+    if isinstance(stack, ResolvedStack):
+        return stack.output_values
+    return ResolvedStack(stack).output_values
+
+
 class ParameterMapping(object):
     """A mapping associating heat param and cluster_template attr.
 
@@ -123,9 +167,9 @@ class OutputMapping(object):
         return self.heat_output == output_key
 
     def get_output_value(self, stack):
-        for output in stack.to_dict().get('outputs', []):
-            if output['output_key'] == self.heat_output:
-                return output['output_value']
+        output_values = _output_values(stack)
+        if self.heat_output in output_values:
+            return output_values[self.heat_output]
 
         LOG.warning('stack does not have output_key %s', self.heat_output)
         return None
@@ -172,9 +216,8 @@ class NodeGroupOutputMapping(OutputMapping):
         return self.get_param_value(stack)
 
     def get_param_value(self, stack):
-        for param, value in stack.parameters.items():
-            if param == self.heat_output:
-                return value
+        if self.heat_output in stack.parameters:
+            return stack.parameters[self.heat_output]
 
         LOG.warning('stack does not have param %s', self.heat_output)
         return None
@@ -193,26 +236,36 @@ class TemplateDefinition(object):
         self.param_mappings = list()
         self.output_mappings = list()
         self.nodegroup_output_mappings = list()
+        # Position and heat param of the first mapping of each
+        # (cluster_attr, cluster_template_attr) and
+        # (nodegroup_attr, nodegroup_uuid) pair.
+        self._cluster_params = dict()
+        self._nodegroup_params = dict()
+        self._outputs = dict()
 
     def add_parameter(self, *args, **kwargs):
         param_class = kwargs.pop('param_class', ParameterMapping)
         param = param_class(*args, **kwargs)
+        entry = (len(self.param_mappings), param.heat_param)
+        if hasattr(param, 'cluster_attr'):
+            self._cluster_params.setdefault(
+                (param.cluster_attr, param.cluster_template_attr), entry)
+        if hasattr(param, 'nodegroup_attr'):
+            self._nodegroup_params.setdefault(
+                (param.nodegroup_attr, param.nodegroup_uuid), entry)
         self.param_mappings.append(param)
 
     def add_output(self, *args, **kwargs):
         mapping_type = kwargs.pop('mapping_type', OutputMapping)
         output = mapping_type(*args, **kwargs)
         if kwargs.get('cluster_attr', None):
+            self._outputs.setdefault(output.heat_output, output)
             self.output_mappings.append(output)
         else:
             self.nodegroup_output_mappings.append(output)
 
-    def get_output(self, *args, **kwargs):
-        for output in self.output_mappings:
-            if output.matched(*args, **kwargs):
-                return output
-
-        return None
+    def get_output(self, output_key):
+        return self._outputs.get(output_key)
 
     def get_params(self, context, cluster_template, cluster, **kwargs):
         """Pulls template parameters from ClusterTemplate.
@@ -227,8 +280,9 @@ class TemplateDefinition(object):
         """
         template_params = dict()
 
-        for mapping in self.param_mappings:
-            mapping.set_param(template_params, cluster_template, cluster)
+        with nodegroups_loaded(cluster):
+            for mapping in self.param_mappings:
+                mapping.set_param(template_params, cluster_template, cluster)
 
         if 'extra_params' in kwargs:
             template_params.update(kwargs.get('extra_params'))
@@ -259,17 +313,15 @@ class TemplateDefinition(object):
 
         :return: stack parameter name or None
         """
-        for mapping in self.param_mappings:
-            if hasattr(mapping, 'cluster_attr'):
-                if mapping.cluster_attr == cluster_attr and \
-                        mapping.cluster_template_attr == cluster_template_attr:
-                    return mapping.heat_param
-            if hasattr(mapping, 'nodegroup_attr'):
-                if mapping.nodegroup_attr == nodegroup_attr and \
-                        mapping.nodegroup_uuid == nodegroup_uuid:
-                    return mapping.heat_param
-
-        return None
+        matches = [
+            entry for entry in (
+                self._cluster_params.get((cluster_attr,
+                                          cluster_template_attr)),
+                self._nodegroup_params.get((nodegroup_attr, nodegroup_uuid)))
+            if entry is not None]
+        if not matches:
+            return None
+        return min(matches)[1]
 
     def get_stack_diff(self, context, heat_params, cluster):
         """Returns all the params that are changed.
@@ -280,6 +332,10 @@ class TemplateDefinition(object):
          for a stack
         :param cluster: the cluster we need to compare with.
         """
+        with nodegroups_loaded(cluster):
+            return self._get_stack_diff(context, heat_params, cluster)
+
+    def _get_stack_diff(self, context, heat_params, cluster):
         diff = {}
         for mapping in self.param_mappings:
             try:
@@ -309,10 +365,13 @@ class TemplateDefinition(object):
 
     def update_outputs(self, stack, cluster_template, cluster,
                        nodegroups=None):
-        for output in self.output_mappings:
-            output.set_output(stack, cluster_template, cluster)
-        for output in self.nodegroup_output_mappings:
-            output.set_output(stack, cluster_template, cluster)
+        if not isinstance(stack, ResolvedStack):
+            stack = ResolvedStack(stack)
+        with nodegroups_loaded(cluster):
+            for output in self.output_mappings:
+                output.set_output(stack, cluster_template, cluster)
+            for output in self.nodegroup_output_mappings:
+                output.set_output(stack, cluster_template, cluster)
 
     @abc.abstractproperty
     def driver_module_path(self):
@@ -323,9 +382,11 @@ class TemplateDefinition(object):
         pass
 
     def extract_definition(self, context, cluster_template, cluster, **kwargs):
-        return (self.template_path,
-                self.get_params(context, cluster_template, cluster, **kwargs),
-                self.get_env_files(cluster_template, cluster))
+        with nodegroups_loaded(cluster):
+            return (self.template_path,
+                    self.get_params(context, cluster_template, cluster,
+                                    **kwargs),
+                    self.get_env_files(cluster_template, cluster))
 
 
 class BaseTemplateDefinition(TemplateDefinition):
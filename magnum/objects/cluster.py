@@ -10,6 +10,9 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+import contextlib
+
 from oslo_utils import strutils
 from oslo_utils import uuidutils
 from oslo_versionedobjects import fields
@@ -52,8 +55,9 @@ class Cluster(base.MagnumPersistentObject, base.MagnumObject,
     # Version 1.20: Fields node_count, master_count, node_addresses,
     #               master_addresses are now properties.
     # Version 1.21  Added fixed_network, fixed_subnet, floating_ip_enabled
+    # Version 1.22: Added get_by_stack_id method
 
-    VERSION = '1.21'
+    VERSION = '1.22'
 
     dbapi = dbapi.get_instance()
 
@@ -91,8 +95,17 @@ class Cluster(base.MagnumPersistentObject, base.MagnumObject,
         'floating_ip_enabled': fields.BooleanField(default=True),
     }
 
+    # Nodegroups loaded together with the clusters of a list, None when
+    # they have to be queried on each access. Single clusters are not
+    # preloaded, as they are usually kept while nodegroups are added or
+    # removed.
+    _nodegroups = None
+    # The node_count and master_count summary columns of the cluster row,
+    # None once a nodegroup loaded through this object changed its counts.
+    _node_counts = None
+
     @staticmethod
-    def _from_db_object(cluster, db_cluster):
+    def _from_db_object(cluster, db_cluster, cluster_template=None):
         """Converts a database entity to a formal object."""
         for field in cluster.fields:
             if field != 'cluster_template':
@@ -102,8 +115,13 @@ class Cluster(base.MagnumPersistentObject, base.MagnumObject,
         # loop because there is a dependency from cluster_template to
         # cluster_template_id. The cluster_template_id must be populated
         # first in the loop before it can be used to find the cluster_template.
-        cluster['cluster_template'] = ClusterTemplate.get_by_uuid(
-            cluster._context, cluster.cluster_template_id)
+        if cluster_template is None:
+            cluster_template = ClusterTemplate.get_by_uuid(
+                cluster._context, cluster.cluster_template_id)
+        cluster['cluster_template'] = cluster_template
+        node_counts = (db_cluster.get('node_count'),
+                       db_cluster.get('master_count'))
+        cluster._node_counts = None if None in node_counts else node_counts
 
         cluster.obj_reset_changes()
         return cluster
@@ -111,7 +129,38 @@ class Cluster(base.MagnumPersistentObject, base.MagnumObject,
     @property
     def nodegroups(self):
         # Returns all nodegroups that belong to the cluster.
-        return NodeGroup.list(self._context, self.uuid)
+        if self._nodegroups is not None:
+            return list(self._nodegroups)
+        nodegroups = NodeGroup.list(self._context, self.uuid)
+        for ng in nodegroups:
+            ng._set_cluster(self)
+        return nodegroups
+
+    def nodegroups_changed(self):
+        """Stop using the node counts of the cluster row.
+
+        Called when a nodegroup loaded through this object is resized,
+        changes role or is deleted, the counts are then computed from the
+        nodegroups.
+        """
+        self._node_counts = None
+
+    @contextlib.contextmanager
+    def preload_nodegroups(self):
+        """Query the nodegroups once for the duration of the block.
+
+        The nodegroup derived properties otherwise query the database on
+        every access. Nothing is done if the nodegroups are already loaded.
+        """
+        if self._nodegroups is not None:
+            yield
+            return
+
+        self._nodegroups = self.nodegroups
+        try:
+            yield
+        finally:
+            self._nodegroups = None
 
     @property
     def default_ng_worker(self):
@@ -119,16 +168,15 @@ class Cluster(base.MagnumPersistentObject, base.MagnumObject,
         # non-master nodegroup. We don't want to limit the roles
         # so each nodegroup that does not have a master role is
         # considered as a worker/minion nodegroup.
-        filters = {'is_default': True}
-        default_ngs = NodeGroup.list(self._context, self.uuid, filters=filters)
-        return [n for n in default_ngs if n.role != 'master'][0]
+        return [n for n in self.nodegroups
+                if n.is_default and n.role != 'master'][0]
 
     @property
     def default_ng_master(self):
         # Assume that every cluster will have only one default
         # master nodegroup.
-        filters = {'role': 'master', 'is_default': True}
-        return NodeGroup.list(self._context, self.uuid, filters=filters)[0]
+        return [n for n in self.nodegroups
+                if n.is_default and n.role == 'master'][0]
 
     @property
     def node_count(self):
@@ -156,9 +204,35 @@ class Cluster(base.MagnumPersistentObject, base.MagnumObject,
 
     @staticmethod
     def _from_db_object_list(db_objects, cls, context):
-        """Converts a list of database entities to a list of formal objects."""
-        return [Cluster._from_db_object(cls(context), obj)
-                for obj in db_objects]
+        """Converts a list of database entities to a list of formal objects.
+
+        The cluster templates and the nodegroups of all the clusters are
+        loaded with one query each, and clusters sharing a cluster template
+        share the same ClusterTemplate object.
+        """
+        if not db_objects:
+            return []
+
+        template_uuids = set(obj['cluster_template_id'] for obj in db_objects)
+        cluster_templates = {
+            ct.uuid: ct
+            for ct in ClusterTemplate.list_by_uuids(context,
+                                                    list(template_uuids))}
+        clusters = [
+            Cluster._from_db_object(
+                cls(context), obj,
+                cluster_templates.get(obj['cluster_template_id']))
+            for obj in db_objects]
+
+        nodegroups = collections.defaultdict(list)
+        for ng in NodeGroup.list_for_clusters(
+                context, [cluster.uuid for cluster in clusters]):
+            nodegroups[ng.cluster_id].append(ng)
+        for cluster in clusters:
+            cluster._nodegroups = nodegroups[cluster.uuid]
+            for ng in cluster._nodegroups:
+                ng._set_cluster(cluster)
+        return clusters
 
     @base.remotable_classmethod
     def get(cls, context, cluster_id):
@@ -199,6 +273,18 @@ class Cluster(base.MagnumPersistentObject, base.MagnumObject,
         cluster = Cluster._from_db_object(cls(context), db_cluster)
         return cluster
 
+    @base.remotable_classmethod
+    def get_by_stack_id(cls, context, stack_id):
+        """Find the cluster owning a Heat stack and return a Cluster object.
+
+        :param stack_id: the id of the cluster stack or of a nodegroup stack.
+        :param context: Security context
+        :returns: a :class:`Cluster` object.
+        """
+        db_cluster = cls.dbapi.get_cluster_by_stack_id(context, stack_id)
+        cluster = Cluster._from_db_object(cls(context), db_cluster)
+        return cluster
+
     @base.remotable_classmethod
     def get_count_all(cls, context, filters=None):
         """Get count of matching clusters.
@@ -272,6 +358,9 @@ class Cluster(base.MagnumPersistentObject, base.MagnumObject,
         values = self.obj_get_changes()
         db_cluster = self.dbapi.create_cluster(values)
         self._from_db_object(self, db_cluster)
+        # The nodegroups of a new cluster are created after its row, the
+        # counts are computed from them.
+        self._node_counts = None
 
     @base.remotable
     def destroy(self, context=None):
@@ -325,15 +414,28 @@ class Cluster(base.MagnumPersistentObject, base.MagnumObject,
         for field in self.fields:
             if self.obj_attr_is_set(field) and self[field] != current[field]:
                 self[field] = current[field]
+        if self._nodegroups is not None:
+            self._nodegroups = current._nodegroups
+            for ng in self._nodegroups:
+                ng._set_cluster(self)
+        self._node_counts = current._node_counts
 
     def as_dict(self):
         dict_ = super(Cluster, self).as_dict()
         # Update the dict with the attributes coming form
-        # the cluster's nodegroups.
-        dict_.update({
-            'node_count': self.node_count,
-            'master_count': self.master_count,
-            'node_addresses': self.node_addresses,
-            'master_addresses': self.master_addresses
-        })
+        # the cluster's nodegroups. The node counts are read from the
+        # summary columns of the cluster row unless one of its nodegroups
+        # was changed through this object, and the nodegroups are queried
+        # at most once for the addresses.
+        with self.preload_nodegroups():
+            if self._node_counts is not None:
+                node_count, master_count = self._node_counts
+            else:
+                node_count, master_count = self.node_count, self.master_count
+            dict_.update({
+                'node_count': node_count,
+                'master_count': master_count,
+                'node_addresses': self.node_addresses,
+                'master_addresses': self.master_addresses
+            })
         return dict_
@@ -10,15 +10,75 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import datetime
+import threading
+
 from oslo_utils import strutils
+from oslo_utils import timeutils
 from oslo_utils import uuidutils
 from oslo_versionedobjects import fields
 
+from magnum.common import cache
 from magnum.common import exception
+import magnum.conf
 from magnum.db import api as dbapi
 from magnum.objects import base
 from magnum.objects import fields as m_fields
 
+CONF = magnum.conf.CONF
+
+# Templates changed less than this many seconds before they were loaded are
+# not cached: the database may store timestamps with a one second precision,
+# so a later update within the same second would not change their version.
+_SETTLE_SECONDS = 1
+
+
+class _ClusterTemplateCache(object):
+    """Process-wide cache of ClusterTemplate objects keyed by uuid.
+
+    Every invalidation bumps a generation counter. A template loaded from the
+    database is only stored if no invalidation happened since the load
+    started, so a concurrent update or delete is never overwritten by the
+    older row. Changes made by other processes are not invalidated here, the
+    callers check the timestamps of cached templates against the database.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self._templates = cache.TTLCache(maxsize, ttl)
+        self._lock = threading.Lock()
+        self.generation = 0
+
+    def get(self, uuid):
+        return self._templates.get(uuid)
+
+    def set(self, cluster_template, generation):
+        with self._lock:
+            if generation == self.generation:
+                self._templates.set(cluster_template.uuid, cluster_template)
+
+    def invalidate(self, uuid):
+        with self._lock:
+            self.generation += 1
+            self._templates.pop(uuid)
+
+
+_CACHE = None
+
+
+def _version(created_at, updated_at):
+    return tuple(timeutils.normalize_time(timestamp) if timestamp else None
+                 for timestamp in (created_at, updated_at))
+
+
+def _get_cache():
+    global _CACHE
+    if not CONF.cluster_template.cache_size:
+        return None
+    if _CACHE is None:
+        _CACHE = _ClusterTemplateCache(CONF.cluster_template.cache_size,
+                                       CONF.cluster_template.cache_ttl)
+    return _CACHE
+
 
 @base.MagnumObjectRegistry.register
 class ClusterTemplate(base.MagnumPersistentObject, base.MagnumObject,
@@ -43,7 +103,8 @@ class ClusterTemplate(base.MagnumPersistentObject, base.MagnumObject,
     # Version 1.17: 'coe' field type change to ClusterTypeField
     # Version 1.18: DockerStorageDriver is a StringField (was an Enum)
     # Version 1.19: Added 'hidden' field
-    VERSION = '1.19'
+    # Version 1.20: Added list_by_uuids method
+    VERSION = '1.20'
 
     dbapi = dbapi.get_instance()
 
@@ -97,6 +158,67 @@ class ClusterTemplate(base.MagnumPersistentObject, base.MagnumObject,
         return [ClusterTemplate._from_db_object(cls(context), obj) for obj in
                 db_objects]
 
+    @staticmethod
+    def _get_cached(context, uuids):
+        """Return copies of the cached templates that are still current.
+
+        The cache is shared by all the requests of this process but the
+        templates may be updated, deleted or made private by other processes.
+        A single query reads the timestamps of the cached templates visible
+        to the context, and only the templates whose timestamps did not change
+        are returned.
+
+        :returns: a dict mapping uuids to :class:`ClusterTemplate` objects.
+        """
+        template_cache = _get_cache()
+        if template_cache is None:
+            return {}
+        cached = {}
+        for uuid in uuids:
+            cluster_template = template_cache.get(uuid)
+            if cluster_template is not None:
+                cached[uuid] = cluster_template
+        if not cached:
+            return {}
+
+        versions = ClusterTemplate.dbapi.get_cluster_template_versions(
+            context, list(cached))
+        current = {}
+        for uuid, cluster_template in cached.items():
+            version = versions.get(uuid)
+            if version is None or _version(*version) != _version(
+                    cluster_template.created_at, cluster_template.updated_at):
+                continue
+            cluster_template = cluster_template.obj_clone()
+            cluster_template._context = context
+            current[uuid] = cluster_template
+        return current
+
+    @staticmethod
+    def _cache(cluster_templates, generation, loaded_at):
+        template_cache = _get_cache()
+        if template_cache is None:
+            return
+        settled = loaded_at - datetime.timedelta(seconds=_SETTLE_SECONDS)
+        for cluster_template in cluster_templates:
+            created_at, updated_at = _version(cluster_template.created_at,
+                                              cluster_template.updated_at)
+            changed_at = updated_at or created_at
+            if changed_at is not None and changed_at >= settled:
+                continue
+            template_cache.set(cluster_template.obj_clone(), generation)
+
+    @staticmethod
+    def _invalidate(uuid):
+        template_cache = _get_cache()
+        if template_cache is not None:
+            template_cache.invalidate(uuid)
+
+    @staticmethod
+    def _generation():
+        template_cache = _get_cache()
+        return template_cache.generation if template_cache else None
+
     @base.remotable_classmethod
     def get(cls, context, cluster_template_id):
         """Find and return ClusterTemplate object based on its id or uuid.
@@ -134,10 +256,17 @@ class ClusterTemplate(base.MagnumPersistentObject, base.MagnumObject,
         :param context: Security context
         :returns: a :class:`ClusterTemplate` object.
         """
+        cached = ClusterTemplate._get_cached(context, [uuid])
+        if uuid in cached:
+            return cached[uuid]
+
+        generation = ClusterTemplate._generation()
+        loaded_at = timeutils.utcnow()
         db_cluster_template = cls.dbapi.get_cluster_template_by_uuid(
             context, uuid)
         cluster_template = ClusterTemplate._from_db_object(cls(context),
                                                            db_cluster_template)
+        ClusterTemplate._cache([cluster_template], generation, loaded_at)
         return cluster_template
 
     @base.remotable_classmethod
@@ -173,6 +302,31 @@ class ClusterTemplate(base.MagnumPersistentObject, base.MagnumObject,
         return ClusterTemplate._from_db_object_list(db_cluster_templates,
                                                     cls, context)
 
+    @base.remotable_classmethod
+    def list_by_uuids(cls, context, uuids):
+        """Return the ClusterTemplate objects matching a list of uuids.
+
+        :param context: Security context.
+        :param uuids: the uuids of the ClusterTemplates.
+        :returns: a list of :class:`ClusterTemplate` object, uuids that
+                  are not found are skipped.
+
+        """
+        cached = ClusterTemplate._get_cached(context, uuids)
+        cluster_templates = list(cached.values())
+        missing = [uuid for uuid in uuids if uuid not in cached]
+        if not missing:
+            return cluster_templates
+
+        generation = ClusterTemplate._generation()
+        loaded_at = timeutils.utcnow()
+        db_cluster_templates = cls.dbapi.get_cluster_templates_by_uuids(
+            context, missing)
+        loaded = ClusterTemplate._from_db_object_list(db_cluster_templates,
+                                                      cls, context)
+        ClusterTemplate._cache(loaded, generation, loaded_at)
+        return cluster_templates + loaded
+
     @base.remotable
     def create(self, context=None):
         """Create a ClusterTemplate record in the DB.
@@ -201,6 +355,7 @@ class ClusterTemplate(base.MagnumPersistentObject, base.MagnumObject,
                         object, e.g.: ClusterTemplate(context)
         """
         self.dbapi.destroy_cluster_template(self.uuid)
+        self._invalidate(self.uuid)
         self.obj_reset_changes()
 
     @base.remotable
@@ -219,6 +374,7 @@ class ClusterTemplate(base.MagnumPersistentObject, base.MagnumObject,
         """
         updates = self.obj_get_changes()
         self.dbapi.update_cluster_template(self.uuid, updates)
+        self._invalidate(self.uuid)
 
         self.obj_reset_changes()
 
@@ -237,7 +393,9 @@ class ClusterTemplate(base.MagnumPersistentObject, base.MagnumObject,
                         A context should be set when instantiating the
                         object, e.g.: ClusterTemplate(context)
         """
-        current = self.__class__.get_by_uuid(self._context, uuid=self.uuid)
+        current = ClusterTemplate._from_db_object(
+            self.__class__(self._context),
+            self.dbapi.get_cluster_template_by_uuid(self._context, self.uuid))
         for field in self.fields:
             if self.obj_attr_is_set(field) and self[field] != current[field]:
                 self[field] = current[field]
@@ -13,6 +13,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import weakref
+
 from oslo_utils import strutils
 from oslo_utils import uuidutils
 from oslo_versionedobjects import fields
@@ -26,8 +28,9 @@ from magnum.objects import fields as m_fields
 class NodeGroup(base.MagnumPersistentObject, base.MagnumObject,
                 base.MagnumObjectDictCompat):
     # Version 1.0: Initial version
+    # Version 1.1: Added list_for_clusters method
 
-    VERSION = '1.0'
+    VERSION = '1.1'
 
     dbapi = dbapi.get_instance()
 
@@ -53,6 +56,18 @@ class NodeGroup(base.MagnumPersistentObject, base.MagnumObject,
         'version': fields.StringField(nullable=True),
     }
 
+    # Weak reference to the Cluster object this nodegroup was loaded
+    # through, told when the node counts of the nodegroup change.
+    _cluster_ref = None
+
+    def _set_cluster(self, cluster):
+        self._cluster_ref = weakref.ref(cluster)
+
+    def _node_counts_changed(self):
+        cluster = self._cluster_ref() if self._cluster_ref else None
+        if cluster is not None:
+            cluster.nodegroups_changed()
+
     @staticmethod
     def _from_db_object(nodegroup, db_nodegroup):
         """Converts a database entity to a formal object."""
@@ -155,6 +170,19 @@ class NodeGroup(base.MagnumPersistentObject, base.MagnumObject,
             sort_dir=sort_dir, filters=filters)
         return NodeGroup._from_db_object_list(db_nodegroups, cls, context)
 
+    @base.remotable_classmethod
+    def list_for_clusters(cls, context, cluster_ids):
+        """Return the NodeGroup objects of several clusters.
+
+        :param context: Security context.
+        :param cluster_ids: The uuids of the clusters.
+        :returns: a list of :class:`NodeGroup` objects, ordered by id.
+
+        """
+        db_nodegroups = cls.dbapi.list_nodegroups_for_clusters(context,
+                                                               cluster_ids)
+        return NodeGroup._from_db_object_list(db_nodegroups, cls, context)
+
     @base.remotable
     def create(self, context=None):
         """Create a nodegroup record in the DB.
@@ -173,6 +201,7 @@ class NodeGroup(base.MagnumPersistentObject, base.MagnumObject,
         """
         self.dbapi.destroy_nodegroup(self.cluster_id, self.uuid)
         self.obj_reset_changes()
+        self._node_counts_changed()
 
     @base.remotable
     def save(self, context=None):
@@ -187,6 +216,8 @@ class NodeGroup(base.MagnumPersistentObject, base.MagnumObject,
         self.dbapi.update_nodegroup(self.cluster_id, self.uuid, updates)
 
         self.obj_reset_changes()
+        if 'node_count' in updates or 'role' in updates:
+            self._node_counts_changed()
 
     @base.remotable
     def refresh(self, context=None):
@@ -0,0 +1,105 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Cluster status updates driven by Heat notifications."""
+
+from oslo_log import log
+import oslo_messaging as messaging
+
+from magnum.common import context
+from magnum.common import exception
+import magnum.conf
+from magnum import objects
+
+
+CONF = magnum.conf.CONF
+LOG = log.getLogger(__name__)
+
+IN_PROGRESS_STATUSES = (
+    objects.fields.ClusterStatus.CREATE_IN_PROGRESS,
+    objects.fields.ClusterStatus.UPDATE_IN_PROGRESS,
+    objects.fields.ClusterStatus.DELETE_IN_PROGRESS,
+    objects.fields.ClusterStatus.ROLLBACK_IN_PROGRESS,
+)
+
+
+def _get_stack_id(payload):
+    # Heat reports the stack either by id or by its ARN, which ends with
+    # "stacks/<name>/<id>".
+    stack_identity = payload.get('stack_identity') or payload.get('stack_id')
+    if not stack_identity:
+        return None
+    return stack_identity.rstrip('/').rsplit('/', 1)[-1]
+
+
+class HeatNotificationEndpoint(object):
+    """Sync a cluster as soon as one of its stacks finishes an action."""
+
+    filter_rule = messaging.NotificationFilter(
+        event_type=r'^orchestration\.stack\.[^.]+\.(end|error)$')
+
+    def __init__(self, periodic_tasks):
+        self.periodic_tasks = periodic_tasks
+
+    def info(self, ctxt, publisher_id, event_type, payload, metadata):
+        self._sync_cluster(event_type, payload)
+
+    def error(self, ctxt, publisher_id, event_type, payload, metadata):
+        self._sync_cluster(event_type, payload)
+
+    def _sync_cluster(self, event_type, payload):
+        stack_id = _get_stack_id(payload)
+        if stack_id is None:
+            return
+
+        ctx = context.make_admin_context(all_tenants=True)
+        try:
+            cluster = objects.Cluster.get_by_stack_id(ctx, stack_id)
+        except exception.ClusterNotFound:
+            # Nested stacks and stacks not created by magnum.
+            return
+        except Exception as e:
+            LOG.warning("Ignore error [%s] when looking up the cluster of "
+                        "stack %s.", e, stack_id, exc_info=True)
+            return
+
+        if cluster.status not in IN_PROGRESS_STATUSES:
+            return
+
+        # Each notification reaches a single conductor of the pool, which
+        # syncs the cluster even if another conductor owns it on the hash
+        # ring with [periodic]shard_clusters. A sync already in flight for
+        # the cluster on this conductor is not started twice.
+        LOG.debug("Received %(event)s for stack %(stack)s, syncing status "
+                  "of cluster %(cluster)s",
+                  {'event': event_type, 'stack': stack_id,
+                   'cluster': cluster.uuid})
+        self.periodic_tasks.submit_status_sync(ctx, cluster)
+
+
+def get_listener(periodic_tasks, transport=None):
+    """Return a notification listener for the Heat stack events.
+
+    :param periodic_tasks: the :class:`MagnumPeriodicTasks` running in this
+                           conductor, used to schedule the status syncs.
+    :param transport: the notification transport, defaults to the one
+                      configured for oslo.messaging notifications.
+    """
+    if transport is None:
+        transport = messaging.get_notification_transport(CONF)
+    pool = CONF.cluster_heat.notification_pool
+    exchange = CONF.cluster_heat.notification_exchange
+    targets = [messaging.Target(topic=topic, exchange=exchange)
+               for topic in CONF.cluster_heat.notification_topics]
+    endpoints = [HeatNotificationEndpoint(periodic_tasks)]
+    return messaging.get_notification_listener(
+        transport, targets, endpoints, executor='eventlet', pool=pool)
@@ -13,18 +13,28 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import datetime
 import functools
 
+from eventlet import timeout as eventlet_timeout
 from oslo_log import log
 from oslo_log.versionutils import deprecated
+from oslo_reports import guru_meditation_report as gmr
+from oslo_reports.models import with_default_views
+from oslo_reports.views.text import generic as generic_views
 from oslo_service import loopingcall
 from oslo_service import periodic_task
+from oslo_utils import timeutils
 
 from pycadf import cadftaxonomy as taxonomy
 
+from magnum.api import servicegroup
 from magnum.common import context
+from magnum.common import hash_ring
 from magnum.common import profiler
 from magnum.common import rpc
+from magnum.common.x509 import executor as x509_executor
+from magnum.conductor.handlers.common import cert_manager
 from magnum.conductor import monitors
 from magnum.conductor import utils as conductor_utils
 import magnum.conf
@@ -46,6 +56,150 @@ def set_context(func):
     return handler
 
 
+class ClusterSyncScheduler(object):
+    """Bounded scheduler for per-cluster periodic sync jobs.
+
+    Runs at most ``[periodic]sync_pool_size`` jobs at the same time and never
+    more than one job per cluster. Every job is bounded by
+    ``[periodic]sync_job_timeout``. When a cluster is submitted while its
+    previous job is still in flight, it is either skipped or coalesced into a
+    single follow-up run, depending on ``[periodic]sync_overlap_policy``.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        # cluster uuid -> job callable, for the jobs currently in flight
+        self._running = {}
+        # cluster uuid -> job callable, to be run once the in-flight job for
+        # the same cluster is done (coalesce policy only)
+        self._pending = {}
+
+    @property
+    def running(self):
+        return len(self._running)
+
+    def is_running(self, cluster_uuid):
+        return cluster_uuid in self._running
+
+    def submit(self, cluster_uuid, func):
+        """Schedule func for a cluster, returns True if it was started."""
+        if cluster_uuid in self._running:
+            if CONF.periodic.sync_overlap_policy == 'coalesce':
+                self._pending[cluster_uuid] = func
+                LOG.debug("%s: coalescing sync of cluster %s into its "
+                          "in-flight job", self.name, cluster_uuid)
+            else:
+                LOG.debug("%s: skipping cluster %s, previous sync still "
+                          "in flight", self.name, cluster_uuid)
+            return False
+
+        pool_size = CONF.periodic.sync_pool_size
+        if pool_size and len(self._running) >= pool_size:
+            LOG.debug("%s: pool is full (%d jobs), deferring cluster %s",
+                      self.name, pool_size, cluster_uuid)
+            return False
+
+        self._start(cluster_uuid, func)
+        return True
+
+    def _start(self, cluster_uuid, func):
+        self._running[cluster_uuid] = func
+
+        def _run():
+            try:
+                with eventlet_timeout.Timeout(
+                        CONF.periodic.sync_job_timeout or None):
+                    func()
+            except eventlet_timeout.Timeout:
+                LOG.warning("%s: sync of cluster %s exceeded %s seconds, "
+                            "cancelling it", self.name, cluster_uuid,
+                            CONF.periodic.sync_job_timeout)
+                raise loopingcall.LoopingCallDone()
+            finally:
+                self._finish(cluster_uuid)
+
+        # though this call isn't really looping, we use this abstraction
+        # anyway to avoid dealing directly with eventlet hooey
+        lc = loopingcall.FixedIntervalLoopingCall(f=_run)
+        lc.start(1, stop_on_exception=True)
+
+    def _finish(self, cluster_uuid):
+        self._running.pop(cluster_uuid, None)
+        func = self._pending.pop(cluster_uuid, None)
+        if func is not None:
+            self._start(cluster_uuid, func)
+
+
+class ClusterPollSchedule(object):
+    """Adaptive per-cluster poll intervals for a periodic sync task.
+
+    A cluster is polled every ``base_interval`` seconds while it changes or
+    is in an *_IN_PROGRESS status. Otherwise each poll that finds its status,
+    health status and health status reason unchanged doubles its interval,
+    up to ``[periodic]poll_max_interval``. Any change resets the interval,
+    which also covers API actions since they move the cluster to an
+    *_IN_PROGRESS status. When the Heat notification listener is enabled,
+    the end of an operation is reported by Heat, so *_IN_PROGRESS clusters
+    back off as well and the poll only reconciles missed notifications.
+    """
+
+    def __init__(self, name, base_interval):
+        self.name = name
+        self.base_interval = base_interval
+        # cluster uuid -> dict(fingerprint, interval, next_poll)
+        self._states = {}
+
+    @staticmethod
+    def fingerprint(cluster):
+        return (cluster.status, cluster.health_status,
+                cluster.health_status_reason)
+
+    def is_due(self, cluster, now=None):
+        state = self._states.get(cluster.uuid)
+        if state is None or state['fingerprint'] != self.fingerprint(cluster):
+            return True
+        return (now or timeutils.utcnow()) >= state['next_poll']
+
+    def polled(self, cluster_uuid, fingerprint, now=None):
+        """Record that a poll of the cluster was just started.
+
+        :param fingerprint: the fingerprint of the cluster taken before the
+                            poll, as the poll itself may update the cluster.
+        """
+        state = self._states.get(cluster_uuid)
+        status = fingerprint[0]
+        # Without Heat notifications, the end of an operation is only
+        # reported as soon as possible by polling at the base interval.
+        in_progress = (status and status.endswith('_IN_PROGRESS') and
+                       not CONF.cluster_heat.enable_notification_listener)
+        if (state is None or state['fingerprint'] != fingerprint or
+                in_progress):
+            interval = self.base_interval
+        else:
+            interval = min(state['interval'] * 2,
+                           max(CONF.periodic.poll_max_interval,
+                               self.base_interval))
+        next_poll = ((now or timeutils.utcnow()) +
+                     datetime.timedelta(seconds=interval))
+        self._states[cluster_uuid] = {'fingerprint': fingerprint,
+                                      'interval': interval,
+                                      'next_poll': next_poll}
+        LOG.debug("%s: next poll of cluster %s in %d seconds",
+                  self.name, cluster_uuid, interval)
+
+    def prune(self, clusters):
+        """Forget the clusters that are no longer handled by the task."""
+        uuids = set(cluster.uuid for cluster in clusters)
+        for cluster_uuid in list(self._states):
+            if cluster_uuid not in uuids:
+                del self._states[cluster_uuid]
+
+    def get_state(self):
+        return {cluster_uuid: {'interval': state['interval'],
+                               'next_poll': state['next_poll'].isoformat()}
+                for cluster_uuid, state in self._states.items()}
+
+
 class ClusterUpdateJob(object):
 
     status_to_event = {
@@ -151,6 +305,63 @@ class MagnumPeriodicTasks(periodic_task.PeriodicTasks):
     def __init__(self, conf):
         super(MagnumPeriodicTasks, self).__init__(conf)
         self.notifier = rpc.get_notifier()
+        self.status_scheduler = ClusterSyncScheduler('sync_cluster_status')
+        self.health_scheduler = ClusterSyncScheduler(
+            'sync_cluster_health_status')
+        self.servicegroup_api = servicegroup.ServiceGroup()
+        self.status_schedule = ClusterPollSchedule('sync_cluster_status', 10)
+        self.health_schedule = ClusterPollSchedule(
+            'sync_cluster_health_status', 10)
+
+    def get_poll_report(self):
+        """Guru Meditation Report section with the cluster poll schedules."""
+        return with_default_views.ModelWithDefaultViews(
+            {self.status_schedule.name: self.status_schedule.get_state(),
+             self.health_schedule.name: self.health_schedule.get_state()},
+            text_view=generic_views.KeyValueView())
+
+    def _get_conductor_ring(self, ctx):
+        """Build the hash ring of the magnum-conductors that are up.
+
+        The ring is rebuilt on every run, so clusters owned by a conductor
+        whose heartbeat went stale are taken over by the remaining ones.
+        """
+        hosts = set([CONF.host])
+        for service in objects.MagnumService.list(ctx):
+            if (service.binary == 'magnum-conductor' and
+                    not service.disabled and
+                    self.servicegroup_api.service_is_up(service)):
+                hosts.add(service.host)
+        return hash_ring.HashRing(hosts, CONF.periodic.hash_ring_replicas)
+
+    @staticmethod
+    def _is_owner(ring, cluster):
+        return ring.get_member(cluster.uuid) == CONF.host
+
+    def _get_own_clusters(self, ctx, clusters):
+        """Return the clusters this conductor is responsible for."""
+        if not CONF.periodic.shard_clusters or not clusters:
+            return clusters
+        ring = self._get_conductor_ring(ctx)
+        own = [cluster for cluster in clusters
+               if self._is_owner(ring, cluster)]
+        LOG.debug('Conductor %(host)s owns %(own)d of %(total)d clusters '
+                  'on a ring of %(members)d conductors',
+                  {'host': CONF.host, 'own': len(own),
+                   'total': len(clusters), 'members': len(ring.members)})
+        return own
+
+    def submit_status_sync(self, ctx, cluster):
+        """Schedule a status sync of the cluster, regardless of its interval.
+
+        :returns: True if the sync was started.
+        """
+        fingerprint = self.status_schedule.fingerprint(cluster)
+        job = ClusterUpdateJob(ctx, cluster)
+        if not self.status_scheduler.submit(cluster.uuid, job.update_status):
+            return False
+        self.status_schedule.polled(cluster.uuid, fingerprint)
+        return True
 
     @periodic_task.periodic_task(spacing=10, run_immediately=True)
     @set_context
@@ -164,18 +375,16 @@ class MagnumPeriodicTasks(periodic_task.PeriodicTasks):
                       objects.fields.ClusterStatus.DELETE_IN_PROGRESS,
                       objects.fields.ClusterStatus.ROLLBACK_IN_PROGRESS]
             filters = {'status': status}
-            clusters = objects.Cluster.list(ctx, filters=filters)
+            clusters = self._get_own_clusters(
+                ctx, objects.Cluster.list(ctx, filters=filters))
+            self.status_schedule.prune(clusters)
             if not clusters:
                 return
 
             # synchronize with underlying orchestration
             for cluster in clusters:
-                job = ClusterUpdateJob(ctx, cluster)
-                # though this call isn't really looping, we use this
-                # abstraction anyway to avoid dealing directly with eventlet
-                # hooey
-                lc = loopingcall.FixedIntervalLoopingCall(f=job.update_status)
-                lc.start(1, stop_on_exception=True)
+                if self.status_schedule.is_due(cluster):
+                    self.submit_status_sync(ctx, cluster)
 
         except Exception as e:
             LOG.warning(
@@ -193,19 +402,21 @@ class MagnumPeriodicTasks(periodic_task.PeriodicTasks):
                       objects.fields.ClusterStatus.UPDATE_IN_PROGRESS,
                       objects.fields.ClusterStatus.ROLLBACK_IN_PROGRESS]
             filters = {'status': status}
-            clusters = objects.Cluster.list(ctx, filters=filters)
+            clusters = self._get_own_clusters(
+                ctx, objects.Cluster.list(ctx, filters=filters))
+            self.health_schedule.prune(clusters)
             if not clusters:
                 return
 
             # synchronize using native COE API
             for cluster in clusters:
+                if not self.health_schedule.is_due(cluster):
+                    continue
+                fingerprint = self.health_schedule.fingerprint(cluster)
                 job = ClusterHealthUpdateJob(ctx, cluster)
-                # though this call isn't really looping, we use this
-                # abstraction anyway to avoid dealing directly with eventlet
-                # hooey
-                lc = loopingcall.FixedIntervalLoopingCall(
-                    f=job.update_health_status)
-                lc.start(1, stop_on_exception=True)
+                if self.health_scheduler.submit(cluster.uuid,
+                                                job.update_health_status):
+                    self.health_schedule.polled(cluster.uuid, fingerprint)
 
         except Exception as e:
             LOG.warning(
@@ -263,9 +474,30 @@ class MagnumPeriodicTasks(periodic_task.PeriodicTasks):
                                message)
 
 
+def get_cert_cache_report():
+    """Guru Meditation Report section with the certificate cache counters."""
+    return with_default_views.ModelWithDefaultViews(
+        cert_manager.get_cert_cache_stats(),
+        text_view=generic_views.KeyValueView())
+
+
+def get_x509_report():
+    """Guru Meditation Report section with the x509 operations queue."""
+    return with_default_views.ModelWithDefaultViews(
+        x509_executor.get_stats(),
+        text_view=generic_views.KeyValueView())
+
+
 def setup(conf, tg):
     pt = MagnumPeriodicTasks(conf)
+    gmr.TextGuruMeditation.register_section('Cluster Poll Schedule',
+                                            pt.get_poll_report)
+    gmr.TextGuruMeditation.register_section('Certificate Cache',
+                                            get_cert_cache_report)
+    gmr.TextGuruMeditation.register_section('X509 Operations',
+                                            get_x509_report)
     tg.add_dynamic_timer(
         pt.run_periodic_tasks,
         periodic_interval_max=conf.periodic_interval_max,
         context=None)
+    return pt
@@ -25,9 +25,15 @@ from oslotest import base
 import pecan
 import testscenarios
 
+from magnum.api import attr_validator
+from magnum.common import capabilities
+from magnum.common import clients
 from magnum.common import context as magnum_context
 from magnum.common import keystone as magnum_keystone
+from magnum.conductor.handlers.common import cert_manager
+from magnum.drivers.heat import template_cache
 from magnum.objects import base as objects_base
+from magnum.objects import cluster_template
 from magnum.tests import conf_fixture
 from magnum.tests import fake_notifier
 from magnum.tests import output_fixture
@@ -120,6 +126,14 @@ class TestCase(base.BaseTestCase):
         self.addCleanup(q.stop)
 
         self.useFixture(conf_fixture.ConfFixture())
+        attr_validator._CACHE = None
+        capabilities.REGISTRY.clear()
+        clients._CLIENTS = None
+        clients._ENDPOINTS = None
+        magnum_keystone._DOMAIN_ADMIN = None
+        cluster_template._CACHE = None
+        cert_manager._CERT_CACHE = None
+        template_cache.clear()
         self.useFixture(fixtures.NestedTempfile())
 
         self._base_test_obj_backup = copy.copy(
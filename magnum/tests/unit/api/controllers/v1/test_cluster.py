@@ -165,6 +165,24 @@ class TestListCluster(api_base.FunctionalTest):
         self.assertEqual(cluster_list[-1].uuid,
                          response['clusters'][0]['uuid'])
 
+    def test_get_all_sorted_by_node_count_with_marker(self):
+        cluster_list = []
+        for id_, node_count in enumerate((4, 2, 3, 1)):
+            cluster = obj_utils.create_test_cluster(
+                self.context, id=id_, uuid=uuidutils.generate_uuid(),
+                node_count=node_count)
+            cluster_list.append(cluster)
+
+        response = self.get_json('/clusters?sort_key=node_count&limit=2')
+        self.assertEqual([cluster_list[3].uuid, cluster_list[1].uuid],
+                         [c['uuid'] for c in response['clusters']])
+
+        response = self.get_json(
+            '/clusters?sort_key=node_count&limit=2&marker=%s'
+            % cluster_list[1].uuid)
+        self.assertEqual([cluster_list[2].uuid, cluster_list[0].uuid],
+                         [c['uuid'] for c in response['clusters']])
+
     @mock.patch("magnum.common.policy.enforce")
     @mock.patch("magnum.common.context.make_context")
     def test_get_all_with_all_projects(self, mock_context, mock_policy):
@@ -294,6 +294,7 @@ class TestPost(api_base.FunctionalTest):
 
     @mock.patch('oslo_utils.timeutils.utcnow')
     def test_create_master_ng(self, mock_utcnow):
+        mock_utcnow.return_value = datetime.datetime(2000, 1, 1, 0, 0)
         ng_dict = apiutils.nodegroup_post_data(role='master')
         response = self.post_json(self.url, ng_dict, expect_errors=True)
         self.assertEqual('application/json', response.content_type)
@@ -301,6 +302,7 @@ class TestPost(api_base.FunctionalTest):
 
     @mock.patch('oslo_utils.timeutils.utcnow')
     def test_create_ng_same_name(self, mock_utcnow):
+        mock_utcnow.return_value = datetime.datetime(2000, 1, 1, 0, 0)
         existing_name = self.cluster.default_ng_master.name
         ng_dict = apiutils.nodegroup_post_data(name=existing_name)
         response = self.post_json(self.url, ng_dict, expect_errors=True)
@@ -16,10 +16,12 @@
 from glanceclient import exc as glance_exception
 import mock
 from novaclient import exceptions as nova_exc
+from oslo_config import cfg
 
 from magnum.api import attr_validator
 from magnum.common import exception
 from magnum.tests import base
+from magnum.tests import conf_fixture
 
 
 class TestAttrValidator(base.BaseTestCase):
@@ -30,12 +32,21 @@ class TestAttrValidator(base.BaseTestCase):
         mock_flavor.id = 'test_flavor_id'
         mock_flavors = [mock_flavor]
         mock_nova = mock.MagicMock()
+        mock_nova.flavors.get.side_effect = nova_exc.NotFound('test_flavor')
         mock_nova.flavors.list.return_value = mock_flavors
         mock_os_cli = mock.MagicMock()
         mock_os_cli.nova.return_value = mock_nova
         attr_validator.validate_flavor(mock_os_cli, 'test_flavor')
         self.assertTrue(mock_nova.flavors.list.called)
 
+    def test_validate_flavor_with_flavor_id(self):
+        mock_nova = mock.MagicMock()
+        mock_os_cli = mock.MagicMock()
+        mock_os_cli.nova.return_value = mock_nova
+        attr_validator.validate_flavor(mock_os_cli, 'test_flavor_id')
+        mock_nova.flavors.get.assert_called_once_with('test_flavor_id')
+        self.assertFalse(mock_nova.flavors.list.called)
+
     def test_validate_flavor_with_none_flavor(self):
         mock_flavor = mock.MagicMock()
         mock_flavor.name = 'test_flavor'
@@ -54,6 +65,7 @@ class TestAttrValidator(base.BaseTestCase):
         mock_flavor.id = 'test_flavor_id_not_equal'
         mock_flavors = [mock_flavor]
         mock_nova = mock.MagicMock()
+        mock_nova.flavors.get.side_effect = nova_exc.NotFound('test_flavor')
         mock_nova.flavors.list.return_value = mock_flavors
         mock_os_cli = mock.MagicMock()
         mock_os_cli.nova.return_value = mock_nova
@@ -295,8 +307,9 @@ class TestAttrValidator(base.BaseTestCase):
         mock_flavor.id = 'test_flavor_id_not_equal'
         mock_flavors = [mock_flavor]
         mock_nova = mock.MagicMock()
+        mock_nova.flavors.get.side_effect = nova_exc.NotFound('test_flavor')
         mock_nova.flavors.list.return_value = mock_flavors
-        mock_os_cli.nova.return_value = mock_nova
+        mock_os_cli.return_value.nova.return_value = mock_nova
         mock_context = mock.MagicMock()
         self.assertRaises(exception.FlavorNotFound,
                           attr_validator.validate_os_resources,
@@ -342,3 +355,70 @@ class TestAttrValidator(base.BaseTestCase):
         attr_validator.validate_os_resources(mock_context,
                                              mock_cluster_template,
                                              mock_cluster)
+
+    def test_validate_keypair_cached(self):
+        mock_nova = mock.MagicMock()
+        mock_os_cli = mock.MagicMock()
+        mock_os_cli.nova.return_value = mock_nova
+        attr_validator.validate_keypair(mock_os_cli, 'test-keypair')
+        attr_validator.validate_keypair(mock_os_cli, 'test-keypair')
+        mock_nova.keypairs.get.assert_called_once_with('test-keypair')
+
+        # Other users don't share the keypairs.
+        mock_os_cli.context.user_id = 'other_user'
+        attr_validator.validate_keypair(mock_os_cli, 'test-keypair')
+        self.assertEqual(2, mock_nova.keypairs.get.call_count)
+
+    def test_validate_external_network_not_found_cached(self):
+        mock_neutron = mock.MagicMock()
+        mock_neutron.list_networks.return_value = {'networks': []}
+        mock_os_cli = mock.MagicMock()
+        mock_os_cli.neutron.return_value = mock_neutron
+        for i in range(2):
+            self.assertRaises(exception.ExternalNetworkNotFound,
+                              attr_validator.validate_external_network,
+                              mock_os_cli, 'test_ext_net')
+        mock_neutron.list_networks.assert_called_once_with(
+            **{'name': 'test_ext_net', 'router:external': True})
+
+    def test_validate_external_network_by_id(self):
+        net_id = 'e33f0988-1730-405e-8401-30cbc8535302'
+        mock_neutron = mock.MagicMock()
+        mock_neutron.list_networks.return_value = {
+            'networks': [{'name': 'test_ext_net', 'id': net_id}]}
+        mock_os_cli = mock.MagicMock()
+        mock_os_cli.neutron.return_value = mock_neutron
+        attr_validator.validate_external_network(mock_os_cli, net_id)
+        mock_neutron.list_networks.assert_called_once_with(
+            **{'id': net_id, 'router:external': True})
+
+    def test_validate_image_cache_disabled(self):
+        self.useFixture(conf_fixture.ConfFixture())
+        cfg.CONF.set_override('validation_cache_size', 0, group='api')
+        mock_image = {'name': 'fedora-21-atomic-5',
+                      'id': 'e33f0988-1730-405e-8401-30cbc8535302',
+                      'os_distro': 'fedora-atomic'}
+        mock_os_cli = mock.MagicMock()
+        mock_os_cli.glance.return_value.images.get.return_value = mock_image
+        for i in range(2):
+            attr_validator.validate_image(
+                mock_os_cli, 'e33f0988-1730-405e-8401-30cbc8535302')
+        self.assertEqual(
+            2, mock_os_cli.glance.return_value.images.get.call_count)
+
+    @mock.patch('magnum.common.clients.OpenStackClients')
+    def test_validate_os_resources_first_error_raised(self, mock_os_cli):
+        mock_cluster_template = {'flavor_id': 'test_flavor',
+                                 'external_network_id': 'test_ext_net'}
+        mock_nova = mock.MagicMock()
+        mock_nova.flavors.get.side_effect = nova_exc.NotFound('test_flavor')
+        mock_nova.flavors.list.return_value = []
+        mock_os_cli.return_value.nova.return_value = mock_nova
+        mock_neutron = mock.MagicMock()
+        mock_neutron.list_networks.return_value = {'networks': []}
+        mock_os_cli.return_value.neutron.return_value = mock_neutron
+        self.assertRaises(exception.FlavorNotFound,
+                          attr_validator.validate_os_resources,
+                          mock.MagicMock(), mock_cluster_template)
+        # The other validations ran as well.
+        self.assertTrue(mock_neutron.list_networks.called)
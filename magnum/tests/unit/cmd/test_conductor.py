@@ -22,10 +22,12 @@ from magnum.tests import base
 
 class TestMagnumConductor(base.TestCase):
 
+    @mock.patch.object(conductor, 'template_cache')
     @mock.patch('oslo_service.service.launch')
     @mock.patch.object(conductor, 'rpc_service')
     @mock.patch('magnum.common.service.prepare_service')
-    def test_conductor(self, mock_prep, mock_rpc, mock_launch):
+    def test_conductor(self, mock_prep, mock_rpc, mock_launch,
+                       mock_template_cache):
         conductor.main()
 
         server = mock_rpc.Service.create.return_value
@@ -38,11 +40,14 @@ class TestMagnumConductor(base.TestCase):
         mock_launch.assert_called_once_with(base.CONF, server,
                                             workers=workers)
         launcher.wait.assert_called_once_with()
+        mock_template_cache.preload.assert_called_once_with()
 
+    @mock.patch.object(conductor, 'template_cache')
     @mock.patch('oslo_service.service.launch')
     @mock.patch.object(conductor, 'rpc_service')
     @mock.patch('magnum.common.service.prepare_service')
-    def test_conductor_config_workers(self, mock_prep, mock_rpc, mock_launch):
+    def test_conductor_config_workers(self, mock_prep, mock_rpc, mock_launch,
+                                      mock_template_cache):
         fake_workers = 8
         self.config(workers=fake_workers, group='conductor')
         conductor.main()
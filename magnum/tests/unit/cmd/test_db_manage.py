@@ -60,3 +60,40 @@ class TestMagnumDbManage(base.TestCase):
         mock_revision.assert_called_once_with(
             message='foo bar',
             autogenerate=base.CONF.command.autogenerate)
+
+    @mock.patch('magnum.db.api.get_instance')
+    @mock.patch('sys.argv', ['magnum-db-manage', 'check_node_counts'])
+    def test_db_manage_check_node_counts(self, mock_get_instance):
+        dbapi = mock_get_instance.return_value
+        dbapi.get_clusters_with_stale_node_counts.return_value = []
+        with mock.patch('sys.stdout', new=six.StringIO()) as fakeOutput:
+            db_manage.main()
+            self.assertEqual(
+                'The node counts of all clusters are consistent\n',
+                fakeOutput.getvalue())
+        self.assertFalse(dbapi.sync_cluster_node_counts.called)
+
+    @mock.patch('magnum.db.api.get_instance')
+    @mock.patch('sys.argv', ['magnum-db-manage', 'check_node_counts'])
+    def test_db_manage_check_node_counts_stale(self, mock_get_instance):
+        dbapi = mock_get_instance.return_value
+        dbapi.get_clusters_with_stale_node_counts.return_value = [
+            ('uuid1', 5, 1, 2, 1)]
+        with mock.patch('sys.stdout', new=six.StringIO()) as fakeOutput:
+            self.assertRaises(SystemExit, db_manage.main)
+            self.assertEqual(
+                'Cluster uuid1: node_count 5 (expected 2), master_count 1 '
+                '(expected 1)\n', fakeOutput.getvalue())
+        self.assertFalse(dbapi.sync_cluster_node_counts.called)
+
+    @mock.patch('magnum.db.api.get_instance')
+    @mock.patch('sys.argv', ['magnum-db-manage', 'check_node_counts',
+                             '--fix'])
+    def test_db_manage_check_node_counts_fix(self, mock_get_instance):
+        dbapi = mock_get_instance.return_value
+        dbapi.get_clusters_with_stale_node_counts.return_value = [
+            ('uuid1', 5, 1, 2, 1), ('uuid2', 0, 0, 3, 1)]
+        with mock.patch('sys.stdout', new=six.StringIO()):
+            db_manage.main()
+        dbapi.sync_cluster_node_counts.assert_called_once_with(
+            ['uuid1', 'uuid2'])
@@ -52,6 +52,7 @@ class TestMagnumDriverManage(base.TestCase):
         args = ['list-drivers', '-d', '-p']
         mock_driver.load_entry_points.return_value = self._fake_entry(1)
         driver_manage.main(args)
+        mock_driver.reload_drivers.assert_called_once_with()
         mock_driver.load_entry_points.assert_called_once_with()
         mock_produce.assert_called_once_with(mock.ANY, mock.ANY,
                                              [('magnum_test_foo_bar',
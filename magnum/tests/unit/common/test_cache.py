@@ -0,0 +1,85 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import mock
+
+from magnum.common import cache
+from magnum.tests import base
+
+
+@mock.patch('oslo_utils.timeutils.utcnow_ts')
+class TTLCacheTestCase(base.BaseTestCase):
+
+    def test_get_set(self, mock_now):
+        mock_now.return_value = 0
+        c = cache.TTLCache(10, 60)
+        self.assertIsNone(c.get('a'))
+        c.set('a', 1)
+        self.assertEqual(1, c.get('a'))
+        self.assertEqual({'size': 1, 'maxsize': 10, 'hits': 1, 'misses': 1},
+                         c.get_stats())
+
+    def test_expiry(self, mock_now):
+        on_evict = mock.MagicMock()
+        c = cache.TTLCache(10, 60, on_evict=on_evict)
+        mock_now.return_value = 0
+        c.set('a', 1)
+        c.set('b', 2, ttl=120)
+        mock_now.return_value = 60
+        self.assertIsNone(c.get('a'))
+        self.assertEqual(2, c.get('b'))
+        on_evict.assert_called_once_with('a', 1)
+
+    def test_no_ttl(self, mock_now):
+        mock_now.return_value = 0
+        c = cache.TTLCache(10, 0)
+        c.set('a', 1)
+        mock_now.return_value = 10 ** 9
+        self.assertEqual(1, c.get('a'))
+
+    def test_lru_eviction(self, mock_now):
+        mock_now.return_value = 0
+        on_evict = mock.MagicMock()
+        c = cache.TTLCache(2, 60, on_evict=on_evict)
+        c.set('a', 1)
+        c.set('b', 2)
+        # 'a' becomes the most recently used entry
+        c.get('a')
+        c.set('c', 3)
+        self.assertEqual(2, len(c))
+        self.assertIsNone(c.get('b'))
+        self.assertEqual(1, c.get('a'))
+        self.assertEqual(3, c.get('c'))
+        on_evict.assert_called_once_with('b', 2)
+
+    def test_replace_calls_on_evict(self, mock_now):
+        mock_now.return_value = 0
+        on_evict = mock.MagicMock()
+        c = cache.TTLCache(2, 60, on_evict=on_evict)
+        c.set('a', 1)
+        c.set('a', 2)
+        on_evict.assert_called_once_with('a', 1)
+        self.assertEqual(2, c.get('a'))
+
+    def test_pop_and_clear(self, mock_now):
+        mock_now.return_value = 0
+        c = cache.TTLCache(10, 60)
+        c.set(('c1', 'x'), 1)
+        c.set(('c1', 'y'), 2)
+        c.set(('c2', 'x'), 3)
+        self.assertEqual(3, c.pop(('c2', 'x')))
+        self.assertIsNone(c.pop(('c2', 'x')))
+        self.assertEqual(2, c.pop_matching(lambda key: key[0] == 'c1'))
+        self.assertEqual(0, len(c))
+        c.set('a', 1)
+        c.clear()
+        self.assertIsNone(c.get('a'))
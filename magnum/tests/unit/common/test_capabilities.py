@@ -0,0 +1,106 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import mock
+from oslo_utils import timeutils
+
+from magnum.common import capabilities
+from magnum.common import exception
+from magnum.common import keystone
+from magnum.tests import base
+
+
+def _service(service_type, enabled=True):
+    return mock.Mock(type=service_type, enabled=enabled)
+
+
+@mock.patch('magnum.common.keystone.KeystoneClientV3')
+class ServiceRegistryTest(base.TestCase):
+
+    def setUp(self):
+        super(ServiceRegistryTest, self).setUp()
+        self.config(services_refresh_interval=60, group='keystone_auth')
+        self.registry = capabilities.ServiceRegistry()
+
+    def _set_services(self, mock_ks, *services):
+        mock_ks.return_value.client.services.list.return_value = list(
+            services)
+        return mock_ks.return_value.client.services.list
+
+    def test_is_enabled(self, mock_ks):
+        list_services = self._set_services(
+            mock_ks, _service('load-balancer'),
+            _service('key-manager', enabled=False), _service('volumev3'))
+
+        self.assertTrue(self.registry.is_enabled('octavia'))
+        self.assertFalse(self.registry.is_enabled('barbican'))
+        self.assertTrue(self.registry.is_enabled('cinder'))
+        list_services.assert_called_once_with()
+
+    def test_is_enabled_not_deployed(self, mock_ks):
+        self._set_services(mock_ks)
+
+        self.assertFalse(self.registry.is_enabled('octavia'))
+
+    def test_first_service_of_type_wins(self, mock_ks):
+        self._set_services(mock_ks, _service('load-balancer', enabled=False),
+                           _service('load-balancer'))
+
+        self.assertFalse(self.registry.is_enabled('octavia'))
+
+    @mock.patch.object(timeutils, 'utcnow_ts')
+    def test_refreshed_when_stale(self, mock_now, mock_ks):
+        mock_now.return_value = 1000
+        list_services = self._set_services(mock_ks,
+                                           _service('load-balancer'))
+        self.assertTrue(self.registry.is_enabled('octavia'))
+
+        mock_now.return_value = 1119
+        self.assertTrue(self.registry.is_enabled('octavia'))
+        self.assertEqual(1, list_services.call_count)
+
+        list_services.return_value = [_service('load-balancer', False)]
+        mock_now.return_value = 1120
+        self.assertFalse(self.registry.is_enabled('octavia'))
+        self.assertEqual(2, list_services.call_count)
+
+    @mock.patch.object(timeutils, 'utcnow_ts')
+    def test_stale_services_used_on_failure(self, mock_now, mock_ks):
+        mock_now.return_value = 1000
+        list_services = self._set_services(mock_ks,
+                                           _service('load-balancer'))
+        self.registry.refresh()
+
+        list_services.side_effect = Exception('boom')
+        mock_now.return_value = 2000
+        self.assertTrue(self.registry.is_enabled('octavia'))
+
+    def test_list_failure(self, mock_ks):
+        list_services = self._set_services(mock_ks)
+        list_services.side_effect = Exception('boom')
+
+        self.assertRaises(exception.ServicesListFailed,
+                          self.registry.is_enabled, 'octavia')
+
+    def test_is_octavia_enabled(self, mock_ks):
+        list_services = self._set_services(mock_ks,
+                                           _service('load-balancer'))
+
+        self.assertTrue(keystone.is_octavia_enabled())
+        self.assertTrue(keystone.is_octavia_enabled())
+        list_services.assert_called_once_with()
+
+    def test_setup(self, mock_ks):
+        tg = mock.Mock()
+        capabilities.setup(capabilities.CONF, tg)
+        tg.add_timer.assert_called_once_with(60, capabilities._refresh,
+                                             initial_delay=60)
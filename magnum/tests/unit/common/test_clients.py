@@ -10,17 +10,21 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import datetime
+
 from barbicanclient.v1 import client as barbicanclient
 from glanceclient import client as glanceclient
 from heatclient import client as heatclient
 import mock
 from neutronclient.v2_0 import client as neutronclient
 from novaclient import client as novaclient
+from oslo_utils import timeutils
 
 from magnum.common import clients
 from magnum.common import exception
 import magnum.conf
 from magnum.tests import base
+from magnum.tests import utils
 
 CONF = magnum.conf.CONF
 
@@ -29,6 +33,8 @@ class ClientsTest(base.BaseTestCase):
 
     def setUp(self):
         super(ClientsTest, self).setUp()
+        clients._CLIENTS = None
+        clients._ENDPOINTS = None
 
         CONF.set_override('auth_uri', 'http://server.test:5000/v2.0',
                           group='keystone_authtoken')
@@ -357,3 +363,121 @@ class ClientsTest(base.BaseTestCase):
         neutron = obj.neutron()
         neutron_cached = obj.neutron()
         self.assertEqual(neutron, neutron_cached)
+
+
+class SharedClientsTest(base.TestCase):
+
+    def setUp(self):
+        super(SharedClientsTest, self).setUp()
+        CONF.set_override('auth_uri', 'http://server.test:5000/v2.0',
+                          group='keystone_authtoken')
+
+    def _token_context(self, expires_in=3600):
+        ctx = utils.dummy_context()
+        ctx.auth_token = 'abcd1234'
+        token = {'methods': ['token'],
+                 'user': {'id': 'fake_user', 'name': 'fake_user',
+                          'domain': {'id': 'default', 'name': 'Default'}}}
+        if expires_in is not None:
+            expires_at = timeutils.utcnow() + datetime.timedelta(
+                seconds=expires_in)
+            token['expires_at'] = expires_at.strftime(
+                '%Y-%m-%dT%H:%M:%S.000000Z')
+        ctx.auth_token_info = {'token': token}
+        return ctx
+
+    @mock.patch.object(heatclient, 'Client')
+    @mock.patch.object(clients.OpenStackClients, 'url_for')
+    @mock.patch.object(clients.OpenStackClients, 'auth_url')
+    def test_token_clients_shared(self, mock_auth, mock_url, mock_call):
+        mock_url.return_value = 'url_from_keystone'
+        ctx = self._token_context()
+
+        heat = clients.OpenStackClients(ctx).heat()
+        self.assertIs(heat, clients.OpenStackClients(ctx).heat())
+        mock_call.assert_called_once_with(
+            CONF.heat_client.api_version, endpoint='url_from_keystone',
+            username=None, cert_file=None, token='abcd1234',
+            auth_url=mock.ANY, ca_file=None, key_file=None, password=None,
+            insecure=False)
+
+    @mock.patch.object(heatclient, 'Client')
+    @mock.patch.object(clients.OpenStackClients, 'url_for')
+    @mock.patch.object(clients.OpenStackClients, 'auth_url')
+    def test_token_clients_not_shared_near_expiry(self, mock_auth, mock_url,
+                                                  mock_call):
+        ctx = self._token_context(
+            expires_in=clients.TOKEN_EXPIRY_MARGIN - 10)
+
+        clients.OpenStackClients(ctx).heat()
+        clients.OpenStackClients(ctx).heat()
+        self.assertEqual(2, mock_call.call_count)
+
+    @mock.patch.object(heatclient, 'Client')
+    @mock.patch.object(clients.OpenStackClients, 'url_for')
+    @mock.patch.object(clients.OpenStackClients, 'auth_url')
+    def test_token_clients_not_shared_without_expiry(self, mock_auth,
+                                                     mock_url, mock_call):
+        ctx = self._token_context(expires_in=None)
+
+        clients.OpenStackClients(ctx).heat()
+        clients.OpenStackClients(ctx).heat()
+        self.assertEqual(2, mock_call.call_count)
+
+    def _admin_context(self, project_id='test_tenant_id'):
+        ctx = utils.dummy_context(project_id=project_id)
+        ctx.is_admin = True
+        ctx.auth_token = None
+        ctx.auth_token_info = None
+        return ctx
+
+    @mock.patch.object(novaclient, 'Client')
+    @mock.patch('magnum.common.keystone.KeystoneClientV3')
+    def test_admin_clients_shared(self, mock_keystone, mock_call):
+        ctx = self._admin_context()
+        session = mock_keystone.return_value.session
+        session.get_endpoint.return_value = 'url_from_keystone'
+
+        nova = clients.OpenStackClients(ctx).nova()
+        self.assertIs(nova, clients.OpenStackClients(ctx).nova())
+        self.assertIs(nova, clients.OpenStackClients(
+            self._admin_context()).nova())
+        mock_keystone.assert_called_once_with(ctx)
+        mock_call.assert_called_once_with(
+            CONF.nova_client.api_version, session=session,
+            endpoint_override='url_from_keystone', cacert=None,
+            insecure=False)
+
+    @mock.patch('magnum.common.keystone.KeystoneClientV3')
+    def test_url_for_cached(self, mock_keystone):
+        ctx = self._admin_context()
+        get_endpoint = mock_keystone.return_value.session.get_endpoint
+        get_endpoint.return_value = 'url_from_keystone'
+        CONF.set_override('client_cache_size', 0, group='keystone_auth')
+
+        for i in range(2):
+            self.assertEqual('url_from_keystone',
+                             clients.OpenStackClients(ctx).url_for(
+                                 service_type='compute', interface='public'))
+        self.assertEqual(2, get_endpoint.call_count)
+
+        CONF.set_override('client_cache_size', 1000, group='keystone_auth')
+        get_endpoint.reset_mock()
+        for i in range(2):
+            self.assertEqual('url_from_keystone',
+                             clients.OpenStackClients(ctx).url_for(
+                                 service_type='compute', interface='public'))
+        get_endpoint.assert_called_once_with(service_type='compute',
+                                             interface='public')
+
+    @mock.patch.object(clients.octavia, 'OctaviaAPI')
+    @mock.patch.object(clients.OpenStackClients, 'url_for')
+    @mock.patch.object(clients.OpenStackClients, 'keystone')
+    def test_octavia_cached(self, mock_keystone, mock_url, mock_call):
+        obj = clients.OpenStackClients(None)
+
+        octavia = obj.octavia()
+        self.assertIs(octavia, obj.octavia())
+        mock_call.assert_called_once_with(
+            session=mock_keystone.return_value.session,
+            service_type='load-balancer', endpoint=mock_url.return_value)
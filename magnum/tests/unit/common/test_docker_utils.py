@@ -73,6 +73,36 @@ class DockerClientTestCase(base.BaseTestCase):
         self.assertEqual(CONF.docker.default_timeout,
                          client.timeout)
 
+    def test_docker_client_init_ssl_context(self):
+        ssl_context = mock.MagicMock()
+        client = docker_utils.DockerHTTPClient(url='tcp://1.2.3.4:2376',
+                                               ssl_context=ssl_context)
+
+        self.assertEqual('https://1.2.3.4:2376', client.base_url)
+        adapter = client.get_adapter('https://1.2.3.4:2376')
+        self.assertIsInstance(adapter, docker_utils.SSLContextAdapter)
+        self.assertIs(ssl_context,
+                      adapter.poolmanager.connection_pool_kw['ssl_context'])
+        self.assertFalse(
+            adapter.poolmanager.connection_pool_kw['assert_hostname'])
+
+    @mock.patch('magnum.conductor.handlers.common.cert_manager.'
+                'get_client_ssl_context')
+    @mock.patch('magnum.conductor.utils.retrieve_cluster_template')
+    def test_docker_for_cluster(self, mock_get_template,
+                                mock_get_ssl_context):
+        mock_get_template.return_value = mock.MagicMock(tls_disabled=False)
+        cluster = mock.MagicMock(api_address='tcp://1.2.3.4:2376')
+
+        with docker_utils.docker_for_cluster(mock.sentinel.context,
+                                             cluster) as client:
+            adapter = client.get_adapter('https://1.2.3.4:2376')
+
+        mock_get_ssl_context.assert_called_once_with(cluster,
+                                                     mock.sentinel.context)
+        self.assertIs(mock_get_ssl_context.return_value,
+                      adapter.ssl_context)
+
     @mock.patch.object(docker.APIClient, 'inspect_container')
     @mock.patch.object(docker.APIClient, 'containers')
     def test_list_instances(self, mock_containers, mock_inspect):
@@ -0,0 +1,52 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from oslo_utils import uuidutils
+
+from magnum.common import exception
+from magnum.common import hash_ring
+from magnum.tests import base
+
+
+class HashRingTestCase(base.BaseTestCase):
+
+    def setUp(self):
+        super(HashRingTestCase, self).setUp()
+        self.keys = [uuidutils.generate_uuid() for i in range(1000)]
+
+    def test_get_member_is_stable(self):
+        ring1 = hash_ring.HashRing(['host1', 'host2', 'host3'])
+        ring2 = hash_ring.HashRing(['host3', 'host1', 'host2'])
+        for key in self.keys:
+            self.assertEqual(ring1.get_member(key), ring2.get_member(key))
+
+    def test_get_member_single_member(self):
+        ring = hash_ring.HashRing(['host1'])
+        for key in self.keys:
+            self.assertEqual('host1', ring.get_member(key))
+
+    def test_get_member_spreads_keys(self):
+        ring = hash_ring.HashRing(['host1', 'host2', 'host3'])
+        owners = set(ring.get_member(key) for key in self.keys)
+        self.assertEqual(set(['host1', 'host2', 'host3']), owners)
+
+    def test_remove_member_only_moves_its_keys(self):
+        ring = hash_ring.HashRing(['host1', 'host2', 'host3'])
+        smaller = hash_ring.HashRing(['host1', 'host2'])
+        for key in self.keys:
+            owner = ring.get_member(key)
+            if owner != 'host3':
+                self.assertEqual(owner, smaller.get_member(key))
+
+    def test_get_member_empty_ring(self):
+        ring = hash_ring.HashRing([])
+        self.assertRaises(exception.Invalid, ring.get_member, 'key')
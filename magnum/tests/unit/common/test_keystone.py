@@ -10,6 +10,8 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import datetime
+
 import mock
 from oslo_config import fixture
 
@@ -121,6 +123,33 @@ class KeystoneClientTest(base.TestCase):
             auth_url='http://server.test:5000/v3', token='abcd1234')
         mock_ks.assert_called_once_with(session=session, trust_id=None)
 
+    @mock.patch('magnum.common.keystone.ka_v3')
+    def test_sessions_share_http_adapters(self, mock_v3, mock_ks):
+        keystone._HTTP_ADAPTERS = None
+        self.addCleanup(setattr, keystone, '_HTTP_ADAPTERS', None)
+        session = keystone.KeystoneClientV3(self.ctx).session
+        other_session = keystone.KeystoneClientV3(self.ctx).session
+
+        self.assertIsNot(session, other_session)
+        self.assertIsNot(session.session, other_session.session)
+        self.assertIsNot(session.session.cookies,
+                         other_session.session.cookies)
+        for scheme in ('https://', 'http://'):
+            self.assertIs(session.session.adapters[scheme],
+                          other_session.session.adapters[scheme])
+
+    def test_token_expires_at(self, mock_ks):
+        expires_at = datetime.datetime(2030, 1, 1)
+        ks_client = keystone.KeystoneClientV3(self.ctx)
+        ks_client._session = mock.MagicMock()
+        access = ks_client._session.auth.get_access.return_value
+        access.expires = expires_at
+        self.assertEqual(expires_at, ks_client.token_expires_at)
+
+        ks_client._session.auth.get_access.side_effect = (
+            ka_exception.Unauthorized())
+        self.assertIsNone(ks_client.token_expires_at)
+
     def test_client_with_no_credentials(self, mock_ks):
         self.ctx.auth_token = None
         ks_client = keystone.KeystoneClientV3(self.ctx)
@@ -195,6 +224,50 @@ class KeystoneClientTest(base.TestCase):
             domain=expected_domain,
         )
 
+    @mock.patch('magnum.common.keystone.KeystoneClientV3.trustee_domain_id')
+    def test_create_trustee_unauthorized(self, mock_tdi, mock_ks):
+        mock_tdi.__get__ = mock.MagicMock(return_value='domain_id')
+        mock_ks.return_value.users.create.side_effect = (
+            kc_exception.Unauthorized())
+        ks_client = keystone.KeystoneClientV3(self.ctx)
+        session = ks_client.domain_admin_session
+
+        self.assertRaises(exception.TrusteeCreateFailed,
+                          ks_client.create_trustee, '_username', '_password')
+        self.assertIsNot(session, ks_client.domain_admin_session)
+
+    @mock.patch('magnum.common.keystone.KeystoneClientV3.trustee_domain_id')
+    def test_create_trustee_unauthorized_keeps_new_admin(self, mock_tdi,
+                                                         mock_ks):
+        mock_tdi.__get__ = mock.MagicMock(return_value='domain_id')
+        ks_client = keystone.KeystoneClientV3(self.ctx)
+        ks_client.domain_admin_session
+        new_admin = mock.MagicMock()
+
+        def create(**kwargs):
+            # Another request replaces the shared domain admin meanwhile.
+            keystone._DOMAIN_ADMIN = new_admin
+            raise kc_exception.Unauthorized()
+
+        mock_ks.return_value.users.create.side_effect = create
+        self.assertRaises(exception.TrusteeCreateFailed,
+                          ks_client.create_trustee, '_username', '_password')
+        self.assertIs(new_admin, keystone._DOMAIN_ADMIN)
+
+    def test_delete_trustee_unauthorized_keeps_new_admin(self, mock_ks):
+        ks_client = keystone.KeystoneClientV3(self.ctx)
+        ks_client.domain_admin_session
+        new_admin = mock.MagicMock()
+
+        def delete(trustee_id):
+            keystone._DOMAIN_ADMIN = new_admin
+            raise kc_exception.Unauthorized()
+
+        mock_ks.return_value.users.delete.side_effect = delete
+        self.assertRaises(exception.TrusteeDeleteFailed,
+                          ks_client.delete_trustee, 'trustee_id')
+        self.assertIs(new_admin, keystone._DOMAIN_ADMIN)
+
     @mock.patch('magnum.common.keystone.KeystoneClientV3.domain_admin_auth')
     @mock.patch('magnum.common.keystone.KeystoneClientV3.domain_admin_session')
     def test_trustee_domain_id(self, mock_session, mock_auth, mock_ks):
@@ -214,6 +287,46 @@ class KeystoneClientTest(base.TestCase):
             _mock_session
         )
 
+    def test_domain_admin_session_shared(self, mock_ks):
+        ks_client = keystone.KeystoneClientV3(self.ctx)
+        other_client = keystone.KeystoneClientV3(utils.dummy_context())
+
+        self.assertIs(ks_client.domain_admin_session,
+                      other_client.domain_admin_session)
+        self.assertIs(ks_client.domain_admin_client,
+                      other_client.domain_admin_client)
+        mock_ks.assert_called_once_with(
+            session=ks_client.domain_admin_session)
+
+        session = ks_client.domain_admin_session
+        self.config(trustee_domain_admin_password='new_pass', group='trust')
+        self.assertIsNot(session, other_client.domain_admin_session)
+
+    @mock.patch('magnum.common.keystone.KeystoneClientV3.domain_admin_auth')
+    def test_trustee_domain_id_shared(self, mock_auth, mock_ks):
+        _mock_auth = mock.MagicMock()
+        mock_auth.__get__ = mock.MagicMock(return_value=_mock_auth)
+        _mock_auth.get_access.return_value.domain_id = 'domain_id'
+
+        for i in range(2):
+            ks_client = keystone.KeystoneClientV3(self.ctx)
+            self.assertEqual('domain_id', ks_client.trustee_domain_id)
+        self.assertEqual(1, _mock_auth.get_access.call_count)
+
+    @mock.patch('magnum.common.keystone.KeystoneClientV3.domain_admin_auth')
+    def test_trustee_domain_id_unauthorized(self, mock_auth, mock_ks):
+        _mock_auth = mock.MagicMock()
+        mock_auth.__get__ = mock.MagicMock(return_value=_mock_auth)
+        _mock_auth.get_access.side_effect = [
+            kc_exception.Unauthorized(), mock.Mock(domain_id='domain_id')]
+        ks_client = keystone.KeystoneClientV3(self.ctx)
+        session = ks_client.domain_admin_session
+
+        self.assertRaises(exception.AuthorizationFailure,
+                          lambda: ks_client.trustee_domain_id)
+        self.assertEqual('domain_id', ks_client.trustee_domain_id)
+        self.assertIsNot(session, ks_client.domain_admin_session)
+
     def test_get_validate_region_name(self, mock_ks):
         key = 'region_name'
         val = 'RegionOne'
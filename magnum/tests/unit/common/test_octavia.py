@@ -21,6 +21,10 @@ from magnum.tests import base
 from magnum.tests.unit.db import utils
 
 
+class NotFound(Exception):
+    code = 404
+
+
 class OctaviaTest(base.TestCase):
     def setUp(self):
         super(OctaviaTest, self).setUp()
@@ -59,20 +63,90 @@ class OctaviaTest(base.TestCase):
             ]
         }
         mock_octavie_client = mock.MagicMock()
-        mock_octavie_client.load_balancer_list.side_effect = [
-            mock_lbs, {"loadbalancers": []}
-        ]
+        mock_octavie_client.load_balancer_list.return_value = mock_lbs
+        mock_octavie_client.load_balancer_show.side_effect = NotFound()
         osc = mock.MagicMock()
         mock_clients.return_value = osc
         osc.octavia.return_value = mock_octavie_client
 
         octavia.delete_loadbalancers(self.context, self.cluster)
 
+        mock_octavie_client.load_balancer_list.assert_called_once_with(
+            project_id=self.cluster.project_id)
         calls = [
             mock.call("fake_id_1", cascade=True),
             mock.call("fake_id_2", cascade=True)
         ]
-        mock_octavie_client.load_balancer_delete.assert_has_calls(calls)
+        mock_octavie_client.load_balancer_delete.assert_has_calls(
+            calls, any_order=True)
+        self.assertEqual(2, mock_delete_fip.call_count)
+        mock_octavie_client.load_balancer_show.assert_has_calls(
+            [mock.call("fake_id_1"), mock.call("fake_id_2")],
+            any_order=True)
+
+    @mock.patch("magnum.common.neutron.delete_floatingip")
+    @mock.patch('magnum.common.clients.OpenStackClients')
+    def test_delete_loadbalancers_other_cluster(self, mock_clients,
+                                                mock_delete_fip):
+        lbs = [
+            {
+                "id": "fake_id_1",
+                "description": "Kubernetes external service "
+                               "ad3080723f1c211e88adbfa163ee1203 from "
+                               "cluster %s" % self.cluster.uuid,
+                "name": "fake_name_1",
+                "provisioning_status": "ACTIVE",
+                "vip_port_id": "b4ca07d1-a31e-43e2-891a-7d14f419f342"
+            },
+            {
+                "id": "fake_id_2",
+                "description": "Kubernetes external service "
+                               "a9f9ba08cf28811e89547fa163ea824f from "
+                               "cluster other-cluster",
+                "name": "fake_name_2",
+                "provisioning_status": "ACTIVE",
+                "vip_port_id": "c17c1a6e-1868-11e9-84cd-00224d6b7bc1"
+            },
+        ]
+        mock_octavie_client = mock.MagicMock()
+        mock_octavie_client.load_balancer_list.return_value = {
+            "loadbalancers": lbs}
+        mock_octavie_client.load_balancer_show.return_value = {
+            "id": "fake_id_1", "provisioning_status": "DELETED"}
+        osc = mock.MagicMock()
+        mock_clients.return_value = osc
+        osc.octavia.return_value = mock_octavie_client
+
+        octavia.delete_loadbalancers(self.context, self.cluster)
+
+        mock_octavie_client.load_balancer_list.assert_called_once_with(
+            project_id=self.cluster.project_id)
+        mock_octavie_client.load_balancer_delete.assert_called_once_with(
+            "fake_id_1", cascade=True)
+
+    @mock.patch('time.sleep')
+    @mock.patch('time.time')
+    def test_wait_for_lb_deleted_backoff(self, mock_time, mock_sleep):
+        self.config(pre_delete_lb_timeout=60, group='cluster')
+        mock_time.return_value = 100
+        mock_octavie_client = mock.MagicMock()
+        mock_octavie_client.load_balancer_show.side_effect = (
+            [{"provisioning_status": "PENDING_DELETE"}] * 6 + [NotFound()])
+
+        octavia.wait_for_lb_deleted(mock_octavie_client, {"fake_id_1"})
+
+        self.assertEqual(7, mock_octavie_client.load_balancer_show.call_count)
+        self.assertEqual([mock.call(1), mock.call(2), mock.call(4),
+                          mock.call(8), mock.call(16), mock.call(16)],
+                         mock_sleep.call_args_list)
+
+    @mock.patch('time.sleep')
+    def test_wait_for_lb_deleted_error(self, mock_sleep):
+        mock_octavie_client = mock.MagicMock()
+        mock_octavie_client.load_balancer_show.side_effect = ValueError()
+
+        self.assertRaises(ValueError, octavia.wait_for_lb_deleted,
+                          mock_octavie_client, {"fake_id_1"})
 
     @mock.patch('magnum.common.clients.OpenStackClients')
     def test_delete_loadbalancers_no_candidate(self, mock_clients):
@@ -134,6 +208,7 @@ class OctaviaTest(base.TestCase):
     @mock.patch("magnum.common.neutron.delete_floatingip")
     @mock.patch('magnum.common.clients.OpenStackClients')
     def test_delete_loadbalancers_timeout(self, mock_clients, mock_delete_fip):
+        self.config(pre_delete_lb_timeout=0, group='cluster')
         osc = mock.MagicMock()
         mock_clients.return_value = osc
         mock_octavie_client = mock.MagicMock()
@@ -162,6 +237,8 @@ class OctaviaTest(base.TestCase):
             ]
         }
         mock_octavie_client.load_balancer_list.return_value = mock_lbs
+        mock_octavie_client.load_balancer_show.return_value = {
+            "provisioning_status": "PENDING_DELETE"}
 
         self.assertRaises(
             exception.PreDeletionFailed,
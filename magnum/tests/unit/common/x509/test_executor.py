@@ -0,0 +1,118 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives.asymmetric import padding
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography import x509 as c_x509
+import eventlet
+from eventlet import event
+from eventlet import tpool
+import mock
+
+from magnum.common.x509 import executor
+from magnum.common.x509 import operations
+from magnum.tests import base
+
+
+class TestExecutor(base.TestCase):
+
+    def setUp(self):
+        super(TestExecutor, self).setUp()
+        executor._SEMAPHORE = None
+        self.addCleanup(setattr, executor, '_SEMAPHORE', None)
+        tpool_patcher = mock.patch.object(executor, 'tpool')
+        self.tpool = tpool_patcher.start()
+        self.addCleanup(tpool_patcher.stop)
+        self.tpool.execute.side_effect = (
+            lambda func, *args, **kwargs: func(*args, **kwargs))
+
+    def test_execute_in_native_thread(self):
+        func = mock.Mock(return_value='result')
+
+        self.assertEqual('result', executor.execute(func, 1, key='value'))
+        self.tpool.execute.assert_called_once_with(func, 1, key='value')
+        func.assert_called_once_with(1, key='value')
+
+    def test_execute_inline(self):
+        self.config(crypto_workers=0, group='x509')
+        func = mock.Mock(return_value='result')
+
+        self.assertEqual('result', executor.execute(func))
+        self.assertFalse(self.tpool.execute.called)
+
+    def test_execute_back_pressure(self):
+        self.config(crypto_workers=1, group='x509')
+        done = event.Event()
+        self.tpool.execute.side_effect = lambda func: done.wait()
+
+        threads = [eventlet.spawn(executor.execute, mock.Mock())
+                   for i in range(3)]
+        eventlet.sleep(0)
+
+        self.assertEqual(1, self.tpool.execute.call_count)
+        stats = executor.get_stats()
+        self.assertEqual(1, stats['in_flight'])
+        self.assertEqual(2, stats['waiting'])
+        self.assertEqual(3, stats['queue_depth'])
+
+        done.send('result')
+        self.assertEqual(['result'] * 3, [t.wait() for t in threads])
+        self.assertEqual(3, self.tpool.execute.call_count)
+        self.assertEqual(0, executor.get_stats()['queue_depth'])
+
+    def test_execute_error_releases_slot(self):
+        self.config(crypto_workers=1, group='x509')
+        func = mock.Mock(side_effect=ValueError())
+
+        self.assertRaises(ValueError, executor.execute, func)
+        self.assertRaises(ValueError, executor.execute, func)
+        self.assertEqual(0, executor.get_stats()['queue_depth'])
+
+    def test_generate_keys_in_native_thread(self):
+        keys = operations.generate_csr_and_key(u'node')
+
+        self.tpool.execute.assert_called_once_with(
+            rsa.generate_private_key, public_exponent=65537, key_size=2048,
+            backend=mock.ANY)
+        self.assertIn('BEGIN RSA PRIVATE KEY', keys['private_key'])
+
+
+class TestExecutorSigning(base.TestCase):
+
+    def setUp(self):
+        super(TestExecutorSigning, self).setUp()
+        executor._SEMAPHORE = None
+        self.addCleanup(setattr, executor, '_SEMAPHORE', None)
+        self.config(crypto_workers=2, group='x509')
+
+    def test_sign_round_trip(self):
+        with mock.patch.object(tpool, 'execute',
+                               wraps=tpool.execute) as mock_execute:
+            ca = operations.generate_ca_certificate(
+                u'ca', encryption_password=b'password')
+            csr = operations.generate_csr_and_key(u'node')['csr']
+            certificate = operations.sign(csr, u'ca', ca['private_key'],
+                                          b'password')
+        # CA key, node key and signature of both certificates.
+        self.assertEqual(4, mock_execute.call_count)
+
+        ca_cert = c_x509.load_pem_x509_certificate(ca['certificate'],
+                                                   default_backend())
+        node_cert = c_x509.load_pem_x509_certificate(certificate,
+                                                     default_backend())
+        self.assertEqual(ca_cert.subject, node_cert.issuer)
+        ca_cert.public_key().verify(node_cert.signature,
+                                    node_cert.tbs_certificate_bytes,
+                                    padding.PKCS1v15(),
+                                    node_cert.signature_hash_algorithm)
+        self.assertEqual(0, executor.get_stats()['queue_depth'])
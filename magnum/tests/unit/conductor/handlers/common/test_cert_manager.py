@@ -14,13 +14,17 @@
 
 import mock
 
+from magnum.common.cert_manager import x509keypair_cert_manager
 from magnum.common import exception
+from magnum.common.x509 import operations as x509
 from magnum.conductor.handlers.common import cert_manager
 from magnum.tests import base
 from oslo_config import cfg
+from oslo_utils import timeutils
 
 import magnum.conf
 import os
+import ssl
 import stat
 import tempfile
 
@@ -41,6 +45,8 @@ class CertManagerTestCase(base.BaseTestCase):
 
         self.cert_manager_backend.CertManager = mock.MagicMock()
         self.CertManager = self.cert_manager_backend.CertManager
+        # The certificate cache is covered by CertCacheTestCase.
+        CONF.set_override('cert_cache_size', 0, group='cluster')
 
     @mock.patch('magnum.common.x509.operations.generate_ca_certificate')
     @mock.patch('magnum.common.short_id.generate_id')
@@ -183,9 +189,8 @@ class CertManagerTestCase(base.BaseTestCase):
         mock_cluster = mock.MagicMock()
         mock_cluster.uuid = "mock_cluster_uuid"
         mock_ca_cert = mock.MagicMock()
-        mock_ca_cert.get_private_key.return_value = mock.sentinel.priv_key
-        passphrase = mock.sentinel.passphrase
-        mock_ca_cert.get_private_key_passphrase.return_value = passphrase
+        mock_ca_cert.get_loaded_private_key.return_value = (
+            mock.sentinel.priv_key)
         self.CertManager.get_cert.return_value = mock_ca_cert
         mock_csr = mock.MagicMock()
         mock_x509_sign.return_value = mock.sentinel.signed_cert
@@ -197,8 +202,7 @@ class CertManagerTestCase(base.BaseTestCase):
             mock_cluster.ca_cert_ref, resource_ref=mock_cluster.uuid,
             context=None)
         mock_x509_sign.assert_called_once_with(mock_csr, mock_cluster.name,
-                                               mock.sentinel.priv_key,
-                                               passphrase)
+                                               mock.sentinel.priv_key)
         self.assertEqual(mock.sentinel.signed_cert, cluster_ca_cert)
 
     @mock.patch('magnum.common.x509.operations.sign')
@@ -207,9 +211,8 @@ class CertManagerTestCase(base.BaseTestCase):
         mock_cluster.name = None
         mock_cluster.uuid = "mock_cluster_uuid"
         mock_ca_cert = mock.MagicMock()
-        mock_ca_cert.get_private_key.return_value = mock.sentinel.priv_key
-        passphrase = mock.sentinel.passphrase
-        mock_ca_cert.get_private_key_passphrase.return_value = passphrase
+        mock_ca_cert.get_loaded_private_key.return_value = (
+            mock.sentinel.priv_key)
         self.CertManager.get_cert.return_value = mock_ca_cert
         mock_csr = mock.MagicMock()
         mock_x509_sign.return_value = mock.sentinel.signed_cert
@@ -221,8 +224,7 @@ class CertManagerTestCase(base.BaseTestCase):
             mock_cluster.ca_cert_ref, resource_ref=mock_cluster.uuid,
             context=None)
         mock_x509_sign.assert_called_once_with(mock_csr, mock_cluster.uuid,
-                                               mock.sentinel.priv_key,
-                                               passphrase)
+                                               mock.sentinel.priv_key)
         self.assertEqual(mock.sentinel.signed_cert, cluster_ca_cert)
 
     def test_get_cluster_ca_certificate(self):
@@ -511,3 +513,186 @@ class CertManagerTestCase(base.BaseTestCase):
 
         self.assertEqual(True, os.path.isdir(mock_dir))
         self.assertEqual(False, os.path.isdir(cert_dir))
+
+
+class ClientSSLContextTestCase(base.BaseTestCase):
+    def setUp(self):
+        super(ClientSSLContextTestCase, self).setUp()
+
+        cert_manager_patcher = mock.patch.object(cert_manager, 'cert_manager')
+        self.cert_manager = cert_manager_patcher.start()
+        self.addCleanup(cert_manager_patcher.stop)
+        self.CertManager = self.cert_manager.get_backend().CertManager
+
+        ca = x509.generate_ca_certificate(u'ca')
+        client = x509.generate_client_certificate(
+            u'ca', u'admin', u'system:masters', ca['private_key'])
+        self.ca_cert = mock.MagicMock()
+        self.ca_cert.get_certificate.return_value = ca['certificate']
+        self.magnum_cert = mock.MagicMock()
+        self.magnum_cert.get_certificate.return_value = client['certificate']
+        self.magnum_cert.get_decrypted_private_key.return_value = (
+            client['private_key'])
+        self.CertManager.get_cert.side_effect = (
+            lambda ref, **kwargs: (self.ca_cert if ref == 'ca-ref'
+                                   else self.magnum_cert))
+
+        self.cluster = mock.MagicMock(uuid='cluster-uuid',
+                                      ca_cert_ref='ca-ref',
+                                      magnum_cert_ref='magnum-ref')
+
+        cert_manager._SSL_CONTEXT_CACHE = None
+        self.addCleanup(setattr, cert_manager, '_SSL_CONTEXT_CACHE', None)
+        cfg.CONF.set_override('cert_cache_size', 0, group='cluster')
+
+    @mock.patch('tempfile.NamedTemporaryFile')
+    def test_create_client_ssl_context(self, mock_tempfile):
+        ssl_context = cert_manager.create_client_ssl_context(self.cluster)
+
+        self.assertEqual(ssl.CERT_REQUIRED, ssl_context.verify_mode)
+        self.assertEqual(1, len(ssl_context.get_ca_certs()))
+        if hasattr(os, 'memfd_create'):
+            self.assertFalse(mock_tempfile.called)
+
+    def test_get_client_ssl_context_cached(self):
+        ssl_context = cert_manager.get_client_ssl_context(self.cluster)
+
+        self.assertIs(ssl_context,
+                      cert_manager.get_client_ssl_context(self.cluster))
+        self.assertEqual(2, self.CertManager.get_cert.call_count)
+
+    def test_get_client_ssl_context_rotated_cert(self):
+        ssl_context = cert_manager.get_client_ssl_context(self.cluster)
+        self.cluster.ca_cert_ref = 'ca-ref-2'
+
+        self.assertIsNot(ssl_context,
+                         cert_manager.get_client_ssl_context(self.cluster))
+
+    def test_get_client_ssl_context_cache_disabled(self):
+        cfg.CONF.set_override('ssl_context_cache_size', 0, group='cluster')
+
+        self.assertIsNot(cert_manager.get_client_ssl_context(self.cluster),
+                         cert_manager.get_client_ssl_context(self.cluster))
+
+    def test_delete_client_files_evicts_ssl_context(self):
+        ssl_context = cert_manager.get_client_ssl_context(self.cluster)
+
+        cert_manager.delete_client_files(self.cluster)
+
+        self.assertIsNot(ssl_context,
+                         cert_manager.get_client_ssl_context(self.cluster))
+
+
+class CertCacheTestCase(base.BaseTestCase):
+    def setUp(self):
+        super(CertCacheTestCase, self).setUp()
+
+        cert_manager_patcher = mock.patch.object(cert_manager, 'cert_manager')
+        self.cert_manager = cert_manager_patcher.start()
+        self.addCleanup(cert_manager_patcher.stop)
+        self.CertManager = self.cert_manager.get_backend().CertManager
+
+        self.ca = x509.generate_ca_certificate(
+            u'ca', encryption_password=u'password')
+        self.ca_cert = x509keypair_cert_manager.Cert(
+            certificate=self.ca['certificate'],
+            private_key=self.ca['private_key'],
+            private_key_passphrase=u'password')
+        self.CertManager.get_cert.return_value = self.ca_cert
+
+        self.cluster = mock.MagicMock(uuid='cluster-uuid',
+                                      ca_cert_ref='ca-ref',
+                                      magnum_cert_ref='magnum-ref')
+        self.cluster.name = u'ca'
+
+        cert_manager._CERT_CACHE = None
+        self.addCleanup(setattr, cert_manager, '_CERT_CACHE', None)
+
+    def test_get_cert_cached(self):
+        ca_cert = cert_manager.get_cluster_ca_certificate(self.cluster)
+
+        self.assertIs(ca_cert,
+                      cert_manager.get_cluster_ca_certificate(self.cluster))
+        self.CertManager.get_cert.assert_called_once_with(
+            'ca-ref', resource_ref='cluster-uuid', context=None)
+        self.assertEqual(self.ca['certificate'], ca_cert.get_certificate())
+        self.assertEqual(self.ca['private_key'], ca_cert.get_private_key())
+        self.assertEqual(u'password', ca_cert.get_private_key_passphrase())
+        self.assertEqual(self.ca_cert.get_decrypted_private_key(),
+                         ca_cert.get_decrypted_private_key())
+        stats = cert_manager.get_cert_cache_stats()
+        self.assertEqual(1, stats['hits'])
+        self.assertEqual(1, stats['misses'])
+
+    def test_private_key_encrypted_in_memory(self):
+        ca_cert = cert_manager.get_cluster_ca_certificate(self.cluster)
+
+        self.assertNotIn(self.ca['private_key'], repr(vars(ca_cert)))
+        self.assertNotIn(u'password', repr(vars(ca_cert)))
+
+    @mock.patch.object(x509, 'load_private_key',
+                       side_effect=x509.load_private_key)
+    def test_sign_node_certificate_loads_key_once(self, mock_load):
+        csr = x509.generate_csr_and_key(u'node')['csr']
+
+        for i in range(2):
+            cert_manager.sign_node_certificate(self.cluster, csr)
+
+        self.assertEqual(1, mock_load.call_count)
+        self.CertManager.get_cert.assert_called_once_with(
+            'ca-ref', resource_ref='cluster-uuid', context=None)
+
+    @mock.patch.object(x509, 'load_private_key',
+                       side_effect=x509.load_private_key)
+    def test_sign_node_certificate_uncached(self, mock_load):
+        cfg.CONF.set_override('cert_cache_size', 0, group='cluster')
+        csr = x509.generate_csr_and_key(u'node')['csr']
+
+        cert_manager.sign_node_certificate(self.cluster, csr)
+
+        mock_load.assert_called_once_with(self.ca['private_key'],
+                                          u'password')
+
+    @mock.patch.object(timeutils, 'utcnow_ts')
+    @mock.patch.object(x509, 'load_private_key',
+                       side_effect=x509.load_private_key)
+    def test_loaded_key_expires(self, mock_load, mock_now):
+        cfg.CONF.set_override('cert_loaded_key_ttl', 300, group='cluster')
+        mock_now.return_value = 1000
+        ca_cert = cert_manager.get_cluster_ca_certificate(self.cluster)
+
+        key = ca_cert.get_loaded_private_key()
+        mock_now.return_value = 1299
+        self.assertIs(key, ca_cert.get_loaded_private_key())
+        mock_now.return_value = 1300
+        self.assertIsNot(key, ca_cert.get_loaded_private_key())
+        self.assertEqual(2, mock_load.call_count)
+
+    @mock.patch.object(x509, 'load_private_key',
+                       side_effect=x509.load_private_key)
+    def test_loaded_key_not_kept(self, mock_load):
+        cfg.CONF.set_override('cert_loaded_key_ttl', 0, group='cluster')
+        ca_cert = cert_manager.get_cluster_ca_certificate(self.cluster)
+
+        ca_cert.get_loaded_private_key()
+        ca_cert.get_loaded_private_key()
+
+        self.assertEqual(2, mock_load.call_count)
+        self.assertIsNone(ca_cert._loaded_key)
+
+    def test_delete_certificates_evicts_cache(self):
+        ca_cert = cert_manager.get_cluster_ca_certificate(self.cluster)
+
+        cert_manager.delete_certificates_from_cluster(self.cluster)
+
+        self.assertIsNot(ca_cert,
+                         cert_manager.get_cluster_ca_certificate(self.cluster))
+        self.assertEqual(2, self.CertManager.get_cert.call_count)
+
+    def test_cache_disabled(self):
+        cfg.CONF.set_override('cert_cache_size', 0, group='cluster')
+
+        self.assertIs(self.ca_cert,
+                      cert_manager.get_cluster_ca_certificate(self.cluster))
+        cert_manager.get_cluster_ca_certificate(self.cluster)
+        self.assertEqual(2, self.CertManager.get_cert.call_count)
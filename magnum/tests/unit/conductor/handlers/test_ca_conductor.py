@@ -56,3 +56,22 @@ class TestSignConductor(base.TestCase):
         self.assertEqual(mock_cluster.user_id, actual_cert.user_id)
         self.assertEqual(mock_cluster.project_id, actual_cert.project_id)
         self.assertEqual('fake-pem', actual_cert.pem)
+
+    @mock.patch.object(ca_conductor, 'k8s_api')
+    @mock.patch.object(ca_conductor.driver.Driver, 'get_driver_for_cluster')
+    @mock.patch.object(ca_conductor, 'cert_manager')
+    def test_rotate_ca_certificate(self, mock_cert_manager, mock_get_driver,
+                                   mock_k8s_api):
+        mock_cluster = mock.MagicMock()
+        calls = mock.MagicMock()
+        calls.attach_mock(mock_cert_manager.evict_certificates, 'evict')
+        calls.attach_mock(mock_get_driver.return_value.rotate_ca_certificate,
+                          'rotate')
+
+        self.ca_handler.rotate_ca_certificate(self.context, mock_cluster)
+
+        self.assertEqual([mock.call.evict(mock_cluster),
+                          mock.call.rotate(self.context, mock_cluster),
+                          mock.call.evict(mock_cluster)],
+                         calls.mock_calls)
+        mock_k8s_api.evict_k8s_api.assert_called_once_with(mock_cluster.uuid)
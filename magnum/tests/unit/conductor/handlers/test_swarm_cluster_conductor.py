@@ -506,6 +506,7 @@ class TestClusterConductorWithSwarm(base.TestCase):
 
         class Service(object):
             def __init__(self):
+                self.type = 'load-balancer'
                 self.enabled = True
 
         mock_kc.return_value.client.services.list.return_value = [Service()]
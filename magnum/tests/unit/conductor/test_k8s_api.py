@@ -12,8 +12,10 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+from kubernetes.client import configuration as k8s_configuration
 import mock
 
+from magnum.conductor import k8s_api
 from magnum.tests import base
 
 
@@ -51,3 +53,94 @@ class TestK8sAPI(base.TestCase):
             TestK8sAPI.content_dict[cert_ref]['decrypted_private_key'])
 
         return cert_obj
+
+    @mock.patch('magnum.conductor.handlers.common.cert_manager.'
+                'get_client_ssl_context')
+    def test_k8s_api_uses_ssl_context(self, mock_get_ssl_context):
+        ssl_context = mock.MagicMock()
+        mock_get_ssl_context.return_value = ssl_context
+        cluster = mock.MagicMock(api_address='https://1.2.3.4:6443',
+                                 magnum_cert_ref='fake-magnum-cert-ref')
+
+        api = k8s_api.K8sAPI(self.context, cluster)
+
+        mock_get_ssl_context.assert_called_once_with(cluster, self.context)
+        pool_manager = api.api_client.rest_client.pool_manager
+        self.assertIs(ssl_context,
+                      pool_manager.connection_pool_kw['ssl_context'])
+        self.assertEqual('https://1.2.3.4:6443',
+                         api.api_client.configuration.host)
+        self.assertIsNone(pool_manager.connection_pool_kw['ca_certs'])
+
+    def test_api_client_ssl_context_keeps_proxy(self):
+        ssl_context = mock.MagicMock()
+        config = k8s_configuration.Configuration()
+        config.host = 'https://1.2.3.4:6443'
+        config.proxy = 'http://proxy.example.com:3128'
+        config.connection_pool_maxsize = 16
+
+        client = k8s_api.ApiClient(configuration=config,
+                                   ssl_context=ssl_context)
+
+        pool_manager = client.rest_client.pool_manager
+        self.assertEqual('proxy.example.com', pool_manager.proxy.host)
+        self.assertIs(ssl_context,
+                      pool_manager.connection_pool_kw['ssl_context'])
+        self.assertEqual(16, pool_manager.connection_pool_kw['maxsize'])
+
+    @mock.patch('magnum.conductor.handlers.common.cert_manager.'
+                'get_client_ssl_context')
+    def test_k8s_api_without_certs(self, mock_get_ssl_context):
+        cluster = mock.MagicMock(api_address='http://1.2.3.4:8080',
+                                 magnum_cert_ref=None)
+
+        api = k8s_api.K8sAPI(self.context, cluster)
+
+        self.assertFalse(mock_get_ssl_context.called)
+        self.assertNotIn('ssl_context',
+                         api.api_client.rest_client.pool_manager.
+                         connection_pool_kw)
+
+
+class TestK8sAPICache(base.TestCase):
+
+    def setUp(self):
+        super(TestK8sAPICache, self).setUp()
+        self.addCleanup(setattr, k8s_api, '_CLIENT_CACHE', None)
+        self.cluster = mock.MagicMock(uuid='cluster-1',
+                                      api_address='https://1.2.3.4:6443',
+                                      ca_cert_ref='ca', magnum_cert_ref='m')
+        p = mock.patch.object(k8s_api, 'K8sAPI')
+        self.mock_k8s_api = p.start()
+        self.mock_k8s_api.side_effect = lambda ctx, cluster: mock.MagicMock()
+        self.addCleanup(p.stop)
+
+    def test_create_k8s_api_reuses_client(self):
+        api1 = k8s_api.create_k8s_api(self.context, self.cluster)
+        api2 = k8s_api.create_k8s_api(self.context, self.cluster)
+        self.assertIs(api1, api2)
+        self.assertEqual(1, self.mock_k8s_api.call_count)
+
+    def test_create_k8s_api_new_address(self):
+        api1 = k8s_api.create_k8s_api(self.context, self.cluster)
+        self.cluster.api_address = 'https://5.6.7.8:6443'
+        api2 = k8s_api.create_k8s_api(self.context, self.cluster)
+        self.assertIsNot(api1, api2)
+
+    def test_create_k8s_api_rotated_ca(self):
+        api1 = k8s_api.create_k8s_api(self.context, self.cluster)
+        self.cluster.ca_cert_ref = 'new-ca'
+        api2 = k8s_api.create_k8s_api(self.context, self.cluster)
+        self.assertIsNot(api1, api2)
+
+    def test_evict_k8s_api(self):
+        api1 = k8s_api.create_k8s_api(self.context, self.cluster)
+        k8s_api.evict_k8s_api(self.cluster.uuid)
+        api2 = k8s_api.create_k8s_api(self.context, self.cluster)
+        self.assertIsNot(api1, api2)
+
+    def test_create_k8s_api_cache_disabled(self):
+        self.config(client_cache_size=0, group='kubernetes')
+        api1 = k8s_api.create_k8s_api(self.context, self.cluster)
+        api2 = k8s_api.create_k8s_api(self.context, self.cluster)
+        self.assertIsNot(api1, api2)
@@ -0,0 +1,96 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import eventlet
+import mock
+from oslo_serialization import jsonutils
+
+from magnum.conductor import k8s_health
+from magnum.objects import fields as m_fields
+from magnum.tests import base
+
+
+class K8sHealthPollerTestCase(base.TestCase):
+
+    def setUp(self):
+        super(K8sHealthPollerTestCase, self).setUp()
+        self.poller = k8s_health.K8sHealthPoller(2, 5)
+        self.k8s_api = mock.MagicMock()
+        self.k8s_api.api_client.call_api.return_value = ('ok', None, None)
+        node = {'metadata': {'name': 'node-0'},
+                'status': {'conditions': [{'type': 'Ready',
+                                           'status': 'True'}]}}
+        self.k8s_api.list_node.return_value.data = jsonutils.dumps(
+            {'items': [node], 'metadata': {}})
+
+    def _track_concurrency(self):
+        in_flight = []
+        peak = []
+
+        def healthz(*args, **kwargs):
+            in_flight.append(1)
+            peak.append(len(in_flight))
+            eventlet.sleep(0.01)
+            in_flight.pop()
+            return 'ok', None, None
+
+        self.k8s_api.api_client.call_api.side_effect = healthz
+        return peak
+
+    def test_check_healthy(self):
+        status, reason = self.poller.check(self.k8s_api, 'https://1.2.3.4')
+
+        self.assertEqual(m_fields.ClusterHealthStatus.HEALTHY, status)
+        self.assertEqual({'api': 'ok', 'node-0.Ready': True}, reason)
+        self.k8s_api.api_client.call_api.assert_called_once_with(
+            '/healthz', 'GET', response_type=object, _request_timeout=5)
+        self.k8s_api.list_node.assert_called_once_with(
+            limit=500, _preload_content=False, _request_timeout=5)
+
+    def test_check_timeout(self):
+        self.poller.timeout = 0.01
+        self.k8s_api.list_node.side_effect = lambda **kw: eventlet.sleep(1)
+
+        status, reason = self.poller.check(self.k8s_api, 'https://1.2.3.4')
+
+        self.assertEqual(m_fields.ClusterHealthStatus.UNHEALTHY, status)
+        self.assertEqual(
+            {'api': 'Health check timed out after 0.01 seconds.'}, reason)
+
+    @mock.patch('eventlet.sleep')
+    @mock.patch('random.uniform', return_value=0.5)
+    def test_check_jitter(self, mock_uniform, mock_sleep):
+        self.poller.jitter = 2
+
+        self.poller.check(self.k8s_api, 'https://1.2.3.4')
+
+        mock_uniform.assert_called_once_with(0, 2)
+        mock_sleep.assert_called_once_with(0.5)
+
+    def test_check_per_host_limit(self):
+        peak = self._track_concurrency()
+        pool = eventlet.GreenPool()
+        for i in range(6):
+            pool.spawn(self.poller.check, self.k8s_api, 'https://1.2.3.4')
+        pool.waitall()
+
+        self.assertEqual(2, max(peak))
+        self.assertEqual({}, dict(self.poller._host_semaphores))
+
+    def test_get_health_poller(self):
+        self.addCleanup(setattr, k8s_health, '_POLLER', None)
+        self.config(health_poll_timeout=7, group='kubernetes')
+
+        poller = k8s_health.get_health_poller()
+
+        self.assertIs(poller, k8s_health.get_health_poller())
+        self.assertEqual(7, poller.timeout)
@@ -13,12 +13,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from collections import namedtuple
-
 import mock
 from oslo_serialization import jsonutils
 
 from magnum.common import exception
+from magnum.conductor import k8s_health
 from magnum.drivers.common import k8s_monitor
 from magnum.drivers.mesos_ubuntu_v1 import monitor as mesos_monitor
 from magnum.drivers.swarm_fedora_atomic_v1 import monitor as swarm_monitor
@@ -28,8 +27,15 @@ from magnum.objects import fields as m_fields
 from magnum.tests import base
 from magnum.tests.unit.db import utils
 
-NODE_STATUS_CONDITION = namedtuple('Condition',
-                                   ['type', 'status'])
+
+def list_response(items, _continue=None):
+    return mock.MagicMock(data=jsonutils.dumps(
+        {'items': items, 'metadata': {'continue': _continue}}))
+
+
+def k8s_node(name, ready):
+    return {'metadata': {'name': name},
+            'status': {'conditions': [{'type': 'Ready', 'status': ready}]}}
 
 
 class MonitorsTestCase(base.TestCase):
@@ -64,6 +70,8 @@ class MonitorsTestCase(base.TestCase):
         self.k8s_monitor = k8s_monitor.K8sMonitor(self.context, self.cluster)
         self.mesos_monitor = mesos_monitor.MesosMonitor(self.context,
                                                         self.cluster)
+        self.config(health_poll_jitter=0, group='kubernetes')
+        self.addCleanup(setattr, k8s_health, '_POLLER', None)
         p = mock.patch('magnum.drivers.swarm_fedora_atomic_v1.monitor.'
                        'SwarmMonitor.metrics_spec',
                        new_callable=mock.PropertyMock)
@@ -231,28 +239,39 @@ class MonitorsTestCase(base.TestCase):
 
     @mock.patch('magnum.conductor.k8s_api.create_k8s_api')
     def test_k8s_monitor_pull_data_success(self, mock_k8s_api):
-        mock_nodes = mock.MagicMock()
-        mock_node = mock.MagicMock()
-        mock_node.status = mock.MagicMock()
-        mock_node.status.capacity = {'memory': '2000Ki', 'cpu': '1'}
-        mock_nodes.items = [mock_node]
-        mock_k8s_api.return_value.list_node.return_value = (
-            mock_nodes)
-        mock_pods = mock.MagicMock()
-        mock_pod = mock.MagicMock()
-        mock_pod.spec = mock.MagicMock()
-        mock_container = mock.MagicMock()
-        mock_container.resources = mock.MagicMock()
-        mock_container.resources.limits = "{'memory': '100Mi', 'cpu': '500m'}"
-        mock_pod.spec.containers = [mock_container]
-        mock_pods.items = [mock_pod]
-        mock_k8s_api.return_value.list_namespaced_pod.return_value = mock_pods
+        node = {'status': {'capacity': {'memory': '2000Ki', 'cpu': '1'}}}
+        mock_k8s_api.return_value.list_node.return_value = list_response(
+            [node])
+        pod = {'spec': {'containers': [
+            {'resources': {'limits': {'memory': '100Mi', 'cpu': '500m'}}}]}}
+        mock_k8s_api.return_value.list_namespaced_pod.return_value = (
+            list_response([pod]))
 
         self.k8s_monitor.pull_data()
         self.assertEqual(self.k8s_monitor.data['nodes'],
                          [{'Memory': 2048000.0, 'Cpu': 1}])
         self.assertEqual(self.k8s_monitor.data['pods'],
                          [{'Memory': 104857600.0, 'Cpu': 0.5}])
+        mock_k8s_api.return_value.list_namespaced_pod.assert_called_once_with(
+            'default', limit=500, _preload_content=False)
+
+    @mock.patch('magnum.conductor.k8s_api.create_k8s_api')
+    def test_k8s_monitor_pull_data_paginated(self, mock_k8s_api):
+        self.config(list_chunk_size=1, group='kubernetes')
+        node = {'status': {'capacity': {'memory': '2000Ki', 'cpu': '1'}}}
+        mock_list_node = mock_k8s_api.return_value.list_node
+        mock_list_node.side_effect = [list_response([node], 'page-2'),
+                                      list_response([node])]
+        mock_k8s_api.return_value.list_namespaced_pod.return_value = (
+            list_response([]))
+
+        self.k8s_monitor.pull_data()
+        self.assertEqual(self.k8s_monitor.data['nodes'],
+                         [{'Memory': 2048000.0, 'Cpu': 1}] * 2)
+        self.assertEqual(self.k8s_monitor.data['pods'], [])
+        mock_list_node.assert_has_calls([
+            mock.call(limit=1, _preload_content=False),
+            mock.call(limit=1, _preload_content=False, _continue='page-2')])
 
     def test_k8s_monitor_get_metric_names(self):
         k8s_metric_spec = 'magnum.drivers.common.k8s_monitor.K8sMonitor.'\
@@ -442,16 +461,9 @@ class MonitorsTestCase(base.TestCase):
 
     @mock.patch('magnum.conductor.k8s_api.create_k8s_api')
     def test_k8s_monitor_health_healthy(self, mock_k8s_api):
-        mock_nodes = mock.MagicMock()
-        mock_node = mock.MagicMock()
         mock_api_client = mock.MagicMock()
-        mock_node.status = mock.MagicMock()
-        mock_node.metadata.name = 'k8s-cluster-node-0'
-        mock_node.status.conditions = [NODE_STATUS_CONDITION(type='Ready',
-                                                             status='True')]
-        mock_nodes.items = [mock_node]
-        mock_k8s_api.return_value.list_node.return_value = (
-            mock_nodes)
+        mock_k8s_api.return_value.list_node.return_value = list_response(
+            [k8s_node('k8s-cluster-node-0', 'True')])
         mock_k8s_api.return_value.api_client = mock_api_client
         mock_api_client.call_api.return_value = ('ok', None, None)
 
@@ -463,16 +475,9 @@ class MonitorsTestCase(base.TestCase):
 
     @mock.patch('magnum.conductor.k8s_api.create_k8s_api')
     def test_k8s_monitor_health_unhealthy_api(self, mock_k8s_api):
-        mock_nodes = mock.MagicMock()
-        mock_node = mock.MagicMock()
         mock_api_client = mock.MagicMock()
-        mock_node.status = mock.MagicMock()
-        mock_node.metadata.name = 'k8s-cluster-node-0'
-        mock_node.status.conditions = [NODE_STATUS_CONDITION(type='Ready',
-                                                             status='True')]
-        mock_nodes.items = [mock_node]
-        mock_k8s_api.return_value.list_node.return_value = (
-            mock_nodes)
+        mock_k8s_api.return_value.list_node.return_value = list_response(
+            [k8s_node('k8s-cluster-node-0', 'True')])
         mock_k8s_api.return_value.api_client = mock_api_client
         mock_api_client.call_api.side_effect = exception.MagnumException(
             message='failed')
@@ -485,23 +490,10 @@ class MonitorsTestCase(base.TestCase):
 
     @mock.patch('magnum.conductor.k8s_api.create_k8s_api')
     def test_k8s_monitor_health_unhealthy_node(self, mock_k8s_api):
-        mock_nodes = mock.MagicMock()
         mock_api_client = mock.MagicMock()
-
-        mock_node0 = mock.MagicMock()
-        mock_node0.status = mock.MagicMock()
-        mock_node0.metadata.name = 'k8s-cluster-node-0'
-        mock_node0.status.conditions = [NODE_STATUS_CONDITION(type='Ready',
-                                                              status='False')]
-        mock_node1 = mock.MagicMock()
-        mock_node1.status = mock.MagicMock()
-        mock_node1.metadata.name = 'k8s-cluster-node-1'
-        mock_node1.status.conditions = [NODE_STATUS_CONDITION(type='Ready',
-                                                              status='True')]
-
-        mock_nodes.items = [mock_node0, mock_node1]
-        mock_k8s_api.return_value.list_node.return_value = (
-            mock_nodes)
+        mock_k8s_api.return_value.list_node.return_value = list_response(
+            [k8s_node('k8s-cluster-node-0', 'False'),
+             k8s_node('k8s-cluster-node-1', 'True')])
         mock_k8s_api.return_value.api_client = mock_api_client
         mock_api_client.call_api.return_value = ('ok', None, None)
 
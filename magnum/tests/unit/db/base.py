@@ -71,3 +71,4 @@ class DbTestCase(base.TestCase):
             _DB_CACHE = Database(sqla_api, migration,
                                  sql_connection=CONF.database.connection)
         self.useFixture(_DB_CACHE)
+        sqla_api._TRUSTEE_CACHE = None
@@ -14,11 +14,13 @@
 #    under the License.
 
 """Tests for manipulating Clusters via the DB API"""
+import mock
 from oslo_utils import uuidutils
 import six
 
 from magnum.common import context
 from magnum.common import exception
+from magnum.db.sqlalchemy import api as sqla_api
 from magnum.objects.fields import ClusterStatus as cluster_status
 from magnum.tests.unit.db import base
 from magnum.tests.unit.db import utils
@@ -55,6 +57,20 @@ class DbClusterTestCase(base.DbTestCase):
         self.assertEqual(cluster.id, res.id)
         self.assertEqual(cluster.uuid, res.uuid)
 
+    def test_get_cluster_by_stack_id(self):
+        cluster = utils.create_test_cluster()
+        utils.create_nodegroups_for_cluster()
+        utils.create_test_nodegroup(name='extra', is_default=False,
+                                    uuid=uuidutils.generate_uuid(),
+                                    stack_id='extra-stack')
+        default_stack_id = utils.get_test_nodegroup()['stack_id']
+        for stack_id in (default_stack_id, 'extra-stack'):
+            res = self.dbapi.get_cluster_by_stack_id(self.context, stack_id)
+            self.assertEqual(cluster.uuid, res.uuid)
+        self.assertRaises(exception.ClusterNotFound,
+                          self.dbapi.get_cluster_by_stack_id,
+                          self.context, 'unknown-stack')
+
     def test_get_cluster_that_does_not_exist(self):
         self.assertRaises(exception.ClusterNotFound,
                           self.dbapi.get_cluster_by_id,
@@ -108,6 +124,24 @@ class DbClusterTestCase(base.DbTestCase):
         ret = self.dbapi.get_cluster_stats(self.context, 'proj2')
         self.assertEqual(ret, (1, 6))
 
+    def test_get_clusters_with_stale_node_counts(self):
+        cluster = utils.create_test_cluster()
+        utils.create_nodegroups_for_cluster(node_count=2, master_count=1)
+        self.assertEqual([],
+                         self.dbapi.get_clusters_with_stale_node_counts())
+
+        self.dbapi.update_cluster(cluster.uuid, {'node_count': 5})
+        stale = self.dbapi.get_clusters_with_stale_node_counts()
+        self.assertEqual([(cluster.uuid, 5, 1, 2, 1)],
+                         [tuple(row) for row in stale])
+
+        self.assertEqual(1, self.dbapi.sync_cluster_node_counts(
+            [cluster.uuid]))
+        self.assertEqual([],
+                         self.dbapi.get_clusters_with_stale_node_counts())
+        cluster = self.dbapi.get_cluster_by_uuid(self.context, cluster.uuid)
+        self.assertEqual(2, cluster.node_count)
+
     def test_get_cluster_list(self):
         uuids = []
         for i in range(1, 6):
@@ -131,6 +165,26 @@ class DbClusterTestCase(base.DbTestCase):
                           self.context,
                           sort_key='foo')
 
+    def test_get_cluster_list_sorted_by_node_count(self):
+        uuids = []
+        for node_count, master_count in ((3, 1), (1, 5), (2, 3)):
+            uuid = uuidutils.generate_uuid()
+            utils.create_test_cluster(uuid=uuid)
+            utils.create_nodegroups_for_cluster(
+                cluster_id=uuid, node_count=node_count,
+                master_count=master_count)
+            uuids.append(uuid)
+
+        res = self.dbapi.get_cluster_list(self.context, sort_key='node_count')
+        self.assertEqual([uuids[1], uuids[2], uuids[0]],
+                         [r.uuid for r in res])
+
+        res = self.dbapi.get_cluster_list(self.context,
+                                          sort_key='master_count',
+                                          sort_dir='desc')
+        self.assertEqual([uuids[1], uuids[2], uuids[0]],
+                         [r.uuid for r in res])
+
     def test_get_cluster_list_with_filters(self):
         ct1 = utils.get_test_cluster_template(id=1,
                                               uuid=uuidutils.generate_uuid())
@@ -220,6 +274,37 @@ class DbClusterTestCase(base.DbTestCase):
         res_uuids = [r.uuid for r in res]
         self.assertEqual(sorted(uuids), sorted(res_uuids))
 
+    @mock.patch.object(sqla_api, '_admin_keystone')
+    def test_get_cluster_list_by_trustee_caches_trustee_users(
+            self, mock_keystone):
+        kst = mock_keystone.return_value
+        kst.trustee_domain_id = 'trustee_domain'
+        kst.client.users.get.return_value.name = 'cluster_proj1_trustee'
+        cluster = utils.create_test_cluster(project_id='proj1')
+        utils.create_test_cluster(uuid=uuidutils.generate_uuid(),
+                                  project_id='proj2')
+        ctx = context.RequestContext(user_id='trustee_user',
+                                     domain_id='trustee_domain')
+
+        for _ in range(3):
+            res = self.dbapi.get_cluster_list(ctx)
+            self.assertEqual([cluster.uuid], [r.uuid for r in res])
+
+        # The trustee domain id is read on every query, the trustee user
+        # is only looked up once.
+        self.assertEqual(4, mock_keystone.call_count)
+        kst.client.users.get.assert_called_once_with('trustee_user')
+
+    @mock.patch.object(sqla_api, '_admin_keystone')
+    def test_get_cluster_list_trustee_cache_disabled(self, mock_keystone):
+        self.config(trustee_cache_size=0, group='trust')
+        kst = mock_keystone.return_value
+        kst.trustee_domain_id = 'trustee_domain'
+        utils.create_test_cluster()
+        for _ in range(2):
+            self.dbapi.get_cluster_list(self.context)
+        self.assertEqual(2, mock_keystone.call_count)
+
     def test_get_cluster_list_cluster_template_not_exist(self):
         utils.create_test_cluster()
         self.assertEqual(1, len(self.dbapi.get_cluster_list(self.context)))
@@ -117,6 +117,38 @@ class DbClusterTemplateTestCase(base.DbTestCase):
             self.context, ct['uuid'])
         self.assertEqual(ct['id'], cluster_template.id)
 
+    def test_get_cluster_templates_by_uuids(self):
+        ct1 = utils.create_test_cluster_template(
+            id=1, uuid=uuidutils.generate_uuid())
+        ct2 = utils.create_test_cluster_template(
+            id=2, uuid=uuidutils.generate_uuid(), name='ct2',
+            user_id='not_me', public=True)
+        utils.create_test_cluster_template(
+            id=3, uuid=uuidutils.generate_uuid(), name='ct3')
+        res = self.dbapi.get_cluster_templates_by_uuids(
+            self.context,
+            [ct1['uuid'], ct2['uuid'], uuidutils.generate_uuid()])
+        self.assertEqual(sorted([ct1['id'], ct2['id']]),
+                         sorted(ct.id for ct in res))
+
+    def test_get_cluster_template_versions(self):
+        ct1 = utils.create_test_cluster_template(
+            id=1, uuid=uuidutils.generate_uuid())
+        ct2 = utils.create_test_cluster_template(
+            id=2, uuid=uuidutils.generate_uuid(), name='ct2',
+            user_id='not_me', project_id='not_mine', public=True)
+        ct3 = utils.create_test_cluster_template(
+            id=3, uuid=uuidutils.generate_uuid(), name='ct3',
+            user_id='not_me', project_id='not_mine')
+        self.dbapi.update_cluster_template(ct1['uuid'], {'name': 'new'})
+        ct1 = self.dbapi.get_cluster_template_by_uuid(self.context,
+                                                      ct1['uuid'])
+        res = self.dbapi.get_cluster_template_versions(
+            self.context, [ct1['uuid'], ct2['uuid'], ct3['uuid']])
+        self.assertEqual({ct1['uuid']: (ct1['created_at'], ct1['updated_at']),
+                          ct2['uuid']: (ct2['created_at'], None)}, res)
+        self.assertIsNotNone(ct1['updated_at'])
+
     def test_get_cluster_template_that_does_not_exist(self):
         self.assertRaises(exception.ClusterTemplateNotFound,
                           self.dbapi.get_cluster_template_by_id,
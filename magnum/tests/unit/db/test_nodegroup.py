@@ -14,6 +14,7 @@
 #    under the License.
 
 """Tests for manipulating NodeGroups via the DB API"""
+import mock
 from oslo_utils import uuidutils
 
 from magnum.common import exception
@@ -118,6 +119,38 @@ class DbNodeGroupTestCase(base.DbTestCase):
         for uuid in uuids_not_in_cluster:
             self.assertNotIn(uuid, res_uuids)
 
+    def test_list_nodegroups_for_clusters(self):
+        uuids_in_clusters = []
+        for c in range(2):
+            cluster = utils.create_test_cluster(
+                id=c + 1, uuid=uuidutils.generate_uuid())
+            for i in range(2):
+                ng = utils.create_test_nodegroup(
+                    uuid=uuidutils.generate_uuid(),
+                    name='test%(id)s' % {'id': i},
+                    cluster_id=cluster.uuid)
+                uuids_in_clusters.append((cluster.uuid, ng.uuid))
+        ng = utils.create_test_nodegroup(uuid=uuidutils.generate_uuid(),
+                                         cluster_id='fake_cluster')
+        cluster_ids = sorted(set(c for c, _ in uuids_in_clusters))
+        res = self.dbapi.list_nodegroups_for_clusters(self.context,
+                                                      cluster_ids)
+        self.assertEqual(uuids_in_clusters,
+                         [(r.cluster_id, r.uuid) for r in res])
+
+    @mock.patch('magnum.db.sqlalchemy.api.IN_CLAUSE_CHUNK_SIZE', 2)
+    def test_list_nodegroups_for_clusters_chunked(self):
+        cluster_ids = []
+        for c in range(5):
+            cluster = utils.create_test_cluster(
+                id=c + 1, uuid=uuidutils.generate_uuid())
+            utils.create_test_nodegroup(uuid=uuidutils.generate_uuid(),
+                                        cluster_id=cluster.uuid)
+            cluster_ids.append(cluster.uuid)
+        res = self.dbapi.list_nodegroups_for_clusters(self.context,
+                                                      cluster_ids)
+        self.assertEqual(cluster_ids, [r.cluster_id for r in res])
+
     def test_get_cluster_list_sorted(self):
         uuids = []
         cluster = utils.create_test_cluster(uuid=uuidutils.generate_uuid())
@@ -226,3 +259,29 @@ class DbNodeGroupTestCase(base.DbTestCase):
         self.assertRaises(exception.NodeGroupNotFound,
                           self.dbapi.update_nodegroup, "c_uuid", uuid,
                           {'node_count': 5})
+
+    def _get_node_counts(self, cluster_uuid):
+        cluster = self.dbapi.get_cluster_by_uuid(self.context, cluster_uuid)
+        return cluster.node_count, cluster.master_count
+
+    def test_nodegroup_operations_update_cluster_node_counts(self):
+        cluster = utils.create_test_cluster()
+        self.assertEqual((0, 0), self._get_node_counts(cluster.uuid))
+
+        utils.create_nodegroups_for_cluster(node_count=3, master_count=1)
+        self.assertEqual((3, 1), self._get_node_counts(cluster.uuid))
+
+        extra = utils.create_test_nodegroup(
+            uuid=uuidutils.generate_uuid(), name='extra', node_count=2)
+        self.assertEqual((5, 1), self._get_node_counts(cluster.uuid))
+
+        self.dbapi.update_nodegroup(cluster.uuid, extra.uuid,
+                                    {'node_count': 7})
+        self.assertEqual((10, 1), self._get_node_counts(cluster.uuid))
+
+        self.dbapi.update_nodegroup(cluster.uuid, extra.uuid,
+                                    {'role': 'master'})
+        self.assertEqual((3, 8), self._get_node_counts(cluster.uuid))
+
+        self.dbapi.destroy_nodegroup(cluster.uuid, extra.uuid)
+        self.assertEqual((3, 1), self._get_node_counts(cluster.uuid))
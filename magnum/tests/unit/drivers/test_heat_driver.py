@@ -10,13 +10,18 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import os
+import tempfile
+
 import mock
 from mock import patch
 
+from heatclient.common import template_utils
 from heatclient import exc as heatexc
 
 import magnum.conf
 from magnum.drivers.heat import driver as heat_driver
+from magnum.drivers.heat import template_cache
 from magnum.drivers.k8s_fedora_atomic_v1 import driver as k8s_atomic_dr
 from magnum import objects
 from magnum.objects.fields import ClusterStatus as cluster_status
@@ -59,6 +64,7 @@ class TestHeatPoller(base.TestCase):
         stack = mock.MagicMock(stack_status=stack_status,
                                stack_status_reason=status_reason,
                                parameters=stack_params)
+        stack.output_show.side_effect = heatexc.NotFound("no output")
         # In order to simulate a stack not found from osc we don't add the
         # stack in the dict.
         if not stack_missing:
@@ -156,6 +162,40 @@ class TestHeatPoller(base.TestCase):
         self.assertEqual(cluster_status.CREATE_COMPLETE, cluster.status)
         self.assertEqual(1, cluster.save.call_count)
 
+    def test_poll_and_check_fetches_shared_stack_once(self):
+        cluster, poller = self.setup_poll_test()
+        stacks = poller.openstack_client.heat.return_value.stacks
+        stacks.get = mock.MagicMock(side_effect=stacks.get)
+
+        poller.poll_and_check()
+
+        stacks.get.assert_called_once_with('stack1', resolve_outputs=False)
+
+    def test_poll_and_check_shows_outputs_once(self):
+        cluster, poller = self.setup_poll_test()
+        stack = self.mock_stacks['stack1']
+        outputs = {'api_address': '172.24.4.3',
+                   'kube_masters': ['172.24.4.4'],
+                   'kube_minions': ['172.24.4.5', '172.24.4.6']}
+
+        def output_show(key):
+            if key not in outputs:
+                raise heatexc.NotFound("no output")
+            return {'output': {'output_key': key,
+                               'output_value': outputs[key]}}
+
+        stack.output_show.side_effect = output_show
+
+        poller.poll_and_check()
+
+        keys = [c[0][0] for c in stack.output_show.call_args_list]
+        self.assertEqual(len(set(keys)), len(keys))
+        self.assertIn('kube_masters', keys)
+        self.assertEqual(['172.24.4.4'], self.def_ngs[1].node_addresses)
+        self.assertEqual(['172.24.4.5', '172.24.4.6'],
+                         self.def_ngs[0].node_addresses)
+        stack.to_dict.assert_not_called()
+
     def test_poll_and_check_create_failed(self):
         cluster, poller = self.setup_poll_test(
             default_stack_status=cluster_status.CREATE_FAILED)
@@ -669,3 +709,106 @@ class TestHeatPoller(base.TestCase):
         for def_ng in self.def_ngs:
             self.assertEqual(cluster_status.CREATE_COMPLETE, def_ng.status)
         self.assertEqual(cluster_status.DELETE_COMPLETE, ng.status)
+
+
+class TestTemplateCache(base.TestCase):
+
+    def setUp(self):
+        super(TestTemplateCache, self).setUp()
+        self.template_dir = tempfile.mkdtemp()
+        self.template_path = self._write(
+            'cluster.yaml',
+            'heat_template_version: 2014-10-16\n'
+            'resources:\n'
+            '  master:\n'
+            '    type: master.yaml\n')
+        self.master_path = self._write(
+            'master.yaml', 'heat_template_version: 2014-10-16\n')
+        self.env_path = self._write(
+            'env.yaml', 'parameters:\n  foo: bar\n')
+
+        p = patch.object(template_utils, 'get_template_contents',
+                         wraps=template_utils.get_template_contents)
+        self.mock_get_template_contents = p.start()
+        self.addCleanup(p.stop)
+        p = patch.object(
+            template_utils, 'process_multiple_environments_and_files',
+            wraps=template_utils.process_multiple_environments_and_files)
+        self.mock_process_mult = p.start()
+        self.addCleanup(p.stop)
+
+    def _write(self, name, content):
+        path = os.path.join(self.template_dir, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def _template_loads(self):
+        # Nested templates are loaded through the same function.
+        return self.mock_get_template_contents.call_args_list.count(
+            mock.call(self.template_path))
+
+    def _touch(self, path):
+        mtime = os.stat(path).st_mtime + 10
+        os.utime(path, (mtime, mtime))
+
+    def test_get_template_contents_cached(self):
+        files, template = template_cache.get_template_contents(
+            self.template_path)
+        files_2, template_2 = template_cache.get_template_contents(
+            self.template_path)
+
+        self.assertEqual(1, self._template_loads())
+        self.assertEqual(files, files_2)
+        self.assertIs(template, template_2)
+        self.assertIn('file://' + self.master_path, files)
+
+    def test_get_template_contents_returns_copy(self):
+        files, template = template_cache.get_template_contents(
+            self.template_path)
+        files['extra'] = 'content'
+
+        files, template = template_cache.get_template_contents(
+            self.template_path)
+        self.assertNotIn('extra', files)
+
+    def test_get_template_contents_reloaded_on_change(self):
+        template_cache.get_template_contents(self.template_path)
+        self._touch(self.master_path)
+        template_cache.get_template_contents(self.template_path)
+
+        self.assertEqual(2, self._template_loads())
+
+    def test_get_template_contents_disabled(self):
+        CONF.set_override('cache_templates', False, group='cluster_heat')
+        template_cache.get_template_contents(self.template_path)
+        template_cache.get_template_contents(self.template_path)
+
+        self.assertEqual(2, self._template_loads())
+
+    def test_get_env_files_cached(self):
+        env_files, env_map = template_cache.get_env_files([self.env_path])
+        env_files_2, env_map_2 = template_cache.get_env_files(
+            [self.env_path])
+        self._touch(self.env_path)
+        template_cache.get_env_files([self.env_path])
+
+        self.assertEqual(2, self.mock_process_mult.call_count)
+        self.assertEqual(['file://' + self.env_path], env_files)
+        self.assertEqual(env_files, env_files_2)
+        self.assertEqual(env_map, env_map_2)
+
+    @patch('magnum.drivers.common.driver.Driver.get_driver')
+    @patch('magnum.drivers.common.driver.Driver.get_drivers')
+    def test_preload(self, mock_get_drivers, mock_get_driver):
+        mock_get_drivers.return_value = {('vm', 'fedora-atomic', 'k8s'): {}}
+        mock_driver = mock.MagicMock()
+        definition = mock_driver.get_template_definition.return_value
+        definition.template_path = self.template_path
+        mock_get_driver.return_value = mock_driver
+
+        template_cache.preload()
+        template_cache.get_template_contents(self.template_path)
+
+        mock_get_driver.assert_called_once_with('vm', 'fedora-atomic', 'k8s')
+        self.assertEqual(1, self._template_loads())
@@ -20,6 +20,7 @@ import six
 from magnum.common import exception
 import magnum.conf
 from magnum.drivers.common import driver
+from magnum.drivers.heat import driver as heat_driver
 from magnum.drivers.heat import template_def as cmn_tdef
 from magnum.drivers.k8s_coreos_v1 import driver as k8s_coreos_dr
 from magnum.drivers.k8s_coreos_v1 import template_def as k8s_coreos_tdef
@@ -33,6 +34,7 @@ from magnum.drivers.swarm_fedora_atomic_v1 import driver as swarm_dr
 from magnum.drivers.swarm_fedora_atomic_v1 import template_def as swarm_tdef
 from magnum.drivers.swarm_fedora_atomic_v2 import driver as swarm_v2_dr
 from magnum.drivers.swarm_fedora_atomic_v2 import template_def as swarm_v2_tdef
+from magnum import objects
 from magnum.tests import base
 
 from requests import exceptions as req_exceptions
@@ -56,6 +58,29 @@ class TemplateDefinitionTestCase(base.TestCase):
             self.assertEqual(expected_entry_point, actual_entry_point)
             expected_entry_point.load.assert_called_once_with(require=False)
 
+    @mock.patch.object(driver.driver, 'DriverManager')
+    @mock.patch.object(driver.Driver, 'get_drivers')
+    def test_get_driver_cached(self, mock_get_drivers, mock_manager):
+        self.addCleanup(driver.Driver.reload_drivers)
+        driver.Driver.reload_drivers()
+        mock_get_drivers.return_value = {
+            ('vm', 'fedora-atomic', 'kubernetes'):
+                {'entry_point_name': 'k8s_fedora_atomic_v1',
+                 'class': k8sa_dr.Driver}}
+        mock_manager.return_value.driver.side_effect = (
+            lambda: k8sa_dr.Driver())
+
+        first = driver.Driver.get_driver('vm', 'fedora-atomic', 'kubernetes')
+        second = driver.Driver.get_driver('vm', 'fedora-atomic', 'kubernetes')
+        self.assertIs(first, second)
+        mock_manager.assert_called_once_with('magnum.drivers',
+                                             'k8s_fedora_atomic_v1')
+
+        driver.Driver.reload_drivers()
+        third = driver.Driver.get_driver('vm', 'fedora-atomic', 'kubernetes')
+        self.assertIsNot(first, third)
+        self.assertEqual(2, mock_manager.call_count)
+
     @mock.patch('magnum.drivers.common.driver.Driver.get_driver')
     def test_get_vm_atomic_kubernetes_definition(self, mock_driver):
         mock_driver.return_value = k8sa_dr.Driver()
@@ -183,6 +208,68 @@ class TemplateDefinitionTestCase(base.TestCase):
         self.assertIn(mock_mapping_type.return_value,
                       definition.output_mappings)
 
+    def test_get_output(self):
+        definition = k8sa_dr.Driver().get_template_definition()
+        definition.add_output('api_address', cluster_attr='other_attr')
+
+        output = definition.get_output('api_address')
+
+        self.assertEqual('api_address', output.cluster_attr)
+        self.assertIsNone(definition.get_output('missing_output'))
+
+    def test_get_heat_param_first_mapping(self):
+        definition = k8sa_dr.Driver().get_template_definition()
+        definition.add_parameter('other_keypair', cluster_attr='keypair')
+        definition.add_parameter(
+            'ng_param', nodegroup_attr='flavor_id', nodegroup_uuid='ng-uuid',
+            param_class=cmn_tdef.NodeGroupParameterMapping)
+
+        self.assertEqual('ssh_key_name',
+                         definition.get_heat_param(cluster_attr='keypair'))
+        self.assertEqual(
+            'ng_param',
+            definition.get_heat_param(nodegroup_attr='flavor_id',
+                                      nodegroup_uuid='ng-uuid'))
+        self.assertIsNone(definition.get_heat_param(cluster_attr='missing'))
+
+    def test_update_outputs_resolves_stack_once(self):
+        definition = k8sa_dr.Driver().get_template_definition()
+        definition.add_output('key1', cluster_attr='attr1')
+        definition.add_output('key2', cluster_attr='attr2')
+        mock_stack = mock.MagicMock()
+        mock_stack.to_dict.return_value = {'outputs': [
+            {'output_key': 'key1', 'output_value': 'value1'},
+            {'output_key': 'key2', 'output_value': 'value2'},
+        ]}
+        mock_cluster_template = mock.MagicMock()
+        mock_cluster = mock.MagicMock()
+
+        cmn_tdef.TemplateDefinition.update_outputs(
+            definition, mock_stack, mock_cluster_template, mock_cluster)
+
+        mock_stack.to_dict.assert_called_once_with()
+        self.assertEqual('value1', mock_cluster.attr1)
+        self.assertEqual('value2', mock_cluster.attr2)
+
+    @mock.patch('magnum.objects.NodeGroup.list')
+    def test_nodegroups_loaded(self, mock_ng_list):
+        mock_ng = mock.MagicMock()
+        mock_ng_list.return_value = [mock_ng]
+        cluster = objects.Cluster(self.context, uuid='cluster-uuid')
+
+        with cmn_tdef.nodegroups_loaded(cluster):
+            self.assertEqual([mock_ng], cluster.nodegroups)
+            with cmn_tdef.nodegroups_loaded(cluster):
+                self.assertEqual([mock_ng], cluster.nodegroups)
+        mock_ng_list.assert_called_once_with(self.context, 'cluster-uuid')
+
+        self.assertEqual([mock_ng], cluster.nodegroups)
+        self.assertEqual(2, mock_ng_list.call_count)
+
+    def test_nodegroups_loaded_not_a_cluster(self):
+        with cmn_tdef.nodegroups_loaded(None):
+            pass
+
     def test_add_fip_env_lb_disabled_with_fp(self):
         mock_cluster_template = mock.MagicMock(floating_ip_enabled=True,
                                                master_lb_enabled=False,
@@ -1614,6 +1701,24 @@ class AtomicSwarmModeTemplateDefinitionTestCase(base.TestCase):
             is_master=True
         )
 
+    def test_update_outputs_master_address_shows_outputs(self):
+        definition = self.get_definition()
+        outputs = {'swarm_primary_master': ['10.0.0.1'],
+                   'swarm_secondary_masters': ['10.0.0.2', '10.0.0.3']}
+        mock_heat = mock.MagicMock()
+        mock_stack = mock.MagicMock()
+        mock_stack.output_show.side_effect = lambda key: {
+            'output': {'output_key': key, 'output_value': outputs.get(key)}}
+        stack = heat_driver.OnDemandOutputsStack(mock_heat, mock_stack)
+        mock_cluster_template = mock.MagicMock(floating_ip_enabled=True)
+
+        definition.update_outputs(stack, mock_cluster_template,
+                                  self.mock_cluster)
+
+        self.assertEqual(['10.0.0.1', '10.0.0.2', '10.0.0.3'],
+                         self.master_ng.node_addresses)
+        mock_heat.stacks.get.assert_not_called()
+
     def test_update_outputs_node_address(self):
         self._test_update_outputs_server_address(
             public_ip_output_key='swarm_nodes',
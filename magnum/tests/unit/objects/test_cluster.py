@@ -70,6 +70,18 @@ class TestClusterObject(base.DbTestCase):
             self.assertEqual(cluster.cluster_template_id,
                              cluster.cluster_template.uuid)
 
+    @mock.patch('magnum.objects.ClusterTemplate.get_by_uuid')
+    def test_get_by_stack_id(self, mock_cluster_template_get):
+        stack_id = self.fake_cluster['stack_id']
+        with mock.patch.object(self.dbapi, 'get_cluster_by_stack_id',
+                               autospec=True) as mock_get_cluster:
+            mock_cluster_template_get.return_value = self.fake_cluster_template
+            mock_get_cluster.return_value = self.fake_cluster
+            cluster = objects.Cluster.get_by_stack_id(self.context, stack_id)
+            mock_get_cluster.assert_called_once_with(self.context, stack_id)
+            self.assertEqual(self.context, cluster._context)
+            self.assertEqual(self.fake_cluster['uuid'], cluster.uuid)
+
     @mock.patch('magnum.objects.ClusterTemplate.get_by_uuid')
     def test_get_by_name(self, mock_cluster_template_get):
         name = self.fake_cluster['name']
@@ -101,6 +113,105 @@ class TestClusterObject(base.DbTestCase):
             self.assertEqual(clusters[0].cluster_template_id,
                              clusters[0].cluster_template.uuid)
 
+    def test_list_loads_related_objects_in_bulk(self):
+        ct = utils.create_test_cluster_template()
+        for i in range(3):
+            cluster_uuid = uuidutils.generate_uuid()
+            utils.create_test_cluster(id=i + 1, uuid=cluster_uuid,
+                                      name='cluster%d' % i,
+                                      cluster_template_id=ct['uuid'])
+            utils.create_nodegroups_for_cluster(cluster_id=cluster_uuid,
+                                                node_count=i + 1)
+
+        with mock.patch.object(self.dbapi, 'get_cluster_templates_by_uuids',
+                               wraps=self.dbapi.get_cluster_templates_by_uuids
+                               ) as mock_get_templates, \
+                mock.patch.object(self.dbapi, 'list_nodegroups_for_clusters',
+                                  wraps=self.dbapi.list_nodegroups_for_clusters
+                                  ) as mock_list_ngs, \
+                mock.patch.object(self.dbapi, 'list_cluster_nodegroups'
+                                  ) as mock_list_cluster_ngs:
+            clusters = objects.Cluster.list(self.context)
+            self.assertEqual([1, 2, 3], [c.node_count for c in clusters])
+            self.assertEqual([3, 3, 3], [c.master_count for c in clusters])
+            for cluster in clusters:
+                self.assertEqual('master', cluster.default_ng_master.role)
+                self.assertEqual('worker', cluster.default_ng_worker.role)
+                self.assertIs(clusters[0].cluster_template,
+                              cluster.cluster_template)
+
+        self.assertEqual(1, mock_get_templates.call_count)
+        self.assertEqual(1, mock_list_ngs.call_count)
+        self.assertFalse(mock_list_cluster_ngs.called)
+
+    def test_preload_nodegroups(self):
+        ct = utils.create_test_cluster_template()
+        utils.create_test_cluster(uuid=self.fake_cluster['uuid'],
+                                  cluster_template_id=ct['uuid'])
+        utils.create_nodegroups_for_cluster()
+        cluster = objects.Cluster.get_by_uuid(self.context,
+                                              self.fake_cluster['uuid'])
+
+        with mock.patch.object(self.dbapi, 'list_cluster_nodegroups',
+                               wraps=self.dbapi.list_cluster_nodegroups
+                               ) as mock_list:
+            with cluster.preload_nodegroups():
+                self.assertEqual('master', cluster.default_ng_master.role)
+                self.assertEqual('worker', cluster.default_ng_worker.role)
+                cluster.as_dict()
+            self.assertEqual(1, mock_list.call_count)
+
+            self.assertEqual(2, len(cluster.nodegroups))
+            self.assertEqual(2, mock_list.call_count)
+
+    def test_get_by_uuid_does_not_preload_nodegroups(self):
+        ct = utils.create_test_cluster_template()
+        utils.create_test_cluster(uuid=self.fake_cluster['uuid'],
+                                  cluster_template_id=ct['uuid'])
+        utils.create_nodegroups_for_cluster()
+        cluster = objects.Cluster.get_by_uuid(self.context,
+                                              self.fake_cluster['uuid'])
+        self.assertEqual(2, len(cluster.nodegroups))
+
+        utils.create_test_nodegroup(cluster_id=cluster.uuid, name='extra',
+                                    uuid=uuidutils.generate_uuid())
+        self.assertEqual(3, len(cluster.nodegroups))
+
+    def test_as_dict_reads_node_count_columns(self):
+        ct = utils.create_test_cluster_template()
+        utils.create_test_cluster(uuid=self.fake_cluster['uuid'],
+                                  cluster_template_id=ct['uuid'])
+        utils.create_nodegroups_for_cluster(node_count=2, master_count=1)
+        self.dbapi.update_cluster(self.fake_cluster['uuid'],
+                                  {'node_count': 7, 'master_count': 5})
+
+        cluster = objects.Cluster.get_by_uuid(self.context,
+                                              self.fake_cluster['uuid'])
+        with mock.patch.object(objects.NodeGroup, 'list',
+                               wraps=objects.NodeGroup.list) as mock_list:
+            cluster_dict = cluster.as_dict()
+            self.assertEqual(1, mock_list.call_count)
+        self.assertEqual(7, cluster_dict['node_count'])
+        self.assertEqual(5, cluster_dict['master_count'])
+
+    def test_as_dict_node_counts_refreshed_on_nodegroup_change(self):
+        ct = utils.create_test_cluster_template()
+        utils.create_test_cluster(uuid=self.fake_cluster['uuid'],
+                                  cluster_template_id=ct['uuid'])
+        utils.create_nodegroups_for_cluster(node_count=2, master_count=1)
+
+        for cluster in (objects.Cluster.list(self.context)[0],
+                        objects.Cluster.get_by_uuid(
+                            self.context, self.fake_cluster['uuid'])):
+            worker = cluster.default_ng_worker
+            worker.node_count += 2
+            worker.save()
+            cluster_dict = cluster.as_dict()
+            self.assertEqual(worker.node_count, cluster_dict['node_count'])
+            self.assertEqual(cluster.node_count, cluster_dict['node_count'])
+            self.assertEqual(cluster.master_count,
+                             cluster_dict['master_count'])
+
     @mock.patch('magnum.objects.ClusterTemplate.get_by_uuid')
     def test_list_all(self, mock_cluster_template_get):
         with mock.patch.object(self.dbapi, 'get_cluster_list',
@@ -13,12 +13,16 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import datetime
+
 import mock
+from oslo_utils import timeutils
 from oslo_utils import uuidutils
 from testtools.matchers import HasLength
 
 from magnum.common import exception
 from magnum import objects
+from magnum.objects import cluster_template as ct_object
 from magnum.tests.unit.db import base
 from magnum.tests.unit.db import utils
 
@@ -29,6 +33,12 @@ class TestClusterTemplateObject(base.DbTestCase):
         super(TestClusterTemplateObject, self).setUp()
         self.fake_cluster_template = utils.get_test_cluster_template()
 
+    def _create_settled_cluster_template(self, **kw):
+        # Templates changed within the last second are not cached.
+        kw.setdefault('created_at',
+                      timeutils.utcnow() - datetime.timedelta(minutes=1))
+        return utils.create_test_cluster_template(**kw)
+
     def test_get_by_id(self):
         cluster_template_id = self.fake_cluster_template['id']
         with mock.patch.object(self.dbapi, 'get_cluster_template_by_id',
@@ -142,3 +152,156 @@ class TestClusterTemplateObject(base.DbTestCase):
             self.assertEqual(expected,
                              mock_get_cluster_template.call_args_list)
             self.assertEqual(self.context, cluster_template._context)
+
+    def test_get_by_uuid_cached(self):
+        ct = self._create_settled_cluster_template()
+        with mock.patch.object(
+                self.dbapi, 'get_cluster_template_by_uuid',
+                wraps=self.dbapi.get_cluster_template_by_uuid) as mock_get:
+            first = objects.ClusterTemplate.get_by_uuid(self.context,
+                                                        ct['uuid'])
+            second = objects.ClusterTemplate.get_by_uuid(self.context,
+                                                         ct['uuid'])
+            self.assertEqual(1, mock_get.call_count)
+        self.assertIsNot(first, second)
+        self.assertEqual(first.as_dict(), second.as_dict())
+        self.assertEqual(self.context, second._context)
+
+        # Changes to a returned template do not leak into the cache.
+        second.name = 'changed'
+        third = objects.ClusterTemplate.get_by_uuid(self.context, ct['uuid'])
+        self.assertEqual(ct['name'], third.name)
+
+    def test_get_by_uuid_recently_changed_not_cached(self):
+        ct = utils.create_test_cluster_template(created_at=timeutils.utcnow())
+        with mock.patch.object(
+                self.dbapi, 'get_cluster_template_by_uuid',
+                wraps=self.dbapi.get_cluster_template_by_uuid) as mock_get:
+            objects.ClusterTemplate.get_by_uuid(self.context, ct['uuid'])
+            objects.ClusterTemplate.get_by_uuid(self.context, ct['uuid'])
+            self.assertEqual(2, mock_get.call_count)
+
+    def test_get_by_uuid_cache_disabled(self):
+        self.config(cache_size=0, group='cluster_template')
+        ct = self._create_settled_cluster_template()
+        with mock.patch.object(
+                self.dbapi, 'get_cluster_template_by_uuid',
+                wraps=self.dbapi.get_cluster_template_by_uuid) as mock_get:
+            objects.ClusterTemplate.get_by_uuid(self.context, ct['uuid'])
+            objects.ClusterTemplate.get_by_uuid(self.context, ct['uuid'])
+            self.assertEqual(2, mock_get.call_count)
+
+    def test_get_by_uuid_cached_checks_tenant(self):
+        ct = self._create_settled_cluster_template(public=False)
+        objects.ClusterTemplate.get_by_uuid(self.context, ct['uuid'])
+
+        other_context = self.context.to_dict()
+        other_context['project_id'] = 'other_project'
+        other_context = self.context.from_dict(other_context)
+        self.assertRaises(exception.ClusterTemplateNotFound,
+                          objects.ClusterTemplate.get_by_uuid,
+                          other_context, ct['uuid'])
+
+    def test_get_by_uuid_cached_public_for_other_tenant(self):
+        ct = self._create_settled_cluster_template(public=True)
+        objects.ClusterTemplate.get_by_uuid(self.context, ct['uuid'])
+
+        other_context = self.context.to_dict()
+        other_context['project_id'] = 'other_project'
+        other_context = self.context.from_dict(other_context)
+        with mock.patch.object(
+                self.dbapi, 'get_cluster_template_by_uuid',
+                wraps=self.dbapi.get_cluster_template_by_uuid) as mock_get:
+            cluster_template = objects.ClusterTemplate.get_by_uuid(
+                other_context, ct['uuid'])
+            self.assertFalse(mock_get.called)
+        self.assertEqual(other_context, cluster_template._context)
+
+        # Made private without going through this process' objects.
+        self.dbapi.update_cluster_template(ct['uuid'], {'public': False})
+        self.assertRaises(exception.ClusterTemplateNotFound,
+                          objects.ClusterTemplate.get_by_uuid,
+                          other_context, ct['uuid'])
+
+    def test_get_by_uuid_sees_update_from_other_process(self):
+        ct = self._create_settled_cluster_template()
+        objects.ClusterTemplate.get_by_uuid(self.context, ct['uuid'])
+        cache = ct_object._CACHE
+        self.assertIsNotNone(cache.get(ct['uuid']))
+
+        # Another process, with its own cache, updates the template.
+        ct_object._CACHE = None
+        cluster_template = objects.ClusterTemplate.get_by_uuid(self.context,
+                                                               ct['uuid'])
+        cluster_template.image_id = 'new-image'
+        cluster_template.save()
+
+        ct_object._CACHE = cache
+        self.assertIsNotNone(cache.get(ct['uuid']))
+        self.assertEqual('new-image', objects.ClusterTemplate.get_by_uuid(
+            self.context, ct['uuid']).image_id)
+
+    def test_get_by_uuid_sees_delete_from_other_process(self):
+        ct = self._create_settled_cluster_template()
+        objects.ClusterTemplate.get_by_uuid(self.context, ct['uuid'])
+        self.assertIsNotNone(ct_object._CACHE.get(ct['uuid']))
+
+        self.dbapi.destroy_cluster_template(ct['uuid'])
+        self.assertRaises(exception.ClusterTemplateNotFound,
+                          objects.ClusterTemplate.get_by_uuid,
+                          self.context, ct['uuid'])
+
+    def test_save_and_destroy_invalidate_cache(self):
+        ct = self._create_settled_cluster_template()
+        cluster_template = objects.ClusterTemplate.get_by_uuid(self.context,
+                                                               ct['uuid'])
+        cluster_template.image_id = 'new-image'
+        cluster_template.save()
+        self.assertEqual('new-image', objects.ClusterTemplate.get_by_uuid(
+            self.context, ct['uuid']).image_id)
+
+        cluster_template.destroy()
+        self.assertRaises(exception.ClusterTemplateNotFound,
+                          objects.ClusterTemplate.get_by_uuid,
+                          self.context, ct['uuid'])
+
+    def test_stale_load_not_cached_after_invalidation(self):
+        ct = self._create_settled_cluster_template()
+        real_get = self.dbapi.get_cluster_template_by_uuid
+
+        def get_and_update(context, uuid):
+            db_cluster_template = real_get(context, uuid)
+            # Another request updates the template while this one loads it.
+            updated = objects.ClusterTemplate._from_db_object(
+                objects.ClusterTemplate(context), real_get(context, uuid))
+            updated.image_id = 'new-image'
+            updated.save()
+            return db_cluster_template
+
+        with mock.patch.object(self.dbapi, 'get_cluster_template_by_uuid',
+                               side_effect=get_and_update):
+            stale = objects.ClusterTemplate.get_by_uuid(self.context,
+                                                        ct['uuid'])
+        self.assertNotEqual('new-image', stale.image_id)
+        self.assertEqual('new-image', objects.ClusterTemplate.get_by_uuid(
+            self.context, ct['uuid']).image_id)
+
+    def test_list_by_uuids_loads_only_missing(self):
+        ct1 = self._create_settled_cluster_template(
+            id=1, uuid=uuidutils.generate_uuid())
+        ct2 = self._create_settled_cluster_template(
+            id=2, uuid=uuidutils.generate_uuid())
+        objects.ClusterTemplate.get_by_uuid(self.context, ct1['uuid'])
+        with mock.patch.object(
+                self.dbapi, 'get_cluster_templates_by_uuids',
+                wraps=self.dbapi.get_cluster_templates_by_uuids) as mock_list:
+            cluster_templates = objects.ClusterTemplate.list_by_uuids(
+                self.context, [ct1['uuid'], ct2['uuid']])
+            mock_list.assert_called_once_with(self.context, [ct2['uuid']])
+            self.assertEqual(
+                sorted([ct1['uuid'], ct2['uuid']]),
+                sorted(ct.uuid for ct in cluster_templates))
+
+            objects.ClusterTemplate.list_by_uuids(
+                self.context, [ct1['uuid'], ct2['uuid']])
+            self.assertEqual(1, mock_list.call_count)
@@ -355,8 +355,8 @@ class TestObject(test_base.TestCase, _TestObject):
 # For more information on object version testing, read
 # https://docs.openstack.org/magnum/latest/contributor/objects.html
 object_data = {
-    'Cluster': '1.21-e28dc2dd599433a6249f7901ebf7b162',
-    'ClusterTemplate': '1.19-3b0b2b3933d0955abf3ab40111744960',
+    'Cluster': '1.22-94146f14a9479dcbbe920e29055910b5',
+    'ClusterTemplate': '1.20-7c72d0f44871d0c7277e68a8bdc6c8ed',
     'Certificate': '1.1-1924dc077daa844f0f9076332ef96815',
     'MyObj': '1.0-34c4b1aadefd177b13f9a2f894cc23cd',
     'X509KeyPair': '1.2-d81950af36c59a71365e33ce539d24f9',
@@ -364,7 +364,7 @@ object_data = {
     'Stats': '1.0-73a1cd6e3c0294c932a66547faba216c',
     'Quota': '1.0-94e100aebfa88f7d8428e007f2049c18',
     'Federation': '1.0-166da281432b083f0e4b851336e12e20',
-    'NodeGroup': '1.0-8cb4544a28a49860d816158a7c3060b1'
+    'NodeGroup': '1.1-100d453931159b7672c3c7f0c18bd845'
 }
 
 
@@ -0,0 +1,176 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import eventlet
+import mock
+import oslo_messaging as messaging
+from oslo_messaging.notify import notifier as oslo_notifier
+
+from magnum.common import exception
+from magnum.common.rpc_service import CONF
+from magnum import objects
+from magnum.objects.fields import ClusterStatus as cluster_status
+from magnum.service import heat_notifications
+from magnum.tests import base
+from magnum.tests.unit.db import utils
+
+
+STACK_ID = '047c6319-7abd-4bd9-a033-8c6af0173cd0'
+STACK_ARN = ('arn:openstack:heat::fake_project:stacks/cluster1-abcdef/%s'
+             % STACK_ID)
+
+
+class HeatNotificationEndpointTestCase(base.TestCase):
+
+    def setUp(self):
+        super(HeatNotificationEndpointTestCase, self).setUp()
+        self.periodic_tasks = mock.MagicMock()
+        self.endpoint = heat_notifications.HeatNotificationEndpoint(
+            self.periodic_tasks)
+        self.cluster = objects.Cluster(
+            self.context,
+            **utils.get_test_cluster(stack_id=STACK_ID,
+                                     status=cluster_status.CREATE_IN_PROGRESS))
+        p = mock.patch('magnum.objects.Cluster.get_by_stack_id')
+        self.mock_get_by_stack_id = p.start()
+        self.mock_get_by_stack_id.return_value = self.cluster
+        self.addCleanup(p.stop)
+
+    def test_get_stack_id(self):
+        self.assertEqual(STACK_ID, heat_notifications._get_stack_id(
+            {'stack_identity': STACK_ARN}))
+        self.assertEqual(STACK_ID, heat_notifications._get_stack_id(
+            {'stack_identity': STACK_ID}))
+        self.assertIsNone(heat_notifications._get_stack_id({}))
+
+    def test_info_syncs_cluster(self):
+        self.endpoint.info({}, 'orchestration.host',
+                           'orchestration.stack.create.end',
+                           {'stack_identity': STACK_ARN}, {})
+        self.mock_get_by_stack_id.assert_called_once_with(mock.ANY, STACK_ID)
+        self.periodic_tasks.submit_status_sync.assert_called_once_with(
+            mock.ANY, self.cluster)
+
+    def test_error_syncs_cluster(self):
+        self.endpoint.error({}, 'orchestration.host',
+                            'orchestration.stack.update.error',
+                            {'stack_identity': STACK_ARN}, {})
+        self.periodic_tasks.submit_status_sync.assert_called_once_with(
+            mock.ANY, self.cluster)
+
+    def test_cluster_not_in_progress(self):
+        self.cluster.status = cluster_status.CREATE_COMPLETE
+        self.endpoint.info({}, 'orchestration.host',
+                           'orchestration.stack.create.end',
+                           {'stack_identity': STACK_ARN}, {})
+        self.periodic_tasks.submit_status_sync.assert_not_called()
+
+    def test_unknown_stack(self):
+        self.mock_get_by_stack_id.side_effect = exception.ClusterNotFound(
+            cluster=STACK_ID)
+        self.endpoint.info({}, 'orchestration.host',
+                           'orchestration.stack.create.end',
+                           {'stack_identity': STACK_ARN}, {})
+        self.periodic_tasks.submit_status_sync.assert_not_called()
+
+    def test_no_stack_in_payload(self):
+        self.endpoint.info({}, 'orchestration.host',
+                           'orchestration.stack.create.end', {}, {})
+        self.mock_get_by_stack_id.assert_not_called()
+        self.periodic_tasks.submit_status_sync.assert_not_called()
+
+
+class HeatNotificationListenerTestCase(base.TestCase):
+
+    def setUp(self):
+        super(HeatNotificationListenerTestCase, self).setUp()
+        self.transport = messaging.get_notification_transport(
+            CONF, url='fake:/')
+        self.addCleanup(self.transport.cleanup)
+
+    def test_get_listener(self):
+        self.config(notification_topics=['notifications', 'heat'],
+                    notification_pool='test-pool', group='cluster_heat')
+        periodic_tasks = mock.MagicMock()
+        with mock.patch.object(
+                messaging, 'get_notification_listener',
+                wraps=messaging.get_notification_listener) as mock_listener:
+            listener = heat_notifications.get_listener(
+                periodic_tasks, transport=self.transport)
+
+        self.assertEqual(['notifications', 'heat'],
+                         [t.topic for t in listener.targets])
+        self.assertEqual(set(['heat']),
+                         set(t.exchange for t in listener.targets))
+        endpoints = listener.dispatcher.endpoints
+        self.assertEqual(1, len(endpoints))
+        self.assertIs(periodic_tasks, endpoints[0].periodic_tasks)
+        mock_listener.assert_called_once_with(
+            self.transport, mock.ANY, mock.ANY, executor='eventlet',
+            pool='test-pool')
+
+    def test_get_listener_sharded_shares_pool(self):
+        self.config(notification_pool='test-pool', group='cluster_heat')
+        self.config(shard_clusters=True, group='periodic')
+        self.config(host='host1')
+        with mock.patch.object(messaging,
+                               'get_notification_listener') as mock_listener:
+            heat_notifications.get_listener(mock.MagicMock(),
+                                            transport=self.transport)
+        mock_listener.assert_called_once_with(
+            self.transport, mock.ANY, mock.ANY, executor='eventlet',
+            pool='test-pool')
+
+    @mock.patch('magnum.objects.Cluster.get_by_stack_id')
+    def test_notification_syncs_cluster(self, mock_get_by_stack_id):
+        cluster = objects.Cluster(
+            self.context,
+            **utils.get_test_cluster(stack_id=STACK_ID,
+                                     status=cluster_status.CREATE_IN_PROGRESS))
+        mock_get_by_stack_id.return_value = cluster
+        synced = eventlet.event.Event()
+        periodic_tasks = mock.MagicMock()
+        periodic_tasks.submit_status_sync.side_effect = (
+            lambda ctx, cluster: synced.send(cluster))
+
+        # Heat publishes to the default exchange of its own transport.
+        self.config(control_exchange='heat')
+        transport = messaging.get_notification_transport(CONF, url='fake:/')
+        self.addCleanup(transport.cleanup)
+        listener = heat_notifications.get_listener(periodic_tasks,
+                                                   transport=transport)
+        listener.start()
+        self.addCleanup(listener.wait)
+        self.addCleanup(listener.stop)
+        # messaging.Notifier is replaced by a fake in the tests.
+        notifier = oslo_notifier.Notifier(
+            transport, publisher_id='orchestration.host',
+            driver='messaging', topics=['notifications'])
+        notifier.info({}, 'orchestration.stack.create.end',
+                      {'stack_identity': STACK_ARN})
+
+        with eventlet.timeout.Timeout(10):
+            self.assertIs(cluster, synced.wait())
+        mock_get_by_stack_id.assert_called_once_with(mock.ANY, STACK_ID)
+
+    def test_filter_rule(self):
+        rule = heat_notifications.HeatNotificationEndpoint.filter_rule
+        for event_type in ('orchestration.stack.create.end',
+                           'orchestration.stack.update.error',
+                           'orchestration.stack.delete.end'):
+            self.assertTrue(rule.match({}, 'orchestration.host', event_type,
+                                       {}, {}))
+        for event_type in ('orchestration.stack.create.start',
+                           'orchestration.autoscaling.end',
+                           'compute.instance.create.end'):
+            self.assertFalse(rule.match({}, 'orchestration.host',
+                                        event_type, {}, {}))
@@ -12,8 +12,12 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import datetime
+
+from eventlet import timeout as eventlet_timeout
 import mock
 
+from oslo_service import loopingcall
 from oslo_utils import uuidutils
 
 from magnum.common import context
@@ -66,35 +70,40 @@ class PeriodicTestCase(base.TestCase):
         trust_attrs.update({'id': 1, 'stack_id': '11', 'uuid': uuid,
                             'status': cluster_status.CREATE_IN_PROGRESS,
                             'status_reason': 'no change',
-                            'keypair': 'keipair1', 'health_status': None})
+                            'keypair': 'keipair1', 'health_status': None,
+                            'health_status_reason': {}})
         cluster1 = utils.get_test_cluster(**trust_attrs)
         ngs1 = utils.get_nodegroups_for_cluster()
         uuid = uuidutils.generate_uuid()
         trust_attrs.update({'id': 2, 'stack_id': '22', 'uuid': uuid,
                             'status': cluster_status.DELETE_IN_PROGRESS,
                             'status_reason': 'no change',
-                            'keypair': 'keipair1', 'health_status': None})
+                            'keypair': 'keipair1', 'health_status': None,
+                            'health_status_reason': {}})
         cluster2 = utils.get_test_cluster(**trust_attrs)
         ngs2 = utils.get_nodegroups_for_cluster()
         uuid = uuidutils.generate_uuid()
         trust_attrs.update({'id': 3, 'stack_id': '33', 'uuid': uuid,
                             'status': cluster_status.UPDATE_IN_PROGRESS,
                             'status_reason': 'no change',
-                            'keypair': 'keipair1', 'health_status': None})
+                            'keypair': 'keipair1', 'health_status': None,
+                            'health_status_reason': {}})
         cluster3 = utils.get_test_cluster(**trust_attrs)
         ngs3 = utils.get_nodegroups_for_cluster()
         uuid = uuidutils.generate_uuid()
         trust_attrs.update({'id': 4, 'stack_id': '44', 'uuid': uuid,
                             'status': cluster_status.DELETE_IN_PROGRESS,
                             'status_reason': 'no change',
-                            'keypair': 'keipair1', 'health_status': None})
+                            'keypair': 'keipair1', 'health_status': None,
+                            'health_status_reason': {}})
         cluster4 = utils.get_test_cluster(**trust_attrs)
         ngs4 = utils.get_nodegroups_for_cluster()
         uuid = uuidutils.generate_uuid()
         trust_attrs.update({'id': 5, 'stack_id': '55', 'uuid': uuid,
                             'status': cluster_status.ROLLBACK_IN_PROGRESS,
                             'status_reason': 'no change',
-                            'keypair': 'keipair1', 'health_status': None})
+                            'keypair': 'keipair1', 'health_status': None,
+                            'health_status_reason': {}})
         cluster5 = utils.get_test_cluster(**trust_attrs)
         ngs5 = utils.get_nodegroups_for_cluster()
 
@@ -468,3 +477,272 @@ class PeriodicTestCase(base.TestCase):
                          self.cluster4.health_status)
         self.assertEqual({'api': 'ok', 'node-0.Ready': 'False'},
                          self.cluster4.health_status_reason)
+
+    def _make_service(self, host, up=True, disabled=False,
+                      binary='magnum-conductor'):
+        service = objects.MagnumService(self.context, host=host,
+                                        binary=binary, disabled=disabled,
+                                        forced_down=False)
+        service.up = up
+        return service
+
+    @mock.patch('oslo_service.loopingcall.FixedIntervalLoopingCall',
+                new=fakes.FakeLoopingCall)
+    @mock.patch('magnum.objects.MagnumService.list')
+    @mock.patch('magnum.drivers.common.driver.Driver.get_driver_for_cluster')
+    @mock.patch('magnum.objects.Cluster.list')
+    def test_sync_cluster_status_sharded(self, mock_cluster_list,
+                                         mock_get_driver,
+                                         mock_service_list):
+        self.config(shard_clusters=True, group='periodic')
+        self.config(host='host1')
+        mock_cluster_list.return_value = [self.cluster1, self.cluster3,
+                                          self.cluster5]
+        mock_get_driver.return_value = self.mock_driver
+        mock_service_list.return_value = [
+            self._make_service('host1'),
+            self._make_service('host2'),
+            self._make_service('host3', up=False),
+            self._make_service('host4', disabled=True),
+            self._make_service('host5', binary='magnum-api'),
+        ]
+
+        tasks = periodic.MagnumPeriodicTasks(CONF)
+        with mock.patch.object(tasks.servicegroup_api, 'service_is_up',
+                               side_effect=lambda s: s.up), \
+                mock.patch.object(dbapi.Connection, 'list_cluster_nodegroups',
+                                  mock_nodegroup_list):
+            ring = tasks._get_conductor_ring(self.context)
+            tasks.sync_cluster_status(None)
+
+        self.assertEqual(frozenset(['host1', 'host2']), ring.members)
+        synced = [c for c in (self.cluster1, self.cluster3, self.cluster5)
+                  if c.status_reason != 'no change']
+        expected = [c for c in (self.cluster1, self.cluster3, self.cluster5)
+                    if ring.get_member(c.uuid) == 'host1']
+        self.assertEqual(expected, synced)
+
+    @mock.patch('magnum.objects.MagnumService.list')
+    def test_get_conductor_ring_includes_self(self, mock_service_list):
+        self.config(host='host1')
+        mock_service_list.return_value = []
+        tasks = periodic.MagnumPeriodicTasks(CONF)
+        ring = tasks._get_conductor_ring(self.context)
+        self.assertEqual(frozenset(['host1']), ring.members)
+
+    @mock.patch('magnum.objects.MagnumService.list')
+    def test_get_own_clusters_not_sharded(self, mock_service_list):
+        clusters = [self.cluster1, self.cluster2]
+        tasks = periodic.MagnumPeriodicTasks(CONF)
+        self.assertEqual(clusters,
+                         tasks._get_own_clusters(self.context, clusters))
+        mock_service_list.assert_not_called()
+
+
+
+class DeferredLoopingCall(object):
+    """Fake looping call that only runs when explicitly told to"""
+
+    calls = []
+
+    def __init__(self, **kwargs):
+        self.call_func = kwargs.pop("f")
+
+    def start(self, interval, **kwargs):
+        DeferredLoopingCall.calls.append(self)
+
+    def run(self):
+        try:
+            self.call_func()
+        except loopingcall.LoopingCallDone:
+            pass
+
+
+@mock.patch('oslo_service.loopingcall.FixedIntervalLoopingCall',
+            new=DeferredLoopingCall)
+class ClusterSyncSchedulerTestCase(base.TestCase):
+
+    def setUp(self):
+        super(ClusterSyncSchedulerTestCase, self).setUp()
+        DeferredLoopingCall.calls = []
+        self.scheduler = periodic.ClusterSyncScheduler('test')
+
+    def _job(self):
+        return mock.MagicMock(side_effect=loopingcall.LoopingCallDone())
+
+    def test_submit_runs_job(self):
+        job = self._job()
+        self.assertTrue(self.scheduler.submit('c1', job))
+        self.assertTrue(self.scheduler.is_running('c1'))
+        DeferredLoopingCall.calls[0].run()
+        job.assert_called_once_with()
+        self.assertFalse(self.scheduler.is_running('c1'))
+        self.assertEqual(0, self.scheduler.running)
+
+    def test_submit_skips_in_flight_cluster(self):
+        self.config(sync_overlap_policy='skip', group='periodic')
+        job1 = self._job()
+        job2 = self._job()
+        self.assertTrue(self.scheduler.submit('c1', job1))
+        self.assertFalse(self.scheduler.submit('c1', job2))
+        DeferredLoopingCall.calls[0].run()
+        self.assertEqual(1, len(DeferredLoopingCall.calls))
+        job2.assert_not_called()
+        self.assertTrue(self.scheduler.submit('c1', job2))
+
+    def test_submit_coalesces_in_flight_cluster(self):
+        self.config(sync_overlap_policy='coalesce', group='periodic')
+        job1 = self._job()
+        job2 = self._job()
+        job3 = self._job()
+        self.scheduler.submit('c1', job1)
+        self.assertFalse(self.scheduler.submit('c1', job2))
+        self.assertFalse(self.scheduler.submit('c1', job3))
+        DeferredLoopingCall.calls[0].run()
+        # only the latest pending job is started once the first one is done
+        self.assertEqual(2, len(DeferredLoopingCall.calls))
+        self.assertTrue(self.scheduler.is_running('c1'))
+        DeferredLoopingCall.calls[1].run()
+        job1.assert_called_once_with()
+        job2.assert_not_called()
+        job3.assert_called_once_with()
+        self.assertFalse(self.scheduler.is_running('c1'))
+
+    def test_submit_bounded_by_pool_size(self):
+        self.config(sync_pool_size=2, group='periodic')
+        self.assertTrue(self.scheduler.submit('c1', self._job()))
+        self.assertTrue(self.scheduler.submit('c2', self._job()))
+        self.assertFalse(self.scheduler.submit('c3', self._job()))
+        self.assertEqual(2, self.scheduler.running)
+        DeferredLoopingCall.calls[0].run()
+        self.assertTrue(self.scheduler.submit('c3', self._job()))
+
+    def test_submit_unbounded_pool(self):
+        self.config(sync_pool_size=0, group='periodic')
+        for i in range(100):
+            self.assertTrue(self.scheduler.submit('c%d' % i, self._job()))
+        self.assertEqual(100, self.scheduler.running)
+
+    def test_job_timeout_frees_slot(self):
+        self.config(sync_job_timeout=5, group='periodic')
+        job = mock.MagicMock(side_effect=eventlet_timeout.Timeout())
+        self.scheduler.submit('c1', job)
+        DeferredLoopingCall.calls[0].run()
+        self.assertFalse(self.scheduler.is_running('c1'))
+
+    def test_job_failure_frees_slot(self):
+        job = mock.MagicMock(side_effect=Exception('boom'))
+        self.scheduler.submit('c1', job)
+        self.assertRaises(Exception, DeferredLoopingCall.calls[0].run)
+        self.assertFalse(self.scheduler.is_running('c1'))
+
+
+class ClusterPollScheduleTestCase(base.TestCase):
+
+    def setUp(self):
+        super(ClusterPollScheduleTestCase, self).setUp()
+        self.config(poll_max_interval=60, group='periodic')
+        self.schedule = periodic.ClusterPollSchedule('test', 10)
+        self.cluster = objects.Cluster(
+            context.make_admin_context(),
+            **utils.get_test_cluster(status=cluster_status.CREATE_COMPLETE,
+                                     health_status=None,
+                                     health_status_reason={}))
+        self.now = datetime.datetime(2019, 1, 1)
+
+    def _at(self, seconds):
+        return self.now + datetime.timedelta(seconds=seconds)
+
+    def _polled(self, now):
+        self.schedule.polled(self.cluster.uuid,
+                             self.schedule.fingerprint(self.cluster), now)
+
+    def _interval(self):
+        return self.schedule.get_state()[self.cluster.uuid]['interval']
+
+    def test_new_cluster_is_due(self):
+        self.assertTrue(self.schedule.is_due(self.cluster, self.now))
+
+    def test_interval_backs_off_while_unchanged(self):
+        elapsed = 0
+        for expected in (10, 20, 40, 60, 60):
+            self.assertTrue(self.schedule.is_due(self.cluster,
+                                                 self._at(elapsed)))
+            self._polled(self._at(elapsed))
+            self.assertEqual(expected, self._interval())
+            self.assertFalse(self.schedule.is_due(
+                self.cluster, self._at(elapsed + expected - 1)))
+            elapsed += expected
+
+    def test_no_backoff_while_in_progress(self):
+        self.cluster.status = cluster_status.CREATE_IN_PROGRESS
+        elapsed = 0
+        for i in range(5):
+            self.assertTrue(self.schedule.is_due(self.cluster,
+                                                 self._at(elapsed)))
+            self._polled(self._at(elapsed))
+            self.assertEqual(10, self._interval())
+            elapsed += 10
+
+    def test_backoff_while_in_progress_with_notifications(self):
+        self.config(enable_notification_listener=True, group='cluster_heat')
+        self.cluster.status = cluster_status.CREATE_IN_PROGRESS
+        elapsed = 0
+        for expected in (10, 20, 40, 60, 60):
+            self.assertTrue(self.schedule.is_due(self.cluster,
+                                                 self._at(elapsed)))
+            self._polled(self._at(elapsed))
+            self.assertEqual(expected, self._interval())
+            elapsed += expected
+
+    def test_interval_resets_on_change(self):
+        for i in range(4):
+            self._polled(self.now)
+        self.assertEqual(60, self._interval())
+        self.cluster.health_status = cluster_health_status.UNHEALTHY
+        self.assertTrue(self.schedule.is_due(self.cluster, self.now))
+        self._polled(self.now)
+        self.assertEqual(10, self._interval())
+
+    def test_interval_resets_on_status_change(self):
+        for i in range(4):
+            self._polled(self.now)
+        self.cluster.status = cluster_status.UPDATE_IN_PROGRESS
+        self.assertTrue(self.schedule.is_due(self.cluster, self.now))
+        self._polled(self.now)
+        self.assertEqual(10, self._interval())
+
+    def test_no_backoff(self):
+        self.config(poll_max_interval=10, group='periodic')
+        for i in range(4):
+            self._polled(self.now)
+        self.assertEqual(10, self._interval())
+
+    def test_prune(self):
+        self._polled(self.now)
+        self.schedule.prune([])
+        self.assertEqual({}, self.schedule.get_state())
+
+    def test_get_state(self):
+        self._polled(self.now)
+        self.assertEqual(
+            {self.cluster.uuid: {'interval': 10,
+                                 'next_poll': '2019-01-01T00:00:10'}},
+            self.schedule.get_state())
+
+    @mock.patch('oslo_service.loopingcall.FixedIntervalLoopingCall',
+                new=fakes.FakeLoopingCall)
+    @mock.patch('magnum.conductor.monitors.create_monitor')
+    @mock.patch('magnum.objects.Cluster.list')
+    def test_sync_cluster_health_status_skips_not_due(
+            self, mock_cluster_list, mock_create_monitor):
+        mock_cluster_list.return_value = [self.cluster]
+        mock_create_monitor.return_value = None
+        tasks = periodic.MagnumPeriodicTasks(CONF)
+
+        tasks.sync_cluster_health_status(None)
+        tasks.sync_cluster_health_status(None)
+
+        self.assertEqual(1, mock_create_monitor.call_count)
+        self.assertIn(self.cluster.uuid,
+                      tasks.health_schedule.get_state())
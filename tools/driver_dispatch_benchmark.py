@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Benchmark the per-cluster cost of resolving the driver of a cluster.
+
+The driver of every installed cluster type is resolved as the periodic
+tasks do for each cluster, once by loading it through stevedore on every
+call like magnum used to, and once through the driver cache.
+
+Usage::
+
+    python tools/driver_dispatch_benchmark.py [--clusters 1000]
+
+magnum must be installed so that its drivers are registered as entry points.
+"""
+
+from __future__ import print_function
+
+import argparse
+import timeit
+
+import magnum.conf
+from magnum.drivers.common import driver
+
+CONF = magnum.conf.CONF
+
+
+def _dispatch(cluster_types, clusters, cached):
+    for i in range(clusters):
+        if not cached:
+            driver.Driver._drivers = {}
+        driver.Driver.get_driver(*cluster_types[i % len(cluster_types)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clusters', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    CONF([], project='magnum')
+
+    cluster_types = sorted(driver.Driver.get_drivers())
+    if not cluster_types:
+        parser.error('no cluster driver is installed')
+    print('%d cluster types, %d clusters per run' % (len(cluster_types),
+                                                     args.clusters))
+
+    results = {}
+    for label, cached in (('stevedore per call', False), ('cached', True)):
+        driver.Driver.reload_drivers()
+        timer = timeit.Timer(
+            lambda: _dispatch(cluster_types, args.clusters, cached))
+        elapsed = min(timer.repeat(repeat=args.repeat, number=1))
+        results[label] = elapsed
+        print('%-20s %10.2f us per cluster' % (
+            label, elapsed * 1e6 / args.clusters))
+
+    print('speedup %28.1fx' % (results['stevedore per call'] /
+                               max(results['cached'], 1e-9)))
+
+
+if __name__ == '__main__':
+    main()